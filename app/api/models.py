@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, Any, Dict, List
 from pydantic import BaseModel, Field
 
@@ -17,6 +18,9 @@ class ConversionRequest(BaseModel):
     force_ocr: bool = Field(
         False, description="Whether to force OCR processing on the entire document"
     )
+    quality: str = Field(
+        "standard", description="Quality profile: draft, standard or high"
+    )
 
 
 class ConversionResponse(BaseModel):
@@ -29,6 +33,8 @@ class ConversionResponse(BaseModel):
     error: Optional[str] = None
     cached: bool = False
     file_hash: Optional[str] = None
+    engine: Optional[str] = None  # "fast" (text layer) or "full" (marker)
+    quality: Optional[str] = None
 
 
 class AsyncTaskResponse(BaseModel):
@@ -38,9 +44,69 @@ class AsyncTaskResponse(BaseModel):
     message: str
     task_id: Optional[str] = None
     file_hash: Optional[str] = None
+    queue: Optional[str] = None
+    estimated_pages: Optional[int] = None
     error: Optional[str] = None
 
 
+class BatchEntry(BaseModel):
+    """One document of a batch"""
+
+    filename: str
+    file_hash: str
+    cached: bool = False
+    task_id: Optional[str] = None
+    queue: Optional[str] = None
+    status: Optional[str] = None  # COMPLETED, FAILED or the task state
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Model for response when a batch is submitted"""
+
+    success: bool
+    message: str
+    batch_id: Optional[str] = None
+    group_id: Optional[str] = None
+    total: int = 0
+    cached: int = 0
+    enqueued: int = 0
+    entries: List[BatchEntry] = []
+    skipped: List[Dict[str, str]] = Field(
+        default_factory=list, description="Files not converted, with the reason."
+    )
+    error: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+    """Model for response when checking batch status"""
+
+    batch_id: str
+    total: int
+    completed: int
+    failed: int
+    pending: int
+    finished: bool
+    entries: List[BatchEntry] = []
+
+
+class PageSlice(BaseModel):
+    """Markdown of one page of a conversion"""
+
+    page: int  # 1-based
+    markdown: str
+
+
+class PageRangeResponse(BaseModel):
+    """Model for response when reading a page range of a conversion"""
+
+    file_hash: str
+    page_count: int
+    first_page: int
+    last_page: int
+    pages: List[PageSlice] = []
+
+
 class TaskStatusResponse(BaseModel):
     """Model for response when checking task status"""
 
@@ -51,12 +117,44 @@ class TaskStatusResponse(BaseModel):
     cached: bool = False
 
 
+class WorkerStatus(BaseModel):
+    """Task counts for one Celery worker."""
+
+    name: str
+    queues: List[str] = []
+    active: int
+    reserved: int
+
+
+class TaskEstimate(BaseModel):
+    """Estimated timing for a single task."""
+
+    task_id: str
+    state: str
+    queue: Optional[str] = None
+    position: Optional[int] = Field(
+        None, description="Tasks ahead of this one in its queue (0 = next)."
+    )
+    estimated_start: Optional[datetime] = None
+    estimated_completion: Optional[datetime] = None
+
+
 class QueueStatusResponse(BaseModel):
     """Response model for queue status."""
 
     pending_tasks: int = Field(
-        ..., description="Estimated number of tasks waiting in the queue."
+        ..., description="Number of tasks waiting in all conversion queues."
+    )
+    queues: Dict[str, int] = Field(
+        default_factory=dict, description="Tasks waiting per broker queue."
+    )
+    workers: Optional[List[WorkerStatus]] = Field(
+        None, description="Per-worker task counts; null if no worker replied."
+    )
+    pages_per_second: Optional[float] = Field(
+        None, description="Recent conversion throughput per worker."
     )
+    task: Optional[TaskEstimate] = None
 
 
 class HealthResponse(BaseModel):
@@ -66,3 +164,5 @@ class HealthResponse(BaseModel):
     llm_available: bool
     torch_device: str
     version: str
+    # CPU and thread layout per worker; None if no worker replied
+    workers_cpu: Optional[Dict[str, Dict[str, Any]]] = None
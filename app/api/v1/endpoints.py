@@ -1,9 +1,12 @@
+import html
 import logging
 import os
 import json
 import re
+import uuid
 from pathlib import Path
 from functools import lru_cache
+from urllib.parse import quote
 from typing import Optional, List
 from fastapi import (
     APIRouter,
@@ -17,30 +20,75 @@ from fastapi import (
     status,
     Query,
 )
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from celery.result import AsyncResult
 import markdown2
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from app.celery_app import celery_app
 from app.core.config import settings
+from app.core.metrics import (
+    BATCH_ENTRIES,
+    CACHE_LOOKUPS,
+    UPLOAD_BYTES,
+    render_metrics,
+)
 from app.db.base import get_db
 from app.db.crud import (
+    create_batch as db_create_batch,
+    get_batch as db_get_batch,
     get_conversion_by_hash_and_params as db_get_conversion_by_hash_and_params,
+    get_conversion_markdown_slice as db_get_conversion_markdown_slice,
+    get_conversion_page_index as db_get_conversion_page_index,
+    get_conversions_by_hashes_and_params as db_get_conversions_by_hashes_and_params,
+    record_conversions_access,
+    save_conversion_page_offsets as db_save_conversion_page_offsets,
     update_conversion_access,
-    count_pending_conversions,
 )
 from app.services.file_service import (
     save_upload_file,
     store_file_permanently,
     cleanup_temp_file,
 )
+from app.services import dispatch
 from app.services.converter import convert_pdf_task
+from app.services.batch import (
+    BatchError,
+    enqueue_misses,
+    entry_states,
+    extract_uploads,
+    plan_jobs,
+    stream_archive,
+)
+from app.services.image_store import OUTPUT_FORMATS, image_store
+from app.services.image_variants import get_variant, source_path
+from app.services.image_variants import srcset as variant_srcset
+from app.services.pages import find_page_spans, parse_page_range
+from app.services.routing import select_profile, queue_for_profile
+from app.services.estimator import estimate_pdf
+from app.services.quality import get_quality_profile
+from app.services.admission import admission_controller
+from app.services.queue_stats import (
+    get_queue_lengths,
+    get_worker_activity,
+    get_worker_cpu,
+    get_throughput,
+    estimate_task_completion,
+)
 from app.api.models import (
+    BatchEntry,
+    BatchResponse,
+    BatchStatusResponse,
     ConversionResponse,
     AsyncTaskResponse,
+    PageRangeResponse,
+    PageSlice,
     QueueStatusResponse,
+    WorkerStatus,
+    TaskEstimate,
     HealthResponse,
 )
 from app.db import models as db_models
@@ -66,6 +114,7 @@ def get_cached_markdown_from_memory(
     paginate_output: bool,
     extract_images: bool,
     force_ocr: bool,
+    quality: str,
 ) -> Optional[str]:
     return None
 
@@ -76,12 +125,20 @@ def update_memory_cache(
     paginate_output: bool,
     extract_images: bool,
     force_ocr: bool,
+    quality: str,
     markdown: Optional[str],
 ):
     if markdown is None:
         return
 
-    cache_key = (file_hash, use_llm, paginate_output, extract_images, force_ocr)
+    cache_key = (
+        file_hash,
+        use_llm,
+        paginate_output,
+        extract_images,
+        force_ocr,
+        quality,
+    )
     try:
         cache_info = get_cached_markdown_from_memory.cache_info()
         current_size = cache_info.currsize if cache_info.currsize is not None else 0
@@ -113,19 +170,23 @@ async def read_root(request: Request):
         },
         400: {"description": "Invalid input (e.g., not a PDF)"},
         413: {"description": "File too large"},
+        429: {"description": "Client quota exceeded, see Retry-After"},
         500: {
             "model": AsyncTaskResponse,
             "description": "Failed to enqueue task",
         },
+        503: {"description": "Queue wait above SLO, see Retry-After"},
     },
 )
 async def convert_pdf_endpoint(
+    request: Request,
     db: Session = Depends(get_db),
     file: UploadFile = File(...),
     use_llm: bool = Form(False),
     paginate_output: bool = Form(False),
     extract_images: bool = Form(True),
     force_ocr: bool = Form(False),
+    quality: str = Form(settings.DEFAULT_QUALITY),
 ):
     """
     Accepts a PDF file, checks cache, and enqueues a conversion task if not cached.
@@ -136,6 +197,7 @@ async def convert_pdf_endpoint(
     - paginate_output: Whether to paginate the output
     - extract_images: Whether to extract images from the PDF
     - force_ocr: Force OCR processing on the entire document
+    - quality: Quality profile (draft, standard or high)
     """
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(
@@ -157,6 +219,11 @@ async def convert_pdf_endpoint(
             detail=f"File too large. Maximum allowed size is {settings.MAX_UPLOAD_SIZE}MB",
         )
 
+    try:
+        get_quality_profile(quality)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     effective_use_llm = use_llm
     if use_llm and not settings.llm_available:
         logger.warning(
@@ -168,10 +235,19 @@ async def convert_pdf_endpoint(
     try:
         temp_file_path_obj, file_hash = await save_upload_file(file)
         temp_file_path = str(temp_file_path_obj)
+        UPLOAD_BYTES.inc(os.path.getsize(temp_file_path))
 
         cached_markdown = get_cached_markdown_from_memory(
-            file_hash, effective_use_llm, paginate_output, extract_images, force_ocr
+            file_hash,
+            effective_use_llm,
+            paginate_output,
+            extract_images,
+            force_ocr,
+            quality,
         )
+        CACHE_LOOKUPS.labels(
+            tier="memory", result="hit" if cached_markdown is not None else "miss"
+        ).inc()
         if cached_markdown is not None:
             logger.info(
                 f"In-memory cache hit for file: {file.filename} (hash: {file_hash}) - Markdown only"
@@ -184,6 +260,7 @@ async def convert_pdf_endpoint(
                     paginate_output,
                     extract_images,
                     force_ocr,
+                    quality,
                 )
             )
             image_paths = None
@@ -229,9 +306,13 @@ async def convert_pdf_endpoint(
                 paginate_output,
                 extract_images,
                 force_ocr,
+                quality,
             )
         )
 
+        CACHE_LOOKUPS.labels(
+            tier="db", result="hit" if cached_conversion else "miss"
+        ).inc()
         if cached_conversion:
             update_conversion_access(db, file_hash)
             logger.info(
@@ -254,6 +335,7 @@ async def convert_pdf_endpoint(
                 bool(cached_conversion.paginate_output),
                 bool(cached_conversion.extract_images),
                 bool(cached_conversion.force_ocr),
+                cached_conversion.quality,
                 cached_conversion.markdown_content,
             )
 
@@ -275,6 +357,8 @@ async def convert_pdf_endpoint(
                 image_paths=image_paths,
                 cached=True,
                 file_hash=file_hash,
+                engine=cached_conversion.engine,
+                quality=cached_conversion.quality,
             )
             return Response(
                 content=db_cache_response.model_dump_json(),
@@ -286,25 +370,40 @@ async def convert_pdf_endpoint(
             f"Cache miss for file: {file.filename} (hash: {file_hash}). Enqueuing conversion task."
         )
 
-        priority_level = 5 if effective_use_llm else 4
-        task = convert_pdf_task.apply_async(
-            args=[temp_file_path, file_hash, file.filename],
-            kwargs={
+        estimate = await run_in_threadpool(estimate_pdf, temp_file_path)
+        profile = select_profile(
+            effective_use_llm, force_ocr, os.path.getsize(temp_file_path), estimate
+        )
+        queue_name = queue_for_profile(profile)
+        client = admission_controller.client_id(request)
+        await run_in_threadpool(admission_controller.check, db, client, queue_name)
+
+        task = dispatch.send(
+            convert_pdf_task,
+            [temp_file_path, file_hash, file.filename],
+            {
                 "use_llm": effective_use_llm,
                 "force_ocr": force_ocr,
                 "extract_images": extract_images,
                 "paginate_output": paginate_output,
+                "estimated_pages": estimate.page_count if estimate else None,
+                "quality": quality,
             },
-            priority=priority_level,
+            queue_name,
         )
 
-        logger.info(f"Task enqueued with ID: {task.id} for file {file.filename}")
+        admission_controller.record(client, task.id)
+        logger.info(
+            f"Task enqueued with ID: {task.id} for file {file.filename} (profile: {profile}, queue: {queue_name})"
+        )
 
         enqueue_response = AsyncTaskResponse(
             success=True,
             message=f"Conversion task for {file.filename} enqueued.",
             task_id=task.id,
             file_hash=file_hash,
+            queue=queue_name,
+            estimated_pages=estimate.page_count if estimate else None,
         )
         return Response(
             content=enqueue_response.model_dump_json(),
@@ -350,6 +449,229 @@ async def convert_pdf_endpoint(
         )
 
 
+@router.post(
+    "/batch/convert",
+    response_model=None,
+    responses={
+        202: {
+            "model": BatchResponse,
+            "description": "Batch accepted; cached documents need no task",
+        },
+        400: {"description": "Invalid input (e.g., no PDF in the batch)"},
+        413: {"description": "Too many files or bytes in the batch"},
+        429: {"description": "Client quota exceeded, see Retry-After"},
+        500: {"model": BatchResponse, "description": "Failed to enqueue batch"},
+        503: {"description": "Queue wait above SLO, see Retry-After"},
+    },
+)
+async def convert_batch_endpoint(
+    request: Request,
+    db: Session = Depends(get_db),
+    files: List[UploadFile] = File(...),
+    use_llm: bool = Form(False),
+    paginate_output: bool = Form(False),
+    extract_images: bool = Form(True),
+    force_ocr: bool = Form(False),
+    quality: str = Form(settings.DEFAULT_QUALITY),
+):
+    """
+    Accepts several PDFs, or ZIP archives of PDFs, converted with the same options.
+    Cached documents are looked up in one query and the rest are enqueued as one
+    Celery group. Returns a batch ID (202 Accepted); poll /batch/{batch_id} and
+    download the results from /batch/{batch_id}/archive.
+
+    - files: PDF files and/or ZIP archives of PDF files
+    - use_llm, paginate_output, extract_images, force_ocr, quality: as for /convert
+    """
+    try:
+        get_quality_profile(quality)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    effective_use_llm = use_llm
+    if use_llm and not settings.llm_available:
+        logger.warning(
+            "LLM enhancement requested but no API keys configured - proceeding without LLM"
+        )
+        effective_use_llm = False
+
+    try:
+        batch_files, skipped = await run_in_threadpool(extract_uploads, files)
+    except BatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    BATCH_ENTRIES.labels(result="skipped").inc(len(skipped))
+    if not batch_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No PDF files in the batch",
+        )
+    UPLOAD_BYTES.inc(sum(batch_file.size for batch_file in batch_files))
+
+    options = {
+        "use_llm": effective_use_llm,
+        "paginate_output": paginate_output,
+        "extract_images": extract_images,
+        "force_ocr": force_ocr,
+        "quality": quality,
+    }
+    enqueued_paths = set()
+    try:
+        cached_rows = db_get_conversions_by_hashes_and_params(
+            db, [batch_file.file_hash for batch_file in batch_files], **options
+        )
+        record_conversions_access(db, [row.id for row in cached_rows.values()])
+
+        entries = []
+        entry_for_hash = {}
+        misses = []
+        for batch_file in batch_files:
+            cached = batch_file.file_hash in cached_rows
+            CACHE_LOOKUPS.labels(tier="db", result="hit" if cached else "miss").inc()
+            entry = {
+                "filename": batch_file.filename,
+                "file_hash": batch_file.file_hash,
+                "cached": cached,
+                "task_id": None,
+                "queue": None,
+            }
+            entries.append(entry)
+            # The same file twice in a batch is converted once
+            if not cached and batch_file.file_hash not in entry_for_hash:
+                entry_for_hash[batch_file.file_hash] = entry
+                misses.append(batch_file)
+
+        jobs = await run_in_threadpool(plan_jobs, misses, options)
+        client = admission_controller.client_id(request)
+        if jobs:
+            # The whole batch counts against the quota before any of it is enqueued
+            await run_in_threadpool(
+                admission_controller.check_client, client, len(jobs)
+            )
+        for queue_name in sorted({queue_name for _, queue_name, _ in jobs}):
+            await run_in_threadpool(
+                admission_controller.check_queue, db, client, queue_name
+            )
+
+        group_id, task_ids = enqueue_misses(jobs)
+        for (batch_file, queue_name, _), task_id in zip(jobs, task_ids):
+            enqueued_paths.add(batch_file.path)
+            admission_controller.record(client, task_id)
+            entry_for_hash[batch_file.file_hash].update(
+                task_id=task_id, queue=queue_name
+            )
+        for entry in entries:
+            if not entry["cached"]:
+                first = entry_for_hash[entry["file_hash"]]
+                entry.update(task_id=first["task_id"], queue=first["queue"])
+
+        batch_id = str(uuid.uuid4())
+        db_create_batch(db, batch_id, options, entries, group_id=group_id)
+        cached_count = sum(1 for entry in entries if entry["cached"])
+        BATCH_ENTRIES.labels(result="cached").inc(cached_count)
+        BATCH_ENTRIES.labels(result="enqueued").inc(len(task_ids))
+        logger.info(
+            f"Batch {batch_id}: {len(entries)} documents, {cached_count} cached, {len(task_ids)} enqueued (group {group_id})"
+        )
+
+        batch_response = BatchResponse(
+            success=True,
+            message=f"Batch of {len(entries)} documents accepted.",
+            batch_id=batch_id,
+            group_id=group_id,
+            total=len(entries),
+            cached=cached_count,
+            enqueued=len(task_ids),
+            entries=[BatchEntry(**entry) for entry in entries],
+            skipped=skipped,
+        )
+        return Response(
+            content=batch_response.model_dump_json(),
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/json",
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error processing batch upload: {str(e)}")
+        error_response_payload = BatchResponse(
+            success=False,
+            message="Failed to enqueue batch due to an internal error.",
+            error=str(e),
+        )
+        return Response(
+            content=error_response_payload.model_dump_json(),
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            media_type="application/json",
+        )
+    finally:
+        # Enqueued files are removed by their task
+        for batch_file in batch_files:
+            if batch_file.path not in enqueued_paths:
+                cleanup_temp_file(batch_file.path)
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str, db: Session = Depends(get_db)):
+    """Status of every document of a batch"""
+    batch = db_get_batch(db, batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found"
+        )
+    states = await run_in_threadpool(entry_states, db, batch)
+    completed = sum(1 for state in states if state["status"] == "COMPLETED")
+    failed = sum(1 for state in states if state["status"] == "FAILED")
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=len(states),
+        completed=completed,
+        failed=failed,
+        pending=len(states) - completed - failed,
+        finished=completed + failed == len(states),
+        entries=[BatchEntry(**state) for state in states],
+    )
+
+
+@router.get(
+    "/batch/{batch_id}/archive",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/zip": {}}},
+        404: {"description": "Batch not found"},
+        409: {"description": "Batch still running and partial not set"},
+    },
+)
+async def download_batch_archive(
+    batch_id: str,
+    partial: bool = Query(False, description="Download before every document is done"),
+    db: Session = Depends(get_db),
+):
+    """
+    ZIP archive of a batch's Markdown and images, streamed as it is built.
+    batch.json in the archive lists every document with its status.
+    """
+    batch = db_get_batch(db, batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found"
+        )
+    if not partial:
+        states = await run_in_threadpool(entry_states, db, batch)
+        if any(state["status"] not in ("COMPLETED", "FAILED") for state in states):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Batch is still running; pass partial=true to download finished documents",
+            )
+    return StreamingResponse(
+        stream_archive(batch_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.zip"'},
+    )
+
+
 @router.get(
     "/tasks/{task_id}",
     response_model=None,
@@ -376,6 +698,7 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
                 paginate_output = task_info.get("paginate_output")
                 extract_images = task_info.get("extract_images")
                 force_ocr = task_info.get("force_ocr")
+                quality = task_info.get("quality", settings.DEFAULT_QUALITY)
 
                 if file_hash:
                     db_conversion: Optional[db_models.ConversionCache] = (
@@ -386,6 +709,7 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
                             paginate_output,
                             extract_images,
                             force_ocr,
+                            quality,
                         )
                     )
                     if db_conversion:
@@ -406,6 +730,7 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
                             bool(db_conversion.paginate_output),
                             bool(db_conversion.extract_images),
                             bool(db_conversion.force_ocr),
+                            db_conversion.quality,
                             db_conversion.markdown_content,
                         )
                         success_payload = ConversionResponse(
@@ -415,6 +740,8 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
                             image_paths=image_paths,
                             cached=False,
                             file_hash=file_hash,
+                            engine=db_conversion.engine,
+                            quality=db_conversion.quality,
                         )
                         return Response(
                             content=success_payload.model_dump_json(),
@@ -484,22 +811,168 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/queue/status", response_model=QueueStatusResponse)
-async def get_queue_status(db: Session = Depends(get_db)):
-    pending_count = count_pending_conversions(db)
-    return QueueStatusResponse(pending_tasks=pending_count)
+def get_queue_status(
+    task_id: Optional[str] = Query(None, description="Task to estimate completion for"),
+    db: Session = Depends(get_db),
+):
+    """
+    Reports broker queue lengths, per-worker active/reserved tasks and,
+    when task_id is given, that task's position and estimated completion.
+    """
+    try:
+        queue_lengths = get_queue_lengths()
+    except Exception as e:
+        logger.error(f"Could not read broker queue lengths: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Broker unavailable.",
+        )
+
+    workers = get_worker_activity()
+    task_estimate = None
+    if task_id:
+        task_estimate = TaskEstimate(**estimate_task_completion(db, task_id))
+
+    return QueueStatusResponse(
+        pending_tasks=sum(queue_lengths.values()),
+        queues=queue_lengths,
+        workers=[WorkerStatus(**worker) for worker in workers] if workers else None,
+        pages_per_second=get_throughput(db)["pages_per_second"],
+        task=task_estimate,
+    )
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "llm_available": settings.llm_available,
         "torch_device": settings.TORCH_DEVICE,
         "version": settings.API_VERSION,
+        "workers_cpu": get_worker_cpu(),
     }
 
 
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics for this host (all processes when multiprocess)"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/images/{file_hash}/{name}")
+async def get_image_variant(
+    file_hash: str,
+    name: str,
+    w: int = Query(..., gt=0, description="Maximum width in pixels"),
+    format: Optional[str] = Query(None, description="webp, png or jpeg"),
+):
+    """
+    Serves an extracted image resized to (at most) the nearest configured
+    variant width, optionally re-encoded. Variants are generated on first
+    request and cached on disk.
+    """
+    if format and format.lower() not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}'. Use one of: {', '.join(OUTPUT_FORMATS)}",
+        )
+    if not settings.IMAGE_VARIANT_WIDTHS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image variants are disabled."
+        )
+    source = source_path(file_hash, name)
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found."
+        )
+    path, media_type = await run_in_threadpool(get_variant, source, w, format)
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"Cache-Control": f"public, max-age={settings.IMAGE_VARIANT_MAX_AGE}"},
+    )
+
+
+@router.get(
+    "/conversions/{file_hash}/pages",
+    response_model=PageRangeResponse,
+    responses={
+        400: {"description": "Invalid page range, or conversion not complete"},
+        404: {"description": "Conversion not found"},
+        409: {"description": "Conversion has no page index"},
+    },
+)
+def get_conversion_pages(
+    file_hash: str,
+    pages: str = Query(..., description="1-based inclusive range, e.g. 40-45"),
+    use_llm: bool = Query(False),
+    paginate_output: bool = Query(False),
+    extract_images: bool = Query(True),
+    force_ocr: bool = Query(False),
+    quality: str = Query(settings.DEFAULT_QUALITY),
+    db: Session = Depends(get_db),
+):
+    """
+    Markdown of a range of pages of a completed conversion. Only the
+    requested pages are read from the database, located with the page index
+    stored with the conversion.
+    """
+    index = db_get_conversion_page_index(
+        db, file_hash, use_llm, paginate_output, extract_images, force_ocr, quality
+    )
+    if index is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversion with specified hash and parameters not found.",
+        )
+    conversion_id, conversion_status, page_offsets = index
+    if conversion_status != "COMPLETED":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Conversion is not complete. Current status: {conversion_status}",
+        )
+
+    if page_offsets is None:
+        # Saved before page indexes were stored: index it once if it has
+        # page breaks
+        conversion = db_get_conversion_by_hash_and_params(
+            db, file_hash, use_llm, paginate_output, extract_images, force_ocr, quality
+        )
+        page_offsets = find_page_spans(conversion.markdown_content or "")
+        if page_offsets is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This conversion predates page indexes; convert it again to read page ranges",
+            )
+        db_save_conversion_page_offsets(db, conversion_id, page_offsets)
+
+    try:
+        first, last = parse_page_range(pages, len(page_offsets))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    start = page_offsets[first - 1][0]
+    text = db_get_conversion_markdown_slice(
+        db, conversion_id, start, page_offsets[last - 1][1]
+    )
+    record_conversions_access(db, [conversion_id])
+    return PageRangeResponse(
+        file_hash=file_hash,
+        page_count=len(page_offsets),
+        first_page=first,
+        last_page=last,
+        pages=[
+            PageSlice(
+                page=page, markdown=text[page_start - start : page_end - start].strip()
+            )
+            for page, (page_start, page_end) in enumerate(
+                page_offsets[first - 1 : last], first
+            )
+        ],
+    )
+
+
 @router.get("/view/{file_hash}", response_class=HTMLResponse)
 async def view_conversion(
     request: Request,
@@ -508,18 +981,19 @@ async def view_conversion(
     paginate_output: bool = Query(False),
     extract_images: bool = Query(True),
     force_ocr: bool = Query(False),
+    quality: str = Query(settings.DEFAULT_QUALITY),
     db: Session = Depends(get_db),
 ):
     """
     Retrieves a completed conversion and renders its Markdown content as HTML.
     """
     logger.info(
-        f"Request to view conversion for hash: {file_hash} with params: llm={use_llm}, paginate={paginate_output}, images={extract_images}, ocr={force_ocr}"
+        f"Request to view conversion for hash: {file_hash} with params: llm={use_llm}, paginate={paginate_output}, images={extract_images}, ocr={force_ocr}, quality={quality}"
     )
 
     conversion: Optional[db_models.ConversionCache] = (
         db_get_conversion_by_hash_and_params(
-            db, file_hash, use_llm, paginate_output, extract_images, force_ocr
+            db, file_hash, use_llm, paginate_output, extract_images, force_ocr, quality
         )
     )
 
@@ -538,16 +1012,31 @@ async def view_conversion(
     markdown_content = conversion.markdown_content or ""
     original_filename = conversion.original_filename or "Converted Document"
 
+    manifest = image_store.load_manifest(file_hash)
+
     def replace_image_path(match):
         alt_text = match.group(1)
         original_path = match.group(2)
 
-        # Construct the correct web-accessible path
-        # URL should be /uploads/<file_hash>/images/<original_path>
-        new_path = f"/uploads/{file_hash}/images/{original_path.lstrip('/')}"
+        # Construct the correct web-accessible path: the stored blob, or
+        # /uploads/<file_hash>/images/<original_path> for older conversions
+        new_path = f"/uploads/{image_store.resolve(file_hash, original_path, manifest)}"
 
         logger.debug(f"Rewriting image path: '{original_path}' -> '{new_path}'")
-        return f"![{alt_text}]({new_path})"
+        if not settings.IMAGE_VARIANT_WIDTHS:
+            return f"![{alt_text}]({new_path})"
+
+        # Resized variants for the browser to pick from; the link opens the
+        # full-resolution image
+        name = quote(original_path.lstrip("/"))
+        candidates = ", ".join(
+            f"{url} {width}w" for url, width in variant_srcset(file_hash, name)
+        )
+        return (
+            f'<a href="{html.escape(new_path)}"><img src="{html.escape(new_path)}" '
+            f'srcset="{html.escape(candidates)}" sizes="(max-width: 850px) 100vw, 850px" '
+            f'alt="{html.escape(alt_text)}" loading="lazy"></a>'
+        )
 
     # Use regex to find Markdown image tags where the path is not an absolute URL
     # This regex finds ![alt](path) where path does NOT start with http(s)://
@@ -1,19 +1,115 @@
+import os
+from typing import Any, Dict
+
 from celery import Celery # type: ignore
+from celery.signals import ( # type: ignore
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from celery.worker.control import inspect_command # type: ignore
+from kombu import Queue # type: ignore
 from app.core.config import settings
+from app.core.cpu import (
+    apply_thread_env,
+    configure_worker_cpu,
+    cpu_info,
+    planned_cpu_info,
+)
+from app.core.metrics import mark_process_dead, start_worker_metrics_server
+from app.services.routing import all_queues, default_queue
+
+# Must run before the converter module pulls in torch
+apply_thread_env()
 
 celery_app = Celery(
     "worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.services.converter"],
+    include=[
+        "app.services.converter",
+        "app.services.eviction",
+        "app.services.janitor",
+    ],
 )
 
 celery_app.conf.update(
     task_serializer="json",
-    accept_content=["json"],  
+    accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    worker_concurrency=1, 
+    worker_concurrency=1,
     worker_prefetch_multiplier=1,
+    task_queues=[Queue(name) for name in all_queues()],
+    task_default_queue=default_queue(),
+    # Run with `celery -A app.celery_app beat`
+    beat_schedule={
+        "evict-cache": {
+            "task": "app.services.eviction.evict_cache_task",
+            "schedule": settings.EVICTION_INTERVAL_SECONDS,
+        },
+        "janitor": {
+            "task": "app.services.janitor.janitor_task",
+            "schedule": settings.JANITOR_INTERVAL_SECONDS,
+        },
+    },
 )
+
+if settings.EXECUTION_BACKEND == "local":
+    # No broker or worker: tasks run on the API's process pool and store
+    # their results in the database (see app.services.local_backend)
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="app.services.local_backend:LocalResultBackend",
+        task_store_eager_result=True,
+    )
+
+if settings.INFERENCE_BATCHING_ENABLED:
+    # Concurrent tasks in one process share models, so their model calls can
+    # be merged (see app.services.batching)
+    celery_app.conf.update(
+        worker_pool="threads",
+        worker_concurrency=settings.INFERENCE_BATCH_CONCURRENCY,
+    )
+
+
+@worker_init.connect
+def configure_worker_main_process(**kwargs):
+    # Covers the solo pool, where tasks run in the main worker process
+    configure_worker_cpu(settings.WORKER_INDEX)
+    if settings.WORKER_METRICS_PORT:
+        start_worker_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_init.connect
+def configure_worker_child_process(**kwargs):
+    # Prefork children each get their own core set
+    from billiard.process import current_process # type: ignore
+
+    index = getattr(current_process(), "index", 0) or 0
+    configure_worker_cpu(settings.WORKER_INDEX + index)
+
+
+@worker_process_shutdown.connect
+def release_child_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+@inspect_command()
+def cpu_config(state) -> Dict[str, Any]:
+    """
+    CPU and thread layout of this worker, for /health
+
+    Solo and thread pools run tasks in this (main) process. Prefork children
+    pin themselves when they start, so their configured layout is listed
+    per child under "processes".
+    """
+    info = cpu_info()
+    pool = state.consumer.pool
+    if type(pool).__module__ == "celery.concurrency.prefork":
+        info["processes"] = [
+            planned_cpu_info(settings.WORKER_INDEX + index)
+            for index in range(pool.limit)
+        ]
+    return info
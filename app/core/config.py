@@ -35,6 +35,61 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
 
+    # --- Execution Backend ---
+    # "celery" sends tasks to workers through the broker. "local" runs them on
+    # a process pool inside the API process, with task state in the database,
+    # so a single node needs neither Redis nor a Celery worker.
+    EXECUTION_BACKEND: str = "celery"
+    LOCAL_WORKERS: int = 1  # Pool processes; each holds its own loaded models
+    LOCAL_RESULT_EXPIRES: float = 86400.0  # Seconds finished tasks are kept
+
+    # --- Task Routing ---
+    # Each profile gets its own queue so worker pools can be scaled separately,
+    # e.g. `celery -A app.celery_app worker -Q convert.llm`. Workers started
+    # without -Q consume every queue below.
+    TASK_ROUTING_ENABLED: bool = True
+    CONVERSION_QUEUES: Dict[str, str] = {
+        "small": "convert.small",
+        "fast": "convert.fast",
+        "ocr": "convert.ocr",
+        "llm": "convert.llm",
+        "large": "convert.large",
+        "prewarm": "convert.prewarm",  # Watched-folder ingestion
+    }
+    LARGE_DOCUMENT_MB: int = 20  # Uploads above this go to the "large" queue
+    LARGE_DOCUMENT_PAGES: int = 200  # As are documents with more pages than this
+    # Text-layer jobs without LLM/OCR of at most this many pages go to "small"
+    SMALL_JOB_MAX_PAGES: int = 10
+
+    # --- Queue Statistics ---
+    QUEUE_STATS_TTL: float = 2.0  # Seconds to cache broker queue lengths
+    WORKER_STATS_TTL: float = 30.0  # Seconds to cache Celery inspect replies
+    WORKER_ACTIVITY_TTL: float = 5.0  # Seconds to cache active/reserved tasks
+    INSPECT_TIMEOUT: float = 1.0
+    QUEUE_SCAN_LIMIT: int = 5000  # Messages scanned per queue to locate a task
+    THROUGHPUT_WINDOW: int = 50  # Recent conversions in the throughput model
+    THROUGHPUT_MIN_SAMPLES: int = 5
+    DEFAULT_PAGES_PER_SECOND: float = 0.5  # Per worker, until samples exist
+    DEFAULT_PAGES_PER_JOB: float = 10.0
+
+    # --- Metrics ---
+    # Set PROMETHEUS_MULTIPROC_DIR (env) so /metrics aggregates every process
+    # on the host; otherwise workers can serve their own metrics on this port.
+    WORKER_METRICS_PORT: Optional[int] = None
+
+    # --- Admission Control ---
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_WAIT_SECONDS: float = 600.0  # Queue wait SLO; 503 beyond it
+    # Clients are told apart by their address. Behind a reverse proxy, list
+    # its addresses here: requests from them are attributed to the client
+    # named in ADMISSION_CLIENT_HEADER, which the proxy must set (overwriting
+    # any value sent by the client), e.g. ["10.0.0.2"].
+    ADMISSION_TRUSTED_PROXIES: List[str] = []
+    ADMISSION_CLIENT_HEADER: str = "X-Client-ID"
+    ADMISSION_CLIENT_JOBS_PER_MINUTE: int = 30  # 0 disables
+    ADMISSION_CLIENT_MAX_IN_FLIGHT: int = 10  # 0 disables
+    ADMISSION_IN_FLIGHT_RETRY_AFTER: int = 30
+
     # --- File Storage ---
     STORAGE_PATH: str = str(BASE_DIR / "storage")
     TEMP_PATH: str = str(BASE_DIR / "storage" / "temp")
@@ -44,14 +99,125 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 50  # In Megabytes
     TORCH_DEVICE: str = "cpu"  # or "cuda" if GPU is available
 
+    # --- Batch Conversion ---
+    # POST /batch/convert takes several PDFs or ZIP archives of PDFs; each PDF
+    # is also held to MAX_UPLOAD_SIZE
+    BATCH_MAX_FILES: int = 200  # PDFs per batch
+    BATCH_MAX_TOTAL_MB: int = 2048  # Extracted PDFs per batch
+
+    # --- Watched-Folder Ingestion ---
+    # `python -m app.services.ingest` (started by run.py when INGEST_DIR is
+    # set; the API server itself with EXECUTION_BACKEND=local) converts PDFs dropped into INGEST_DIR ahead of user requests, on
+    # the prewarm queue, and only while the other queues are nearly idle.
+    INGEST_DIR: str = ""  # Empty disables ingestion
+    # One conversion per entry; each overrides the /convert defaults, e.g.
+    # [{"quality": "draft"}, {"quality": "high", "paginate_output": true}]
+    INGEST_PROFILES: List[Dict[str, Any]] = [{}]
+    INGEST_USE_INOTIFY: bool = True  # Falls back to polling where unavailable
+    INGEST_POLL_INTERVAL: float = 10.0  # Seconds between scans when polling
+    INGEST_SETTLE_SECONDS: float = 5.0  # Unchanged this long = fully written
+    INGEST_SCAN_EXISTING: bool = True  # Also ingest files present at startup
+    INGEST_MAX_QUEUE_DEPTH: int = 0  # Waiting user jobs tolerated
+    INGEST_MAX_PENDING: int = 2  # Waiting prewarm jobs
+
+    # --- Worker CPU Tuning ---
+    TORCH_NUM_THREADS: Optional[int] = None  # Intra-op threads per worker process
+    TORCH_INTEROP_THREADS: Optional[int] = None
+    WORKER_CPU_SETS: str = ""  # One core set per worker process, e.g. "0-3;4-7"
+    WORKER_INDEX: int = 0  # Offset into WORKER_CPU_SETS for this worker instance
+
+    # --- Test Mode ---
+    # Replace marker with a stand-in that sleeps and returns filler Markdown,
+    # so the API and queueing can be load-tested without loading models.
+    FAKE_CONVERTER: bool = False
+    FAKE_CONVERTER_LATENCY: float = 0.5  # Seconds per document
+    FAKE_CONVERTER_PAGE_LATENCY: float = 0.0  # Additional seconds per page
+    FAKE_CONVERTER_OUTPUT_KB: int = 20  # Markdown size per document
+    # Answer use_llm requests with a local stand-in for the LLM service, which
+    # leaves every block unchanged, so they run without API keys or spend.
+    MOCK_LLM: bool = False
+    MOCK_LLM_LATENCY: float = 0.2  # Seconds per LLM request
+
+    # Quality profile used when a request does not name one (draft, standard
+    # or high; see app.services.quality)
+    DEFAULT_QUALITY: str = "standard"
+
+    # --- Text-Layer Fast Path ---
+    # Born-digital PDFs whose every page has a clean text layer are converted
+    # from that text directly, skipping the model pipeline.
+    FAST_PATH_ENABLED: bool = True
+    TEXT_LAYER_MAX_GARBLED_RATIO: float = 0.02  # Share of broken characters
+    # A page with little text is a scan when images cover this share of it
+    TEXT_LAYER_SCAN_MIN_IMAGE_COVERAGE: float = 0.5
+    FAST_PATH_MAX_IMAGE_COVERAGE: float = 0.05  # Share of a page's area
+    FAST_PATH_TABLE_CELL_GAP: float = 12.0  # Points between table cells
+    FAST_PATH_MIN_TABLE_ROWS: int = 3
+    # Without force_ocr, OCR only the pages whose text layer is garbled or
+    # missing, instead of marker's all-or-nothing choice per document.
+    ADAPTIVE_OCR_ENABLED: bool = True
+
+    # --- Inference Micro-Batching ---
+    # Run several conversions per worker process on threads sharing one set
+    # of models, merging their model calls into shared batches. Meant for
+    # workers on the small-job queue.
+    INFERENCE_BATCHING_ENABLED: bool = False
+    INFERENCE_BATCH_WINDOW_MS: int = 50  # Max wait for other tasks' pages
+    INFERENCE_BATCH_MAX_PAGES: int = 16  # Larger calls run unbatched
+    INFERENCE_BATCH_CONCURRENCY: int = 4  # Tasks per worker process
+
+    # --- Intermediate Artifact Cache ---
+    # Per-page page images, layout, line detection and OCR results, reused
+    # when the same file is converted again with different options.
+    ARTIFACT_CACHE_ENABLED: bool = True
+    # The janitor evicts the least recently used beyond this
+    ARTIFACT_CACHE_MAX_MB: int = 2048
+
+    # --- Image Store ---
+    # Extracted images are stored once per content hash; hard link them into
+    # each document's uploads/<file_hash>/images/ directory as well
+    IMAGE_STORE_HARDLINKS: bool = True
+    # Images are encoded on a thread pool while the task carries on
+    IMAGE_ENCODE_WORKERS: int = 4  # Per worker process
+    IMAGE_OUTPUT_FORMAT: str = ""  # webp, png or jpeg; empty keeps marker's
+    IMAGE_QUALITY: int = 85  # For webp and jpeg
+    IMAGE_MAX_DIMENSION: int = 0  # Longest side in pixels; 0 = no cap
+    # Widths /images/{file_hash}/{name}?w= serves and /view offers in srcset;
+    # an empty list turns resized variants off
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1024, 1600]
+    IMAGE_VARIANT_MAX_AGE: int = 86400  # Cache-Control max-age, seconds
+    DERIVED_IMAGE_CACHE_MAX_MB: int = 1024  # Least recently served evicted beyond
+
+    # --- Cache Eviction ---
+    # Celery beat runs the eviction service every EVICTION_INTERVAL_SECONDS,
+    # deleting the cached conversions least worth keeping (by reconversion
+    # cost, access count and recency per byte) until both quotas are met.
+    CACHE_QUOTA_MB: int = 10240  # Markdown, images and stored PDFs; 0 = no quota
+    CACHE_MAX_ROWS: int = 0  # 0 = no quota
+    EVICTION_INTERVAL_SECONDS: float = 3600.0
+    EVICTION_RECENCY_HALF_LIFE_HOURS: float = 72.0
+    EVICTION_MIN_AGE_SECONDS: float = 600.0  # Files newer than this are kept
+
+    # --- Janitor ---
+    # Celery beat also runs a janitor every JANITOR_INTERVAL_SECONDS that
+    # removes leftovers of crashed, killed or failed conversions.
+    JANITOR_INTERVAL_SECONDS: float = 900.0
+    # Temp uploads older than this belong to no live task: longer than the
+    # queue wait admission control allows plus the slowest conversion
+    TEMP_FILE_MAX_AGE_SECONDS: float = 6 * 3600.0
+    PARTIAL_OUTPUT_MIN_AGE_SECONDS: float = 3600.0  # Image dirs without a result
+
     # --- LLM Enhancement (Optional) ---
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
+    # Reuse responses for identical blocks (same provider, model, prompt and
+    # image) across documents; stored in the database
+    LLM_CACHE_ENABLED: bool = True
+    LLM_MAX_CONCURRENCY: int = 3  # Concurrent LLM requests per conversion
 
-    # Derived property to check if any LLM key is set
+    # Derived property to check if any LLM key is set, or the mock LLM is on
     @property
     def llm_available(self) -> bool:
-        return bool(self.OPENAI_API_KEY or self.ANTHROPIC_API_KEY)
+        return bool(self.OPENAI_API_KEY or self.ANTHROPIC_API_KEY or self.MOCK_LLM)
 
     # --- Logging Configuration ---
     LOGGING_CONFIG: Dict[str, Any] = {
@@ -0,0 +1,160 @@
+import os
+import sys
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("pdf2md.cpu")
+
+# Native thread pools read these once, when the library is first loaded, so
+# they must be set before torch/numpy are imported in the worker process.
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+def parse_cpu_set(spec: str) -> Set[int]:
+    """
+    Parse a core list such as "0-3,8,10-11" into a set of core ids
+
+    Args:
+        spec: Comma-separated cores and inclusive ranges
+
+    Returns:
+        Set[int]: The core ids
+    """
+    cores: Set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return cores
+
+
+def parse_cpu_sets(spec: str) -> List[Set[int]]:
+    """
+    Parse WORKER_CPU_SETS ("0-3;4-7") into one core set per worker process
+    """
+    return [parse_cpu_set(part) for part in spec.split(";") if part.strip()]
+
+
+def apply_thread_env(num_threads: Optional[int] = None) -> None:
+    """
+    Export OpenMP/MKL/BLAS thread counts for this process
+
+    Args:
+        num_threads: Threads per pool, defaults to TORCH_NUM_THREADS
+    """
+    num_threads = num_threads or settings.TORCH_NUM_THREADS
+    if not num_threads:
+        return
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(num_threads)
+
+
+def worker_cpu_plan(worker_index: int) -> Tuple[Optional[Set[int]], Optional[int]]:
+    """
+    Core set and torch thread count configured for a worker process
+
+    Args:
+        worker_index: Index of the worker process on the host
+
+    Returns:
+        Tuple[Optional[Set[int]], Optional[int]]: Cores to pin to and intra-op
+            threads, None where not configured
+    """
+    cores: Optional[Set[int]] = None
+    cpu_sets = parse_cpu_sets(settings.WORKER_CPU_SETS)
+    if cpu_sets:
+        cores = cpu_sets[worker_index % len(cpu_sets)]
+    # Without an explicit count, one intra-op thread per pinned core
+    num_threads = settings.TORCH_NUM_THREADS or (len(cores) if cores else None)
+    return cores, num_threads
+
+
+def planned_cpu_info(worker_index: int) -> Dict[str, Any]:
+    """
+    Describe the CPU layout a worker process is configured to take at start
+    """
+    cores, num_threads = worker_cpu_plan(worker_index)
+    return {
+        "worker_index": worker_index,
+        "affinity": sorted(cores) if cores else None,
+        "torch_num_threads": num_threads,
+    }
+
+
+def configure_worker_cpu(worker_index: int = 0) -> Dict[str, Any]:
+    """
+    Pin the current worker process to its core set and size torch thread pools
+
+    Args:
+        worker_index: Index of this worker process on the host, used to pick
+            its entry from WORKER_CPU_SETS
+
+    Returns:
+        Dict[str, Any]: The effective CPU configuration (see cpu_info)
+    """
+    cores, num_threads = worker_cpu_plan(worker_index)
+    if cores:
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, cores)
+            except OSError as e:
+                logger.error(f"Could not pin worker {worker_index} to {cores}: {e}")
+        else:
+            logger.warning("CPU pinning is not supported on this platform")
+
+    apply_thread_env(num_threads)
+
+    try:
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        if settings.TORCH_INTEROP_THREADS:
+            try:
+                torch.set_num_interop_threads(settings.TORCH_INTEROP_THREADS)
+            except RuntimeError as e:
+                # Only allowed once, before any inter-op parallel work started
+                logger.warning(f"Could not set torch interop threads: {e}")
+    except ImportError:
+        logger.warning("torch is not installed; skipping torch thread settings")
+
+    info = cpu_info()
+    logger.info(f"Worker {worker_index} CPU configuration: {info}")
+    return info
+
+
+def cpu_info() -> Dict[str, Any]:
+    """
+    Describe the configured and effective CPU layout of the current process
+    """
+    affinity = (
+        sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    )
+    info: Dict[str, Any] = {
+        "cpu_count": os.cpu_count(),
+        "affinity": affinity,
+        "configured_num_threads": settings.TORCH_NUM_THREADS,
+        "configured_interop_threads": settings.TORCH_INTEROP_THREADS,
+        "worker_cpu_sets": settings.WORKER_CPU_SETS or None,
+        "omp_num_threads": os.environ.get("OMP_NUM_THREADS"),
+    }
+    # Only report torch's view if it is already loaded; importing it here
+    # would make /health pay the torch import cost.
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        info["torch_num_threads"] = torch.get_num_threads()
+        info["torch_interop_threads"] = torch.get_num_interop_threads()
+    return info
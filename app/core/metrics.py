@@ -0,0 +1,185 @@
+import os
+import logging
+import resource
+from typing import Dict, Iterable
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+
+logger = logging.getLogger("pdf2md.metrics")
+
+# When PROMETHEUS_MULTIPROC_DIR is set (before this module is imported), every
+# process on the host writes its samples there and a scrape of any one of
+# them aggregates all: the API, Celery prefork children and solo workers.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "pdf2md_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+CACHE_LOOKUPS = Counter(
+    "pdf2md_cache_lookups_total",
+    "Conversion cache lookups by tier and outcome",
+    ["tier", "result"],
+)
+UPLOAD_BYTES = Counter(
+    "pdf2md_upload_bytes_total",
+    "Bytes received in uploaded PDFs",
+)
+BATCH_ENTRIES = Counter(
+    "pdf2md_batch_entries_total",
+    "Documents submitted in batches by outcome",
+    ["result"],
+)
+INGESTED_DOCUMENTS = Counter(
+    "pdf2md_ingested_documents_total",
+    "Watched-folder conversions by outcome",
+    ["result"],
+)
+CONVERSIONS = Counter(
+    "pdf2md_conversions_total",
+    "Finished conversion tasks by outcome",
+    ["status"],
+)
+CONVERSION_ENGINES = Counter(
+    "pdf2md_conversion_engine_total",
+    "Successful conversions by engine (text-layer fast path or full pipeline)",
+    ["engine"],
+)
+CONVERSION_SECONDS_PER_PAGE = Histogram(
+    "pdf2md_conversion_seconds_per_page",
+    "Conversion wall time divided by page count",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+CONVERSION_STAGE_SECONDS = Histogram(
+    "pdf2md_conversion_stage_seconds",
+    "Time spent per conversion stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "pdf2md_model_load_seconds",
+    "Time spent loading marker models",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120),
+)
+INFERENCE_BATCH_ITEMS = Histogram(
+    "pdf2md_inference_batch_items",
+    "Images per merged inference call when micro-batching",
+    ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+INFERENCE_BATCH_DOCUMENTS = Histogram(
+    "pdf2md_inference_batch_documents",
+    "Conversion calls merged into one inference call when micro-batching",
+    ["model"],
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+IMAGE_ENCODE_SECONDS = Histogram(
+    "pdf2md_image_encode_seconds",
+    "Time spent encoding one extracted image",
+    ["format"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+IMAGE_ENCODED_BYTES = Histogram(
+    "pdf2md_image_encoded_bytes",
+    "Size of one encoded extracted image",
+    ["format"],
+    buckets=(1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6),
+)
+CACHE_EVICTED_ENTRIES = Counter(
+    "pdf2md_cache_evicted_entries_total",
+    "Cached conversions deleted by the eviction service",
+)
+CACHE_EVICTED_BYTES = Counter(
+    "pdf2md_cache_evicted_bytes_total",
+    "Bytes reclaimed by the eviction service",
+    ["kind"],
+)
+JANITOR_REMOVED_FILES = Counter(
+    "pdf2md_janitor_removed_files_total",
+    "Leftover files and directories removed by the janitor",
+    ["kind"],
+)
+JANITOR_REMOVED_BYTES = Counter(
+    "pdf2md_janitor_removed_bytes_total",
+    "Bytes removed by the janitor",
+    ["kind"],
+)
+CACHE_STORAGE_BYTES = Gauge(
+    "pdf2md_cache_storage_bytes",
+    "Bytes held by cached conversions at the last eviction run",
+    multiprocess_mode="livemax",
+)
+WORKER_PEAK_RSS = Gauge(
+    "pdf2md_worker_peak_rss_bytes",
+    "Peak resident memory of the worker process",
+    multiprocess_mode="liveall",
+)
+
+
+class QueueDepthCollector:
+    """Reads broker queue lengths at scrape time"""
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        from app.services.queue_stats import get_queue_lengths
+
+        family = GaugeMetricFamily(
+            "pdf2md_queue_depth", "Tasks waiting per broker queue", labels=["queue"]
+        )
+        try:
+            lengths: Dict[str, int] = get_queue_lengths()
+        except Exception as e:
+            logger.warning(f"Could not read queue depth for metrics: {e}")
+            lengths = {}
+        for queue, depth in lengths.items():
+            family.add_metric([queue], depth)
+        yield family
+
+
+class _DefaultRegistryCollector:
+    """Re-exports the process-global registry inside a scrape registry"""
+
+    def collect(self):
+        return REGISTRY.collect()
+
+
+def scrape_registry(include_queue_depth: bool = True) -> CollectorRegistry:
+    """Registry to expose: aggregated across processes when multiprocess"""
+    registry = CollectorRegistry()
+    if MULTIPROCESS:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(_DefaultRegistryCollector())
+    if include_queue_depth:
+        registry.register(QueueDepthCollector())
+    return registry
+
+
+def render_metrics() -> bytes:
+    return generate_latest(scrape_registry())
+
+
+def record_worker_memory() -> None:
+    # ru_maxrss is KiB on Linux
+    WORKER_PEAK_RSS.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def start_worker_metrics_server(port: int) -> None:
+    """Expose worker metrics over HTTP for deployments without a shared dir"""
+    start_http_server(port, registry=scrape_registry(include_queue_depth=False))
+    logger.info(f"Worker metrics listening on port {port}")
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
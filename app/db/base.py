@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine, event
+from sqlalchemy import UniqueConstraint, create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging  
@@ -42,12 +42,87 @@ def init_db():
 
         logger.info("Initializing database and creating tables...")
         Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+        rebuild_changed_unique_constraints()
         logger.info("Database tables created successfully (if they didn't exist).")
     except Exception as e:
         logger.error(f"Error during database initialization: {e}", exc_info=True)
         raise
 
 
+def add_missing_columns():
+    """
+    Add columns introduced after a table was first created.
+
+    create_all() never alters existing tables, so databases created by older
+    versions would otherwise be missing newer columns. Only nullable columns
+    and columns with a server default can be added this way.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                definition = column.type.compile(dialect=engine.dialect)
+                if column.server_default is not None:
+                    definition += f" NOT NULL DEFAULT '{column.server_default.arg}'"
+                elif not column.nullable:
+                    continue
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {definition}"
+                    )
+                )
+
+
+def rebuild_changed_unique_constraints():
+    """
+    Recreate tables whose unique constraints differ from the models.
+
+    SQLite cannot alter constraints in place, so the table is renamed,
+    created afresh from the model and its rows copied over. Run after
+    add_missing_columns() so every model column exists in the old table.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {
+            tuple(sorted(c["column_names"]))
+            for c in inspector.get_unique_constraints(table.name)
+        }
+        wanted = {
+            tuple(sorted(col.name for col in constraint.columns))
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        }
+        if wanted <= existing:
+            continue
+
+        logger.info(f"Rebuilding table {table.name} for changed unique constraints")
+        old_name = f"{table.name}_old"
+        columns = ", ".join(col.name for col in table.columns)
+        # Indexes keep their names when a table is renamed
+        indexes = [index["name"] for index in inspector.get_indexes(table.name)]
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+            for index in indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            table.create(conn)
+            conn.execute(
+                text(
+                    f"INSERT INTO {table.name} ({columns}) "
+                    f"SELECT {columns} FROM {old_name}"
+                )
+            )
+            conn.execute(text(f"DROP TABLE {old_name}"))
+
+
 def get_db():
     """Dependency for database session"""
     db = SessionLocal()
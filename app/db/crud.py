@@ -1,8 +1,9 @@
 import datetime
 import json
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from . import models
 
 
@@ -31,6 +32,7 @@ def get_conversion_by_hash_and_params(
     paginate_output: bool,
     extract_images: bool,
     force_ocr: bool,
+    quality: str = "standard",
 ) -> Optional[models.ConversionCache]:
     """
     Retrieve a cached conversion based on file hash and all conversion parameters.
@@ -42,6 +44,7 @@ def get_conversion_by_hash_and_params(
         paginate_output: Whether pagination was applied
         extract_images: Whether images were extracted
         force_ocr: Whether OCR was forced
+        quality: Quality profile name
 
     Returns:
         ConversionCache: The cached conversion if found, None otherwise
@@ -54,11 +57,183 @@ def get_conversion_by_hash_and_params(
             models.ConversionCache.paginate_output == paginate_output,
             models.ConversionCache.extract_images == extract_images,
             models.ConversionCache.force_ocr == force_ocr,
+            models.ConversionCache.quality == quality,
         )
         .first()
     )
 
 
+def get_conversion_page_index(
+    db: Session,
+    file_hash: str,
+    use_llm: bool,
+    paginate_output: bool,
+    extract_images: bool,
+    force_ocr: bool,
+    quality: str = "standard",
+) -> Optional[Tuple[int, str, Optional[List[List[int]]]]]:
+    """
+    Look up a cached conversion's page index without loading its Markdown
+
+    Args:
+        db: Database session
+        file_hash: SHA-256 hash of the PDF file
+        use_llm: Whether LLM was used
+        paginate_output: Whether pagination was applied
+        extract_images: Whether images were extracted
+        force_ocr: Whether OCR was forced
+        quality: Quality profile name
+
+    Returns:
+        Optional[Tuple[int, str, Optional[List[List[int]]]]]: Row id, status
+            and page offsets (None if not stored), or None if not found
+    """
+    row = (
+        db.query(
+            models.ConversionCache.id,
+            models.ConversionCache.status,
+            models.ConversionCache.page_offsets,
+        )
+        .filter(
+            models.ConversionCache.file_hash == file_hash,
+            models.ConversionCache.use_llm == use_llm,
+            models.ConversionCache.paginate_output == paginate_output,
+            models.ConversionCache.extract_images == extract_images,
+            models.ConversionCache.force_ocr == force_ocr,
+            models.ConversionCache.quality == quality,
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return (
+        row.id,
+        row.status,
+        json.loads(row.page_offsets) if row.page_offsets else None,
+    )
+
+
+def get_conversion_markdown_slice(
+    db: Session, conversion_id: int, start: int, end: int
+) -> str:
+    """
+    Read part of a conversion's Markdown; only that part leaves the database
+
+    Args:
+        db: Database session
+        conversion_id: Conversion cache row id
+        start: First character, 0-based
+        end: Character after the last
+
+    Returns:
+        str: markdown_content[start:end]
+    """
+    return (
+        db.query(
+            func.substr(
+                models.ConversionCache.markdown_content, start + 1, max(end - start, 0)
+            )
+        )
+        .filter(models.ConversionCache.id == conversion_id)
+        .scalar()
+        or ""
+    )
+
+
+def save_conversion_page_offsets(
+    db: Session, conversion_id: int, page_offsets: List[List[int]]
+) -> None:
+    """
+    Store the page index of a conversion saved without one
+
+    Args:
+        db: Database session
+        conversion_id: Conversion cache row id
+        page_offsets: [start, end) character offsets of each page
+    """
+    db.query(models.ConversionCache).filter(
+        models.ConversionCache.id == conversion_id
+    ).update(
+        {models.ConversionCache.page_offsets: json.dumps(page_offsets)},
+        synchronize_session=False,
+    )
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error saving page offsets for conversion {conversion_id}: {e}")
+
+
+def get_conversions_by_hashes_and_params(
+    db: Session,
+    file_hashes: List[str],
+    use_llm: bool,
+    paginate_output: bool,
+    extract_images: bool,
+    force_ocr: bool,
+    quality: str = "standard",
+) -> Dict[str, models.ConversionCache]:
+    """
+    Retrieve the cached conversions of many files in one query
+
+    Args:
+        db: Database session
+        file_hashes: SHA-256 hashes of the PDF files
+        use_llm: Whether LLM was used
+        paginate_output: Whether pagination was applied
+        extract_images: Whether images were extracted
+        force_ocr: Whether OCR was forced
+        quality: Quality profile name
+
+    Returns:
+        Dict[str, ConversionCache]: Cached conversion per file hash found
+    """
+    if not file_hashes:
+        return {}
+    rows = (
+        db.query(models.ConversionCache)
+        .filter(
+            models.ConversionCache.file_hash.in_(set(file_hashes)),
+            models.ConversionCache.use_llm == use_llm,
+            models.ConversionCache.paginate_output == paginate_output,
+            models.ConversionCache.extract_images == extract_images,
+            models.ConversionCache.force_ocr == force_ocr,
+            models.ConversionCache.quality == quality,
+        )
+        .all()
+    )
+    return {row.file_hash: row for row in rows}
+
+
+def record_conversions_access(db: Session, ids: List[int]) -> None:
+    """
+    Update last accessed time and access count of many conversions at once
+
+    Args:
+        db: Database session
+        ids: Conversion cache row ids
+    """
+    if not ids:
+        return
+    db.query(models.ConversionCache).filter(models.ConversionCache.id.in_(ids)).update(
+        {
+            models.ConversionCache.last_accessed: datetime.datetime.now(
+                datetime.timezone.utc
+            ),
+            models.ConversionCache.access_count: func.coalesce(
+                models.ConversionCache.access_count, 0
+            )
+            + 1,
+        },
+        synchronize_session=False,
+    )
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating access stats for {len(ids)} conversions: {e}")
+
+
 def create_conversion(
     db: Session,
     file_hash: str,
@@ -68,9 +243,15 @@ def create_conversion(
     paginate_output: bool = False,
     extract_images: bool = True,
     force_ocr: bool = False,
+    quality: str = "standard",
     status: str = "COMPLETED",
     error_message: Optional[str] = None,
     image_paths: Optional[List[str]] = None,
+    page_count: Optional[int] = None,
+    page_offsets: Optional[List[List[int]]] = None,
+    processing_seconds: Optional[float] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    engine: Optional[str] = None,
 ) -> models.ConversionCache:
     """
     Create a new conversion cache entry
@@ -84,15 +265,23 @@ def create_conversion(
         paginate_output: Whether pagination was applied
         extract_images: Whether images were extracted
         force_ocr: Whether OCR was forced
+        quality: Quality profile name
         status: Status of the conversion
         error_message: Error message if any
         image_paths: List of image file paths
+        page_count: Number of pages in the document
+        page_offsets: [start, end) character offsets of each page in
+            markdown_content
+        processing_seconds: Wall time spent converting
+        stats: Per-stage timings and per-page counters
+        engine: Conversion engine used ("fast" or "full")
 
     Returns:
         ConversionCache: The created conversion cache entry
     """
     now = datetime.datetime.now(datetime.timezone.utc)
     image_paths_json = json.dumps(image_paths) if image_paths else None
+    stats_json = json.dumps(stats) if stats else None
 
     db_conversion = models.ConversionCache(
         file_hash=file_hash,
@@ -108,6 +297,12 @@ def create_conversion(
         paginate_output=paginate_output,
         extract_images=extract_images,
         force_ocr=force_ocr,
+        quality=quality,
+        page_count=page_count,
+        page_offsets=json.dumps(page_offsets) if page_offsets else None,
+        processing_seconds=processing_seconds,
+        stats=stats_json,
+        engine=engine,
     )
     db.add(db_conversion)
     try:
@@ -146,12 +341,343 @@ def update_conversion_access(db: Session, file_hash: str):
     return db_conversion
 
 
-def count_pending_conversions(db: Session) -> int:
+def get_recent_throughput(db: Session, limit: int = 50) -> Tuple[int, int, float]:
     """
-    Count the number of conversion tasks currently in PENDING status.
+    Sum pages and processing time over the most recent completed conversions.
+
+    Args:
+        db: Database session
+        limit: Number of recent conversions to consider
+
+    Returns:
+        Tuple[int, int, float]: (jobs, pages, seconds)
+    """
+    rows = (
+        db.query(
+            models.ConversionCache.page_count,
+            models.ConversionCache.processing_seconds,
+        )
+        .filter(
+            models.ConversionCache.status == "COMPLETED",
+            models.ConversionCache.page_count.isnot(None),
+            models.ConversionCache.processing_seconds.isnot(None),
+        )
+        .order_by(models.ConversionCache.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    pages = sum(row.page_count for row in rows)
+    seconds = sum(row.processing_seconds for row in rows)
+    return len(rows), pages, seconds
+
+
+def get_llm_response(db: Session, cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached LLM response and record the access
+
+    Args:
+        db: Database session
+        cache_key: Key from the provider, model and block content
+
+    Returns:
+        Dict[str, Any]: The parsed response if cached, None otherwise
+    """
+    entry = (
+        db.query(models.LLMResponseCache)
+        .filter(models.LLMResponseCache.cache_key == cache_key)
+        .first()
+    )
+    if entry is None:
+        return None
+    entry.last_accessed = datetime.datetime.now(datetime.timezone.utc)
+    entry.access_count = (entry.access_count or 0) + 1
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+    return json.loads(entry.response)
+
+
+def save_llm_response(
+    db: Session,
+    cache_key: str,
+    provider: str,
+    model: str,
+    response: Dict[str, Any],
+) -> None:
+    """
+    Cache an LLM response; a concurrent insert of the same key wins
+
+    Args:
+        db: Database session
+        cache_key: Key from the provider, model and block content
+        provider: LLM service class name
+        model: Model name
+        response: Parsed response
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    db.add(
+        models.LLMResponseCache(
+            cache_key=cache_key,
+            provider=provider,
+            model=model,
+            response=json.dumps(response),
+            created_at=now,
+            last_accessed=now,
+            access_count=0,
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def create_batch(
+    db: Session,
+    batch_id: str,
+    options: Dict[str, Any],
+    entries: List[Dict[str, Any]],
+    group_id: Optional[str] = None,
+) -> models.ConversionBatch:
+    """
+    Record a batch of conversions
+
+    Args:
+        db: Database session
+        batch_id: Batch identifier returned to the client
+        options: Conversion options shared by every entry
+        entries: Per document: filename, file_hash, cached, task_id, queue
+        group_id: Celery group id of the enqueued conversions
+
+    Returns:
+        ConversionBatch: The created batch
+    """
+    batch = models.ConversionBatch(
+        batch_id=batch_id,
+        group_id=group_id,
+        options=json.dumps(options),
+        entries=json.dumps(entries),
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    db.add(batch)
+    try:
+        db.commit()
+        db.refresh(batch)
+    except Exception as e:
+        db.rollback()
+        raise e
+    return batch
+
+
+def get_batch(db: Session, batch_id: str) -> Optional[models.ConversionBatch]:
+    """
+    Get a batch by its identifier
+
+    Args:
+        db: Database session
+        batch_id: Batch identifier
+
+    Returns:
+        ConversionBatch: The batch if found, None otherwise
     """
     return (
-        db.query(models.ConversionCache)
-        .filter(models.ConversionCache.status == "PENDING")
-        .count()
+        db.query(models.ConversionBatch)
+        .filter(models.ConversionBatch.batch_id == batch_id)
+        .first()
+    )
+
+
+LOCAL_TASK_UNFINISHED = ("PENDING", "STARTED", "RETRY")
+
+
+def create_local_task(
+    db: Session,
+    task_id: str,
+    name: str,
+    queue: Optional[str],
+    estimated_pages: Optional[int],
+    owner_pid: int,
+) -> models.LocalTask:
+    """
+    Record a task submitted to the local execution backend
+
+    Args:
+        db: Database session
+        task_id: Celery task id
+        name: Registered task name
+        queue: Queue the task was routed to
+        estimated_pages: Page estimate, for queue position ETAs
+        owner_pid: Process whose pool runs the task
+
+    Returns:
+        LocalTask: The created task, PENDING
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    task = models.LocalTask(
+        task_id=task_id,
+        name=name,
+        queue=queue,
+        status="PENDING",
+        estimated_pages=estimated_pages,
+        owner_pid=owner_pid,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(task)
+    try:
+        db.commit()
+        db.refresh(task)
+    except Exception as e:
+        db.rollback()
+        raise e
+    return task
+
+
+def get_local_task(db: Session, task_id: str) -> Optional[models.LocalTask]:
+    """
+    Get a local task by its id
+
+    Args:
+        db: Database session
+        task_id: Celery task id
+
+    Returns:
+        LocalTask: The task if found, None otherwise
+    """
+    return (
+        db.query(models.LocalTask).filter(models.LocalTask.task_id == task_id).first()
+    )
+
+
+def store_local_task_result(
+    db: Session, task_id: str, status: str, meta: Dict[str, Any]
+) -> None:
+    """
+    Store a state update of a local task, creating the row if needed
+
+    Args:
+        db: Database session
+        task_id: Celery task id
+        status: Celery state
+        meta: Encoded result and traceback
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    updated = (
+        db.query(models.LocalTask)
+        .filter(models.LocalTask.task_id == task_id)
+        .update(
+            {
+                models.LocalTask.status: status,
+                models.LocalTask.meta: json.dumps(meta),
+                models.LocalTask.updated_at: now,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        # Stored by a task that was not submitted through the pool
+        db.add(
+            models.LocalTask(
+                task_id=task_id,
+                name="",
+                status=status,
+                meta=json.dumps(meta),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def count_unfinished_local_tasks(db: Session) -> Dict[Tuple[Optional[str], str], int]:
+    """
+    Count local tasks not finished yet
+
+    Returns:
+        Dict[Tuple[Optional[str], str], int]: (queue, status) to task count
+    """
+    rows = (
+        db.query(models.LocalTask.queue, models.LocalTask.status, func.count())
+        .filter(models.LocalTask.status.in_(LOCAL_TASK_UNFINISHED))
+        .group_by(models.LocalTask.queue, models.LocalTask.status)
+        .all()
     )
+    return {(queue, status): count for queue, status, count in rows}
+
+
+def get_local_task_position(db: Session, task: models.LocalTask) -> int:
+    """
+    Number of pending local tasks submitted before this one
+
+    The pool takes tasks in submission order whatever their queue.
+
+    Args:
+        db: Database session
+        task: A pending task
+
+    Returns:
+        int: Tasks ahead of it (0 = next to run)
+    """
+    return (
+        db.query(func.count(models.LocalTask.id))
+        .filter(
+            models.LocalTask.status == "PENDING",
+            models.LocalTask.id < task.id,
+        )
+        .scalar()
+    )
+
+
+def get_unfinished_local_tasks(db: Session) -> List[models.LocalTask]:
+    """
+    Get every local task not finished yet
+
+    Returns:
+        List[LocalTask]: Pending and running tasks
+    """
+    return (
+        db.query(models.LocalTask)
+        .filter(models.LocalTask.status.in_(LOCAL_TASK_UNFINISHED))
+        .all()
+    )
+
+
+def delete_local_tasks(
+    db: Session,
+    task_id: Optional[str] = None,
+    finished_before: Optional[datetime.datetime] = None,
+) -> int:
+    """
+    Delete one local task, or every finished one not updated since a time
+
+    Args:
+        db: Database session
+        task_id: Task to delete
+        finished_before: Delete finished tasks last updated before this
+
+    Returns:
+        int: Number of tasks deleted
+    """
+    query = db.query(models.LocalTask)
+    if task_id is not None:
+        query = query.filter(models.LocalTask.task_id == task_id)
+    if finished_before is not None:
+        query = query.filter(
+            models.LocalTask.status.notin_(LOCAL_TASK_UNFINISHED),
+            models.LocalTask.updated_at < finished_before,
+        )
+    deleted = query.delete(synchronize_session=False)
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    return deleted
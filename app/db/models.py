@@ -6,6 +6,7 @@ from sqlalchemy import (
     Text,
     DateTime,
     Boolean,
+    Float,
     UniqueConstraint,
     Index,
     JSON,
@@ -31,10 +32,24 @@ class ConversionCache(Base):
     last_accessed = Column(DateTime, default=datetime.datetime.utcnow)
     access_count = Column(Integer, default=0)
 
+    page_count = Column(Integer, nullable=True)
+    # JSON: [[start, end], ...] character offsets of each page's Markdown
+    page_offsets = Column(Text, nullable=True)
+    processing_seconds = Column(Float, nullable=True)
+    # JSON: {"timings": {stage: seconds}, "counters": {name: count},
+    #        "page_decisions": [{page, kind, ocr, method}],
+    #        "images": [{name, format, seconds, bytes}]}
+    stats = Column(Text, nullable=True)
+    engine = Column(String(20), nullable=True)  # "fast" (text layer) or "full"
+
     use_llm = Column(Boolean, default=False, nullable=False)
     paginate_output = Column(Boolean, default=False, nullable=False)
     extract_images = Column(Boolean, default=True, nullable=False)
     force_ocr = Column(Boolean, default=False, nullable=False)
+    # Quality profile name (see app.services.quality)
+    quality = Column(
+        String(20), default="standard", server_default="standard", nullable=False
+    )
 
     __table_args__ = (
         UniqueConstraint(
@@ -43,6 +58,59 @@ class ConversionCache(Base):
             "paginate_output",
             "extract_images",
             "force_ocr",
+            "quality",
             name="uix_conversion_params",
         ),
     )
+
+
+class LLMResponseCache(Base):
+    """Model for caching LLM responses to block enhancement prompts"""
+
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # SHA-256 of provider, model and block content (prompt and image)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    provider = Column(String(100), nullable=False)
+    model = Column(String(100), nullable=True)
+    response = Column(Text, nullable=False)  # JSON
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.datetime.utcnow)
+    access_count = Column(Integer, default=0)
+
+
+class ConversionBatch(Base):
+    """Model for a batch of conversions submitted together"""
+
+    __tablename__ = "conversion_batch"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(36), unique=True, index=True, nullable=False)
+    group_id = Column(String(36), nullable=True)  # Celery group of the misses
+    # JSON: {use_llm, paginate_output, extract_images, force_ocr, quality}
+    options = Column(Text, nullable=False)
+    # JSON: [{filename, file_hash, cached, task_id, queue}]
+    entries = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class LocalTask(Base):
+    """Model for a task run by the local execution backend"""
+
+    __tablename__ = "local_task"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String(36), unique=True, index=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    queue = Column(String(255), nullable=True)
+    status = Column(String(50), default="PENDING", index=True, nullable=False)
+    # JSON: {result, traceback} as stored by the result backend
+    meta = Column(Text, nullable=True)
+    estimated_pages = Column(Integer, nullable=True)
+    owner_pid = Column(Integer, nullable=True)  # API process running the pool
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -1,13 +1,15 @@
 import logging.config
 import os
+import time
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from .api.router import router as api_router 
 from .core.config import settings
+from .core.metrics import REQUEST_LATENCY
 from .db.base import init_db
 
 logger = logging.getLogger("pdf2md.main")
@@ -31,8 +33,14 @@ async def lifespan(app: FastAPI):
     Path(settings.STORAGE_PATH).mkdir(parents=True, exist_ok=True)
     Path(settings.TEMP_PATH).mkdir(parents=True, exist_ok=True)
     Path(settings.UPLOAD_PATH).mkdir(parents=True, exist_ok=True)
+    if settings.EXECUTION_BACKEND == "local":
+        from .services import local_backend
+
+        local_backend.start()
     yield
     logger.info("Shutting down API")
+    if settings.EXECUTION_BACKEND == "local":
+        local_backend.stop()
 
 
 app = FastAPI(
@@ -42,6 +50,24 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        ).observe(time.perf_counter() - start)
+
+
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
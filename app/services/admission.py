@@ -0,0 +1,216 @@
+import math
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, List
+
+from celery.result import AsyncResult
+from fastapi import HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.services.queue_stats import estimate_queue_wait
+
+logger = logging.getLogger("pdf2md.admission")
+
+# Seconds between passes that forget idle clients
+SWEEP_INTERVAL = 60.0
+
+
+class AdmissionController:
+    """
+    Decides whether a new conversion may be enqueued.
+
+    Two checks run before every enqueue:
+
+    - Backpressure: the estimated wait on the target queue must stay under
+      ADMISSION_MAX_WAIT_SECONDS, otherwise 503 with Retry-After.
+    - Per-client quotas: a client may submit at most
+      ADMISSION_CLIENT_JOBS_PER_MINUTE jobs and have at most
+      ADMISSION_CLIENT_MAX_IN_FLIGHT unfinished tasks, otherwise 429. A batch
+      is checked against the number of jobs it would enqueue, as a whole.
+
+    Client state is kept in this process only; with several API processes
+    each enforces its own share of the quota. Clients with no submission in
+    the last minute and nothing in flight are forgotten.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._submissions: Dict[str, Deque[float]] = defaultdict(deque)
+        self._in_flight: Dict[str, List[str]] = defaultdict(list)
+        self._last_sweep = time.monotonic()
+
+    def client_id(self, request: Request) -> str:
+        """
+        Identify the caller by its address, or by the configured header when
+        the request comes through a trusted proxy
+
+        Args:
+            request: Incoming request
+
+        Returns:
+            str: Client identifier
+        """
+        address = request.client.host if request.client else "unknown"
+        if address in settings.ADMISSION_TRUSTED_PROXIES:
+            header_value = request.headers.get(settings.ADMISSION_CLIENT_HEADER)
+            if header_value:
+                return header_value.strip()
+        return address
+
+    def check(self, db: Session, client: str, queue: str) -> None:
+        """
+        Raise HTTPException (429/503) with Retry-After if the job must wait
+
+        Args:
+            db: Database session
+            client: Client identifier
+            queue: Queue the job would be sent to
+        """
+        self.check_client(client)
+        self.check_queue(db, client, queue)
+
+    def check_client(self, client: str, jobs: int = 1) -> None:
+        """
+        Raise HTTPException (429) with Retry-After if the client may not submit
+        this many jobs now
+
+        Args:
+            client: Client identifier
+            jobs: Number of jobs about to be enqueued for the client
+        """
+        if not settings.ADMISSION_ENABLED:
+            return
+        self._sweep()
+        self._check_client_quota(client, jobs)
+
+    def check_queue(self, db: Session, client: str, queue: str) -> None:
+        """
+        Raise HTTPException (503) with Retry-After if the queue wait is over the SLO
+
+        Args:
+            db: Database session
+            client: Client identifier, for logging
+            queue: Queue the job would be sent to
+        """
+        if not settings.ADMISSION_ENABLED:
+            return
+        try:
+            wait = estimate_queue_wait(db, queue)
+        except Exception as e:
+            # Never turn a broker hiccup into an outage of the upload path
+            logger.warning(f"Could not estimate queue wait for {queue}: {e}")
+            return
+        if wait > settings.ADMISSION_MAX_WAIT_SECONDS:
+            retry_after = wait - settings.ADMISSION_MAX_WAIT_SECONDS
+            logger.warning(
+                f"Rejecting job for {client}: estimated wait {wait:.0f}s on {queue}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Conversion queue is full (estimated wait {wait:.0f}s). Try again later.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def record(self, client: str, task_id: str) -> None:
+        """Count an enqueued task against the client's quotas"""
+        if not settings.ADMISSION_ENABLED:
+            return
+        with self._lock:
+            self._submissions[client].append(time.monotonic())
+            if settings.ADMISSION_CLIENT_MAX_IN_FLIGHT:
+                self._in_flight[client].append(task_id)
+
+    def _sweep(self) -> None:
+        """Forget clients with an empty window and no unfinished task"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep < SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+            for client in list(self._submissions):
+                window = self._submissions[client]
+                _expire(window, now)
+                if not window:
+                    del self._submissions[client]
+            idle = {
+                client: list(task_ids)
+                for client, task_ids in self._in_flight.items()
+                if client not in self._submissions
+            }
+
+        finished = {
+            client: {
+                task_id
+                for task_id in task_ids
+                if AsyncResult(task_id, app=celery_app).ready()
+            }
+            for client, task_ids in idle.items()
+        }
+        with self._lock:
+            for client, done in finished.items():
+                unfinished = [
+                    task_id
+                    for task_id in self._in_flight.get(client, [])
+                    if task_id not in done
+                ]
+                if unfinished:
+                    self._in_flight[client] = unfinished
+                else:
+                    self._in_flight.pop(client, None)
+
+    def _check_client_quota(self, client: str, jobs: int) -> None:
+        per_minute = settings.ADMISSION_CLIENT_JOBS_PER_MINUTE
+        with self._lock:
+            now = time.monotonic()
+            window = self._submissions[client]
+            _expire(window, now)
+            if per_minute and len(window) + jobs > per_minute:
+                # Wait until enough earlier submissions leave the window
+                expiring = len(window) + jobs - per_minute
+                if expiring <= len(window):
+                    retry_after = 60 - (now - window[expiring - 1])
+                else:
+                    retry_after = 60
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many conversion requests. Try again later.",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+            task_ids = list(self._in_flight.get(client, ()))
+
+        if not settings.ADMISSION_CLIENT_MAX_IN_FLIGHT:
+            return
+        unfinished = [
+            task_id
+            for task_id in task_ids
+            if not AsyncResult(task_id, app=celery_app).ready()
+        ]
+        with self._lock:
+            added_meanwhile = [
+                task_id
+                for task_id in self._in_flight.get(client, ())
+                if task_id not in task_ids
+            ]
+            if unfinished or added_meanwhile:
+                self._in_flight[client] = unfinished + added_meanwhile
+            else:
+                self._in_flight.pop(client, None)
+        if len(unfinished) + jobs > settings.ADMISSION_CLIENT_MAX_IN_FLIGHT:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many unfinished conversions ({len(unfinished)}). Wait for some to complete.",
+                headers={"Retry-After": str(settings.ADMISSION_IN_FLIGHT_RETRY_AFTER)},
+            )
+
+
+def _expire(window: Deque[float], now: float) -> None:
+    """Drop submissions older than the one-minute quota window"""
+    while window and now - window[0] > 60:
+        window.popleft()
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,363 @@
+import os
+import io
+import pickle
+import hashlib
+import logging
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger("pdf2md.artifacts")
+
+
+class ArtifactCache:
+    """
+    On-disk cache of intermediate per-page conversion artifacts.
+
+    Artifacts are stored as <root>/<file_hash>/<page>.<kind>.<variant>.<ext>,
+    where variant encodes every input that affects the artifact (DPI, line
+    boxes, languages), so conversions of the same file with other options
+    reuse whatever still applies. Page images are PNG, model results pickles.
+    Reads refresh the modification time and enforce_limit() evicts the least
+    recently used files until the cache fits in max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _path(self, file_hash: str, page: int, kind: str, variant: str, ext: str) -> Path:
+        return self.root / file_hash / f"{page:05d}.{kind}.{variant}.{ext}"
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent workers never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get(self, file_hash: str, page: int, kind: str, variant: str) -> Any:
+        data = self._read(self._path(file_hash, page, kind, variant, "pkl"))
+        CACHE_LOOKUPS.labels(
+            tier=f"artifact_{kind}", result="miss" if data is None else "hit"
+        ).inc()
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable {kind} artifact for {file_hash}: {e}")
+            return None
+
+    def put(self, file_hash: str, page: int, kind: str, variant: str, value: Any) -> None:
+        try:
+            self._write(
+                self._path(file_hash, page, kind, variant, "pkl"),
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        except Exception as e:
+            logger.warning(f"Could not store {kind} artifact for {file_hash}: {e}")
+
+    def get_image(self, file_hash: str, page: int, variant: str) -> Optional[Image.Image]:
+        data = self._read(self._path(file_hash, page, "image", variant, "png"))
+        CACHE_LOOKUPS.labels(
+            tier="artifact_image", result="miss" if data is None else "hit"
+        ).inc()
+        if data is None:
+            return None
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image.convert("RGB")
+
+    def put_image(self, file_hash: str, page: int, variant: str, image: Image.Image) -> None:
+        buffer = io.BytesIO()
+        # Lossless so OCR sees the same pixels; low compression for speed
+        image.save(buffer, format="PNG", compress_level=1)
+        try:
+            self._write(self._path(file_hash, page, "image", variant, "png"), buffer.getvalue())
+        except Exception as e:
+            logger.warning(f"Could not store page image for {file_hash}: {e}")
+
+    def enforce_limit(self) -> Tuple[int, int]:
+        """
+        Evict least recently used artifacts until the cache fits
+
+        Returns:
+            Tuple[int, int]: Files and bytes removed
+        """
+        files, removed = enforce_lru_limit(self.root, self.max_bytes)
+        if removed:
+            logger.info(f"Evicted {removed} bytes of page artifacts")
+        return files, removed
+
+
+def enforce_lru_limit(root: Path, max_bytes: int) -> Tuple[int, int]:
+    """
+    Delete the least recently modified files under root until it fits
+
+    Caches that refresh modification times on reads get LRU eviction.
+
+    Args:
+        root: Cache directory
+        max_bytes: Size to shrink to
+
+    Returns:
+        Tuple[int, int]: Files and bytes removed
+    """
+    if not root.exists():
+        return 0, 0
+    files: List[Tuple[float, int, Path]] = []
+    total = 0
+    for path in root.rglob("*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.is_file():
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed_files = removed = 0
+    if total > max_bytes:
+        for _, size, path in sorted(files):
+            if total - removed <= max_bytes:
+                break
+            try:
+                path.unlink()
+                removed += size
+                removed_files += 1
+            except FileNotFoundError:
+                continue
+        for directory in root.iterdir():
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+    return removed_files, removed
+
+
+artifact_cache = ArtifactCache(
+    Path(settings.STORAGE_PATH) / "artifacts",
+    settings.ARTIFACT_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def cached_per_page(
+    file_hash: str,
+    page_ids: List[int],
+    kind: str,
+    variants: List[str],
+    compute: Callable[[List[int]], List[Any]],
+) -> List[Any]:
+    """
+    Per-page results, computing only the pages missing from the cache
+
+    Args:
+        file_hash: Document key
+        page_ids: Page id of each position
+        kind: Artifact kind, e.g. "layout"
+        variants: Variant key of each position
+        compute: Given positions, returns their results in the same order
+
+    Returns:
+        List[Any]: One result per position
+    """
+    results = [
+        artifact_cache.get(file_hash, page_id, kind, variant)
+        for page_id, variant in zip(page_ids, variants)
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        for i, result in zip(missing, compute(missing)):
+            results[i] = result
+            artifact_cache.put(file_hash, page_ids[i], kind, variants[i], result)
+    return results
+
+
+class ArtifactProviderMixin:
+    """Serves rendered page images from the artifact cache"""
+
+    artifact_key: Optional[str] = None
+
+    def get_images(self, idxs: List[int], dpi: int) -> List[Image.Image]:
+        if not self.artifact_key:
+            return super().get_images(idxs, dpi)
+        variant = f"{dpi}dpi"
+        images: Dict[int, Image.Image] = {}
+        for idx in idxs:
+            image = artifact_cache.get_image(self.artifact_key, idx, variant)
+            if image is not None:
+                images[idx] = image
+        missing = [idx for idx in idxs if idx not in images]
+        if missing:
+            for idx, image in zip(missing, super().get_images(missing, dpi)):
+                images[idx] = image
+                artifact_cache.put_image(self.artifact_key, idx, variant, image)
+        return [images[idx] for idx in idxs]
+
+
+class ArtifactLayoutMixin:
+    """Reuses cached layout detection results per page"""
+
+    artifact_key: Optional[str] = None
+    lowres_image_dpi: int = 96
+
+    def surya_layout(self, pages):
+        if not self.artifact_key:
+            return super().surya_layout(pages)
+        return cached_per_page(
+            self.artifact_key,
+            [page.page_id for page in pages],
+            "layout",
+            [f"{self.lowres_image_dpi}dpi"] * len(pages),
+            lambda positions: super(ArtifactLayoutMixin, self).surya_layout(
+                [pages[i] for i in positions]
+            ),
+        )
+
+
+class ArtifactLineMixin:
+    """Reuses cached text line (and inline math) detection results per page"""
+
+    artifact_key: Optional[str] = None
+    lowres_image_dpi: int = 96
+
+    def __call__(self, document, provider):
+        self._page_ids = [page.page_id for page in document.pages]
+        return super().__call__(document, provider)
+
+    def get_detection_results(self, page_images, run_detection, do_inline_math_detection):
+        if not self.artifact_key:
+            return super().get_detection_results(
+                page_images, run_detection, do_inline_math_detection
+            )
+
+        def compute(positions):
+            detection, inline = super(ArtifactLineMixin, self).get_detection_results(
+                [page_images[i] for i in positions],
+                [True] * len(positions),
+                do_inline_math_detection,
+            )
+            return list(zip(detection, inline))
+
+        run_page_ids = [
+            page_id for page_id, run in zip(self._page_ids, run_detection) if run
+        ]
+        variant = f"{self.lowres_image_dpi}dpi-inline{int(do_inline_math_detection)}"
+        results = iter(
+            cached_per_page(
+                self.artifact_key,
+                run_page_ids,
+                "detection",
+                [variant] * len(run_page_ids),
+                compute,
+            )
+        )
+
+        detection_results, inline_results = [], []
+        for run in run_detection:
+            detection, inline = next(results) if run else (None, None)
+            detection_results.append(detection)
+            inline_results.append(inline)
+        return detection_results, inline_results
+
+
+class _PrecomputedRecognition:
+    """Stands in for the recognition model with already known results"""
+
+    def __init__(self, results: List[Any]):
+        self.results = results
+        self.disable_tqdm = True
+
+    def __call__(self, *args, **kwargs):
+        return self.results
+
+
+class ArtifactOcrMixin:
+    """Reuses cached OCR results for pages whose line boxes are unchanged"""
+
+    artifact_key: Optional[str] = None
+    highres_image_dpi: int = 192
+
+    def ocr_extraction(self, document, pages, provider, images, line_boxes, line_ids):
+        if not self.artifact_key or sum(len(boxes) for boxes in line_boxes) == 0:
+            return super().ocr_extraction(
+                document, pages, provider, images, line_boxes, line_ids
+            )
+
+        model = self.recognition_model
+
+        def compute(positions):
+            model.disable_tqdm = self.disable_tqdm
+            return model(
+                images=[images[i] for i in positions],
+                bboxes=[line_boxes[i] for i in positions],
+                langs=[self.languages] * len(positions),
+                recognition_batch_size=int(self.get_recognition_batch_size()),
+                sort_lines=False,
+            )
+
+        results = cached_per_page(
+            self.artifact_key,
+            [page.page_id for page in pages],
+            "ocr",
+            [
+                _digest(self.highres_image_dpi, self.languages, boxes)
+                for boxes in line_boxes
+            ],
+            compute,
+        )
+        self.recognition_model = _PrecomputedRecognition(results)
+        try:
+            return super().ocr_extraction(
+                document, pages, provider, images, line_boxes, line_ids
+            )
+        finally:
+            self.recognition_model = model
+
+
+ARTIFACT_MIXINS = {
+    "PdfProvider": ArtifactProviderMixin,
+    "LayoutBuilder": ArtifactLayoutMixin,
+    "LLMLayoutBuilder": ArtifactLayoutMixin,
+    "LineBuilder": ArtifactLineMixin,
+    "OcrBuilder": ArtifactOcrMixin,
+}
+
+
+@lru_cache(maxsize=None)
+def with_artifact_cache(cls: type) -> type:
+    """
+    Subclass of a marker provider or builder that reads and writes the
+    artifact cache, or cls itself if none of its stages are cached
+    """
+    for base in cls.__mro__:
+        mixin = ARTIFACT_MIXINS.get(base.__name__)
+        if mixin:
+            return type(f"Cached{cls.__name__}", (mixin, cls), {})
+    return cls
@@ -0,0 +1,350 @@
+import io
+import json
+import uuid
+import hashlib
+import zipfile
+import logging
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from celery.result import AsyncResult
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db import crud, models
+from app.db.base import SessionLocal
+from app.services import dispatch
+from app.services.converter import convert_pdf_task
+from app.services.estimator import estimate_pdf
+from app.services.file_service import TEMP_DIR
+from app.services.image_store import image_store
+from app.services.routing import queue_for_profile, select_profile
+
+logger = logging.getLogger("pdf2md.batch")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BatchError(ValueError):
+    """A batch submission that cannot be accepted as a whole"""
+
+
+@dataclass
+class BatchFile:
+    """One PDF of a batch, extracted to the temp directory"""
+
+    filename: str
+    path: Path
+    file_hash: str
+    size: int
+
+
+def copy_and_hash(source: BinaryIO, dest: Path, max_bytes: int) -> Tuple[str, int]:
+    """
+    Copy a stream to a file in chunks, hashing it on the way
+
+    Args:
+        source: Readable binary stream
+        dest: File to write
+        max_bytes: Limit; the copy is abandoned beyond it
+
+    Returns:
+        Tuple[str, int]: SHA-256 hex digest and size
+    """
+    sha256_hash = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as f:
+            for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+                size += len(block)
+                if size > max_bytes:
+                    raise BatchError(f"larger than {max_bytes // (1024 * 1024)}MB")
+                sha256_hash.update(block)
+                f.write(block)
+    except Exception:
+        dest.unlink(missing_ok=True)
+        raise
+    return sha256_hash.hexdigest(), size
+
+
+def extract_uploads(
+    uploads: List[UploadFile],
+) -> Tuple[List[BatchFile], List[Dict[str, str]]]:
+    """
+    Extract every PDF of a batch submission to the temp directory
+
+    Uploads are PDFs or ZIP archives of PDFs. Archive members are streamed
+    out one at a time, never loaded whole, and each file is hashed while it
+    is copied. Blocking; run it in a thread pool.
+
+    Args:
+        uploads: The uploaded files
+
+    Returns:
+        Tuple[List[BatchFile], List[Dict[str, str]]]: Extracted PDFs, and the
+            files skipped with the reason (name, reason)
+
+    Raises:
+        BatchError: Too many files or bytes; nothing is left in the temp
+            directory
+    """
+    files: List[BatchFile] = []
+    skipped: List[Dict[str, str]] = []
+    max_file_bytes = settings.MAX_UPLOAD_SIZE * 1024 * 1024
+    remaining_bytes = settings.BATCH_MAX_TOTAL_MB * 1024 * 1024
+
+    def add(name: str, source: BinaryIO) -> None:
+        nonlocal remaining_bytes
+        if len(files) >= settings.BATCH_MAX_FILES:
+            raise BatchError(
+                f"Too many files. Maximum is {settings.BATCH_MAX_FILES} per batch"
+            )
+        dest = TEMP_DIR / f"{uuid.uuid4()}.pdf"
+        try:
+            file_hash, size = copy_and_hash(
+                source, dest, min(max_file_bytes, remaining_bytes)
+            )
+        except BatchError as e:
+            if remaining_bytes < max_file_bytes:
+                raise BatchError(
+                    f"Batch too large. Maximum is {settings.BATCH_MAX_TOTAL_MB}MB of PDFs"
+                )
+            skipped.append({"name": name, "reason": f"File {e}"})
+            return
+        remaining_bytes -= size
+        files.append(BatchFile(name, dest, file_hash, size))
+
+    try:
+        for upload in uploads:
+            filename = upload.filename or "upload"
+            lower = filename.lower()
+            if lower.endswith(".pdf"):
+                upload.file.seek(0)
+                add(filename, upload.file)
+            elif lower.endswith(".zip"):
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile:
+                    skipped.append({"name": filename, "reason": "Not a ZIP archive"})
+                    continue
+                with archive:
+                    for member in archive.infolist():
+                        name = f"{filename}/{member.filename}"
+                        if member.is_dir():
+                            continue
+                        if not member.filename.lower().endswith(".pdf"):
+                            skipped.append({"name": name, "reason": "Not a PDF"})
+                            continue
+                        with archive.open(member) as source:
+                            add(name, source)
+            else:
+                skipped.append({"name": filename, "reason": "Not a PDF or ZIP"})
+    except Exception:
+        for batch_file in files:
+            batch_file.path.unlink(missing_ok=True)
+        raise
+    return files, skipped
+
+
+def plan_jobs(
+    files: List[BatchFile], options: Dict[str, Any]
+) -> List[Tuple[BatchFile, str, Dict[str, Any]]]:
+    """
+    Queue and convert_pdf_task kwargs of each file, as /convert routes them
+
+    Args:
+        files: Files to convert
+        options: Conversion options of the batch
+
+    Returns:
+        List[Tuple[BatchFile, str, Dict[str, Any]]]: (file, queue, kwargs)
+    """
+    jobs = []
+    for batch_file in files:
+        estimate = estimate_pdf(str(batch_file.path))
+        profile = select_profile(
+            options["use_llm"], options["force_ocr"], batch_file.size, estimate
+        )
+        kwargs = dict(
+            options, estimated_pages=estimate.page_count if estimate else None
+        )
+        jobs.append((batch_file, queue_for_profile(profile), kwargs))
+    return jobs
+
+
+def enqueue_misses(
+    jobs: List[Tuple[BatchFile, str, Dict[str, Any]]],
+) -> Tuple[Optional[str], List[str]]:
+    """
+    Send conversions as one group
+
+    Args:
+        jobs: (file, queue, convert_pdf_task kwargs) per conversion
+
+    Returns:
+        Tuple[Optional[str], List[str]]: Group id (None if no jobs) and the
+            task id of each job, in order
+    """
+    return dispatch.send_group(
+        [
+            (
+                convert_pdf_task,
+                [str(batch_file.path), batch_file.file_hash, batch_file.filename],
+                kwargs,
+                queue,
+            )
+            for batch_file, queue, kwargs in jobs
+        ]
+    )
+
+
+def entry_states(db: Session, batch: models.ConversionBatch) -> List[Dict[str, Any]]:
+    """
+    Current state of every entry of a batch
+
+    Results are looked up in one query; only entries without a stored result
+    ask the result backend.
+
+    Args:
+        db: Database session
+        batch: The batch
+
+    Returns:
+        List[Dict[str, Any]]: The stored entries with status (COMPLETED,
+            FAILED, or the task state while running) and error
+    """
+    options = json.loads(batch.options)
+    entries = json.loads(batch.entries)
+    rows = crud.get_conversions_by_hashes_and_params(
+        db, [entry["file_hash"] for entry in entries], **options
+    )
+    states = []
+    for entry in entries:
+        state = dict(entry, status="PENDING", error=None)
+        row = rows.get(entry["file_hash"])
+        if row is not None and row.status == "COMPLETED":
+            state["status"] = "COMPLETED"
+        elif entry.get("task_id"):
+            task_result = AsyncResult(entry["task_id"], app=celery_app)
+            if not task_result.ready():
+                state["status"] = task_result.state
+            else:
+                state["status"] = "FAILED"
+                result = task_result.result if task_result.successful() else None
+                if isinstance(result, dict) and result.get("status") == "SUCCESS":
+                    state["error"] = "Conversion result not found."
+                elif isinstance(result, dict):
+                    state["error"] = result.get("data", {}).get("error")
+                else:
+                    state["error"] = str(task_result.info or "Unknown task failure")
+        else:
+            # Cached at submission, evicted since
+            state["status"] = "FAILED"
+            state["error"] = "Conversion result no longer cached."
+        states.append(state)
+    return states
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands zipfile's output back in chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _document_folder(filename: str, file_hash: str, used: set) -> str:
+    stem = PurePosixPath(filename).stem.replace(" ", "_") or file_hash[:12]
+    folder = stem
+    if folder in used:
+        folder = f"{stem}-{file_hash[:8]}"
+    used.add(folder)
+    return folder
+
+
+def _document_images(row: models.ConversionCache) -> Iterator[Tuple[str, Path]]:
+    """(name in the Markdown, file) of each image of a cached conversion"""
+    manifest = image_store.load_manifest(row.file_hash)
+    if manifest:
+        for name, key in manifest.items():
+            # The manifest covers every option variant of the file
+            if f"]({name})" in (row.markdown_content or ""):
+                yield name, image_store.blob_path(key)
+        return
+    for path in json.loads(row.image_paths or "[]"):
+        yield PurePosixPath(path).name, image_store.root / path
+
+
+def stream_archive(batch_id: str) -> Iterator[bytes]:
+    """
+    ZIP archive of a batch's results, generated while it is sent
+
+    Each completed document is a folder with its Markdown and images, read
+    from the database and the image store one document at a time.
+    batch.json lists every entry with its status.
+
+    Args:
+        batch_id: Batch identifier
+
+    Yields:
+        bytes: Archive data
+    """
+    db = SessionLocal()
+    sink = _ZipStream()
+    try:
+        batch = crud.get_batch(db, batch_id)
+        if batch is None:
+            return
+        options = json.loads(batch.options)
+        states = entry_states(db, batch)
+        used: set = set()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for state in states:
+                if state["status"] != "COMPLETED":
+                    continue
+                row = crud.get_conversion_by_hash_and_params(
+                    db, state["file_hash"], **options
+                )
+                if row is None:
+                    continue
+                folder = _document_folder(state["filename"], state["file_hash"], used)
+                state["path"] = f"{folder}/{folder}.md"
+                archive.writestr(state["path"], row.markdown_content or "")
+                yield sink.drain()
+
+                for name, path in _document_images(row):
+                    try:
+                        source = open(path, "rb")
+                    except OSError as e:
+                        logger.warning(f"Image {path} missing from batch archive: {e}")
+                        continue
+                    # Already compressed, store as is
+                    info = zipfile.ZipInfo(f"{folder}/{name}")
+                    info.compress_type = zipfile.ZIP_STORED
+                    with source, archive.open(info, "w") as target:
+                        for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+                            target.write(block)
+                            yield sink.drain()
+                db.expunge(row)
+
+            archive.writestr(
+                "batch.json",
+                json.dumps({"batch_id": batch_id, "entries": states}, indent=1),
+            )
+        yield sink.drain()
+    finally:
+        db.close()
@@ -0,0 +1,178 @@
+import time
+import inspect
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import INFERENCE_BATCH_DOCUMENTS, INFERENCE_BATCH_ITEMS
+
+logger = logging.getLogger("pdf2md.batching")
+
+# marker artifact name -> arguments holding one entry per image. Every listed
+# model returns one result per image, so merged results can be split back.
+BATCHED_MODELS: Dict[str, Tuple[str, ...]] = {
+    "layout_model": ("images",),
+    "detection_model": ("images",),
+    "inline_detection_model": ("images", "text_boxes"),
+    "recognition_model": ("images", "langs", "highres_images", "bboxes", "polygons"),
+    "table_rec_model": ("images",),
+    "texify_model": ("images",),
+}
+
+
+@dataclass
+class _Request:
+    items: Dict[str, Optional[list]]
+    size: int
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[list] = None
+    error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Merges concurrent calls to one model into shared inference batches.
+
+    The first caller for a given set of non-item arguments becomes the
+    leader: it waits up to `window` seconds (or until `max_items` images are
+    queued) for other tasks' calls, runs the model once on the concatenated
+    inputs and hands each caller its own slice of the results. Calls with
+    `max_items` or more images run on their own straight away. Inference is
+    serialised per model, so callers never run the same model concurrently.
+
+    Attributes other than the call are forwarded to the wrapped model, so
+    marker can set e.g. `disable_tqdm` on it as usual.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        name: str,
+        item_args: Tuple[str, ...],
+        window: float,
+        max_items: int,
+    ):
+        object.__setattr__(self, "_model", model)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_item_args", item_args)
+        object.__setattr__(self, "_window", window)
+        object.__setattr__(self, "_max_items", max_items)
+        object.__setattr__(self, "_signature", inspect.signature(model.__call__))
+        object.__setattr__(self, "_cond", threading.Condition())
+        object.__setattr__(self, "_inference_lock", threading.Lock())
+        object.__setattr__(self, "_pending", {})
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._model, name, value)
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        # e.g. marker passes the detection model into recognition
+        return value._model if isinstance(value, MicroBatcher) else value
+
+    def _group_key(self, shared: Dict[str, Any], items: Dict[str, Any]) -> tuple:
+        parts = []
+        for name, value in sorted(shared.items()):
+            if not isinstance(value, (int, float, str, bool, type(None))):
+                value = id(value)
+            parts.append((name, value))
+        present = tuple(sorted(name for name, value in items.items() if value is not None))
+        return tuple(parts), present
+
+    def __call__(self, *args, **kwargs):
+        bound = self._signature.bind(*args, **kwargs)
+        items = {
+            name: bound.arguments.get(name)
+            for name in self._item_args
+            if name in self._signature.parameters
+        }
+        shared = {
+            name: self._unwrap(value)
+            for name, value in bound.arguments.items()
+            if name not in items
+        }
+        size = len(items.get("images") or [])
+        if size == 0 or size >= self._max_items:
+            with self._inference_lock:
+                return self._model(**items, **shared)
+
+        request = _Request(items=items, size=size)
+        key = self._group_key(shared, items)
+        with self._cond:
+            group = self._pending.setdefault(key, [])
+            group.append(request)
+            leader = len(group) == 1
+            self._cond.notify_all()
+
+        if leader:
+            deadline = time.monotonic() + self._window
+            with self._cond:
+                while sum(r.size for r in group) < self._max_items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # Close the group; later callers start a new one
+                del self._pending[key]
+            self._run(group, shared)
+        else:
+            request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self, group: List[_Request], shared: Dict[str, Any]) -> None:
+        merged = {}
+        for name in group[0].items:
+            if group[0].items[name] is None:
+                merged[name] = None
+            else:
+                merged[name] = [item for r in group for item in r.items[name]]
+
+        try:
+            with self._inference_lock:
+                results = self._model(**merged, **shared)
+            offset = 0
+            for request in group:
+                request.result = results[offset : offset + request.size]
+                offset += request.size
+        except BaseException as e:
+            for request in group:
+                request.error = e
+        finally:
+            INFERENCE_BATCH_ITEMS.labels(model=self._name).observe(
+                sum(r.size for r in group)
+            )
+            INFERENCE_BATCH_DOCUMENTS.labels(model=self._name).observe(len(group))
+            for request in group:
+                request.done.set()
+
+
+def wrap_models(models: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap the batchable models of a marker artifact dict in MicroBatchers
+
+    Args:
+        models: Output of marker's create_model_dict()
+
+    Returns:
+        Dict[str, Any]: The same dict, with batchable models wrapped
+    """
+    window = settings.INFERENCE_BATCH_WINDOW_MS / 1000
+    wrapped = dict(models)
+    for name, item_args in BATCHED_MODELS.items():
+        if name in wrapped:
+            wrapped[name] = MicroBatcher(
+                wrapped[name],
+                name,
+                item_args,
+                window,
+                settings.INFERENCE_BATCH_MAX_PAGES,
+            )
+    return wrapped
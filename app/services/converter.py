@@ -1,24 +1,233 @@
 import os
+import time
 import logging
 import json
-from typing import Dict, Any, Optional, List
-from pathlib import Path
+import threading
+from contextlib import nullcontext
+from typing import Annotated, Dict, Any, Optional, List
 
 from sqlalchemy.orm import Session
+from marker.builders.document import DocumentBuilder
+from marker.builders.line import LineBuilder
+from marker.builders.ocr import OcrBuilder
+from marker.builders.structure import StructureBuilder
 from marker.converters.pdf import PdfConverter
 from marker.models import create_model_dict
 from marker.output import text_from_rendered
 from marker.config.parser import ConfigParser
-from PIL import Image
+from marker.providers.registry import provider_from_filepath
+from marker.renderers import BaseRenderer
+from marker.services import BaseService
 
 from app.celery_app import celery_app
 from app.core.config import settings
 from app.db.base import SessionLocal
 from app.db import crud
+from app.core.metrics import CONVERSIONS
+from app.services.artifacts import with_artifact_cache
+from app.services.batching import wrap_models
+from app.services.fake_converter import FakeConverter
+from app.services.image_store import image_store
+from app.services.llm_cache import with_llm_cache
+from app.services.pages import page_spans
+from app.services.quality import get_quality_profile, profile_processors
+from app.services.text_layer import (
+    ENGINE_FAST,
+    ENGINE_FULL,
+    PAGINATED_MARKDOWN,
+    TextLayerConverter,
+    classify_pages,
+    fast_path_decision,
+    page_decisions,
+    pages_needing_ocr,
+)
+from app.services.instrumentation import (
+    StageTimer,
+    page_counters,
+    emit_conversion_metrics,
+)
 
 logger = logging.getLogger("pdf2md.converter")
 
-IMAGE_STORAGE_BASE = Path("uploads")
+# Marker pipeline classes resolved through resolve_dependencies, by stage
+BUILDER_STAGES = {
+    "LayoutBuilder": "layout",
+    "LineBuilder": "text_lines",
+    "OcrBuilder": "ocr",
+    "StructureBuilder": "structure",
+}
+
+
+class SelectiveOcrLineBuilder(LineBuilder):
+    """
+    LineBuilder that OCRs the pages it is given.
+
+    The embedded text of those pages is discarded, so marker detects and
+    recognises their lines instead. Other pages keep their text layer unless
+    marker's own per-page checks reject it.
+    """
+
+    ocr_pages: Annotated[
+        Optional[List[int]],
+        "0-based pages to OCR regardless of their text layer.",
+    ] = None
+
+    def __call__(self, document, provider):
+        for page_id in self.ocr_pages or []:
+            if page_id in provider.page_lines:
+                provider.page_lines[page_id] = []
+        super().__call__(document, provider)
+
+
+class SelectiveOcrPdfConverter(PdfConverter):
+    """PdfConverter that uses SelectiveOcrLineBuilder when ocr_pages is set"""
+
+    def builder_class(self, cls):
+        """Class to construct when marker asks for cls"""
+        if cls is LineBuilder and self.config.get("ocr_pages") is not None:
+            return SelectiveOcrLineBuilder
+        return cls
+
+    def resolve_dependencies(self, cls):
+        return super().resolve_dependencies(self.builder_class(cls))
+
+
+class ArtifactCachingPdfConverter(SelectiveOcrPdfConverter):
+    """
+    PdfConverter that reuses per-page artifacts of earlier conversions.
+
+    When artifact_key (the file hash) is set, page images, layout, line
+    detection and OCR results are read from and written to the artifact
+    cache, so e.g. re-converting with other output options only runs the
+    stages whose inputs changed. LLM service responses are cached by block
+    content across documents.
+    """
+
+    def builder_class(self, cls):
+        cls = super().builder_class(cls)
+        if self.config.get("artifact_key"):
+            cls = with_artifact_cache(cls)
+        if (
+            settings.LLM_CACHE_ENABLED
+            and isinstance(cls, type)
+            and issubclass(cls, BaseService)
+        ):
+            cls = with_llm_cache(cls)
+        return cls
+
+    def __call__(self, filepath: str):
+        document = self.build_document(filepath)
+        rendered = self.resolve_dependencies(self.renderer)(document)
+        if not self.config.get("paginate_output"):
+            # Unpaginated output does not show where pages start; a paginated
+            # rendering of the same document is returned to locate them
+            paginated = self.page_renderer()(document)
+            rendered.metadata[PAGINATED_MARKDOWN] = paginated.markdown
+        return rendered
+
+    def page_renderer(self):
+        """Renderer of paginated output, otherwise configured as the converter's"""
+        return self.renderer({**self.config, "paginate_output": True})
+
+    def build_document(self, filepath: str):
+        if not self.config.get("artifact_key"):
+            return super().build_document(filepath)
+
+        # Mirrors PdfConverter.build_document, with a caching provider
+        provider_cls = self.builder_class(provider_from_filepath(filepath))
+        layout_builder = self.resolve_dependencies(self.layout_builder_class)
+        line_builder = self.resolve_dependencies(LineBuilder)
+        ocr_builder = self.resolve_dependencies(OcrBuilder)
+        provider = provider_cls(filepath, self.config)
+        document = DocumentBuilder(self.config)(
+            provider, layout_builder, line_builder, ocr_builder
+        )
+        structure_builder_cls = self.resolve_dependencies(StructureBuilder)
+        structure_builder_cls(document)
+
+        for processor in self.processor_list:
+            processor(document)
+
+        return document
+
+
+class TimedPdfConverter(ArtifactCachingPdfConverter):
+    """
+    PdfConverter that records time spent in each pipeline stage.
+
+    Builders and the renderer are wrapped as marker resolves them; processors
+    are wrapped once after construction, with LLM processors timed as "llm".
+    Whatever build_document spends outside those (opening the PDF and
+    rasterizing pages) is recorded as "rasterize".
+    """
+
+    def __init__(self, *args, timer: StageTimer, **kwargs):
+        self.timer = timer
+        super().__init__(*args, **kwargs)
+        self.processor_list = [
+            self.timer.wrap(
+                processor,
+                "llm" if "LLM" in type(processor).__name__ else "processors",
+            )
+            for processor in self.processor_list
+        ]
+
+    def resolve_dependencies(self, cls):
+        obj = super().resolve_dependencies(cls)
+        if cls.__name__ in BUILDER_STAGES:
+            return self.timer.wrap(obj, BUILDER_STAGES[cls.__name__])
+        if isinstance(cls, type) and issubclass(cls, BaseRenderer):
+            return self.timer.wrap(obj, "render")
+        return obj
+
+    def page_renderer(self):
+        return self.timer.wrap(super().page_renderer(), "render")
+
+    def build_document(self, filepath: str):
+        start = time.perf_counter()
+        recorded_before = self.timer.recorded()
+        document = super().build_document(filepath)
+        inner = self.timer.recorded() - recorded_before
+        self.timer.add("rasterize", time.perf_counter() - start - inner)
+        return document
+
+
+_shared_models: Optional[Dict[str, Any]] = None
+_shared_models_lock = threading.Lock()
+
+
+def get_shared_models() -> Dict[str, Any]:
+    """
+    Models shared by every conversion in this worker process, wrapped so
+    concurrent tasks' calls are merged into shared batches
+
+    Loaded on first use; callers must copy the dict before handing it to
+    PdfConverter, which adds per-converter entries to it.
+    """
+    global _shared_models
+    with _shared_models_lock:
+        if _shared_models is None:
+            logger.info("Loading shared models for micro-batching")
+            _shared_models = wrap_models(create_model_dict())
+        return _shared_models
+
+
+_preloaded_models: Optional[Dict[str, Any]] = None
+
+
+def use_preloaded_models(models: Optional[Dict[str, Any]]) -> None:
+    """
+    Make every converter in this process use the given models
+
+    For processes that receive models already loaded, e.g. the bulk
+    conversion pool, instead of loading them per conversion.
+
+    Args:
+        models: Output of marker's create_model_dict(), or None to go back
+            to loading models per converter
+    """
+    global _preloaded_models
+    _preloaded_models = models
 
 
 def get_converter(
@@ -26,6 +235,10 @@ def get_converter(
     force_ocr: bool = False,
     extract_images: bool = True,
     paginate_output: bool = False,
+    timer: Optional[StageTimer] = None,
+    ocr_pages: Optional[List[int]] = None,
+    quality: str = settings.DEFAULT_QUALITY,
+    artifact_key: Optional[str] = None,
 ) -> PdfConverter:
     """
     Create and configure a PdfConverter instance
@@ -35,10 +248,18 @@ def get_converter(
         force_ocr: Whether to force OCR processing on the entire document
         extract_images: Whether to extract images from the PDF
         paginate_output: Whether to paginate the output
+        timer: If given, model loading and each pipeline stage are timed
+        ocr_pages: If given, OCR exactly these 0-based pages (plus any marker
+            rejects) instead of deciding for the whole document
+        quality: Quality profile whose marker settings to apply
+        artifact_key: File hash under which to cache per-page artifacts
 
     Returns:
         PdfConverter: Configured converter instance
     """
+    if settings.FAKE_CONVERTER:
+        return FakeConverter(paginate_output=paginate_output)
+
     config = {
         "output_format": "markdown",
         "use_llm": use_llm,
@@ -48,6 +269,10 @@ def get_converter(
     }
 
     if use_llm:
+        # Bounds the thread pool each marker LLM processor runs requests on
+        config["max_concurrency"] = settings.LLM_MAX_CONCURRENCY
+        if settings.MOCK_LLM:
+            config["llm_service"] = "app.services.mock_llm.MockLLMService"
         if "GOOGLE_API_KEY" in os.environ:
             config["gemini_api_key"] = os.environ["GOOGLE_API_KEY"]
         if "OPENAI_API_KEY" in os.environ:
@@ -61,13 +286,61 @@ def get_converter(
 
     llm_service = config_parser.get_llm_service() if use_llm else None
 
-    return PdfConverter(
-        config=config_parser.generate_config_dict(),
-        artifact_dict=create_model_dict(),
-        processor_list=config_parser.get_processors(),
+    with timer.stage("model_load") if timer else nullcontext():
+        if _preloaded_models is not None:
+            artifact_dict = dict(_preloaded_models)
+        elif settings.INFERENCE_BATCHING_ENABLED:
+            artifact_dict = dict(get_shared_models())
+        else:
+            artifact_dict = create_model_dict()
+
+    profile = get_quality_profile(quality)
+    config_dict = config_parser.generate_config_dict()
+    config_dict.update(profile.config)
+    if ocr_pages is not None and not force_ocr:
+        # A threshold of 1 stops marker from overriding per-page decisions
+        # when most pages are good
+        config_dict.update(ocr_pages=ocr_pages, min_document_ocr_threshold=1.0)
+    if artifact_key and settings.ARTIFACT_CACHE_ENABLED:
+        config_dict["artifact_key"] = artifact_key
+
+    converter_kwargs = dict(
+        config=config_dict,
+        artifact_dict=artifact_dict,
+        processor_list=config_parser.get_processors()
+        or profile_processors(profile, PdfConverter.default_processors),
         renderer=config_parser.get_renderer(),
         llm_service=llm_service,
     )
+    if timer:
+        return TimedPdfConverter(timer=timer, **converter_kwargs)
+    return ArtifactCachingPdfConverter(**converter_kwargs)
+
+
+def use_adaptive_ocr(force_ocr: bool) -> bool:
+    """Whether to choose OCR per page from the text-layer classification"""
+    return (
+        settings.ADAPTIVE_OCR_ENABLED and not settings.FAKE_CONVERTER and not force_ocr
+    )
+
+
+def use_fast_path(
+    use_llm: bool, force_ocr: bool, quality: str = settings.DEFAULT_QUALITY
+) -> bool:
+    """
+    Whether to try the text-layer engine before the full pipeline
+
+    LLM and forced-OCR requests, and quality profiles that rule it out,
+    explicitly ask for the model pipeline, and the fake converter must stay
+    in place for load tests.
+    """
+    return (
+        settings.FAST_PATH_ENABLED
+        and not settings.FAKE_CONVERTER
+        and not use_llm
+        and not force_ocr
+        and get_quality_profile(quality).fast_path
+    )
 
 
 @celery_app.task(bind=True)
@@ -80,16 +353,26 @@ def convert_pdf_task(
     force_ocr: bool = False,
     extract_images: bool = True,
     paginate_output: bool = False,
+    estimated_pages: Optional[int] = None,
+    quality: str = settings.DEFAULT_QUALITY,
+    remove_input: bool = True,
 ) -> Dict[str, Any]:
     logger.info(
-        f"Starting conversion task {self.request.id} for {original_filename} ({temp_file_path})"
+        f"Starting conversion task {self.request.id} for {original_filename} ({temp_file_path}, ~{estimated_pages or '?'} pages)"
     )
     logger.info(
-        f"Parameters: use_llm={use_llm}, force_ocr={force_ocr}, extract_images={extract_images}, paginate_output={paginate_output}"
+        f"Parameters: use_llm={use_llm}, force_ocr={force_ocr}, extract_images={extract_images}, paginate_output={paginate_output}, quality={quality}"
     )
 
-    base_storage_path = Path(settings.STORAGE_PATH)
-    image_output_dir = base_storage_path / IMAGE_STORAGE_BASE / file_hash / "images"
+    # Published for /queue/status ETAs
+    self.update_state(
+        state="STARTED",
+        meta={
+            "started_at": time.time(),
+            "estimated_pages": estimated_pages,
+            "queue": (self.request.delivery_info or {}).get("routing_key"),
+        },
+    )
 
     result_data: Dict[str, Optional[Any]] = {
         "file_hash": file_hash,
@@ -98,12 +381,17 @@ def convert_pdf_task(
         "force_ocr": force_ocr,
         "extract_images": extract_images,
         "paginate_output": paginate_output,
+        "quality": quality,
         "markdown": None,
         "metadata": None,
         "image_paths": None,
+        "stats": None,
+        "engine": None,
         "error": None,
     }
     saved_image_paths: List[str] = []  # List to store relative paths of saved images
+    timer = StageTimer()
+    engine = ENGINE_FULL
 
     db: Session = SessionLocal()
 
@@ -111,43 +399,80 @@ def convert_pdf_task(
         if not os.path.exists(temp_file_path):
             raise FileNotFoundError(f"Temporary file not found: {temp_file_path}")
 
-        converter = get_converter(
-            use_llm=use_llm,
-            force_ocr=force_ocr,
-            extract_images=extract_images,
-            paginate_output=paginate_output,
-        )
-
-        rendered = converter(temp_file_path)
-        text, metadata, images_data = text_from_rendered(rendered)
-
-        if extract_images and images_data:
+        page_classes = None
+        if use_fast_path(use_llm, force_ocr, quality) or use_adaptive_ocr(force_ocr):
             try:
-                image_output_dir.mkdir(parents=True, exist_ok=True)
-                logger.info(
-                    f"Saving images for task {self.request.id} to {image_output_dir}"
+                with timer.stage("text_layer_check"):
+                    page_classes = classify_pages(temp_file_path)
+            except Exception as classify_err:
+                logger.warning(
+                    f"Could not classify pages for task {self.request.id}: {classify_err}"
                 )
 
-                # Assuming images_data is a dict {filename: PIL.Image}
-                # Adjust if marker-pdf returns a different structure
-                if isinstance(images_data, dict):
-                    for img_filename, img_obj in images_data.items():
-                        if isinstance(img_obj, Image.Image):
-                            safe_filename = img_filename.replace(" ", "_")
-                            save_path = image_output_dir / safe_filename
-                            img_obj.save(save_path)
-                            relative_path = str(
-                                Path(file_hash) / "images" / safe_filename
-                            )
-                            saved_image_paths.append(relative_path)
-                        else:
-                            logger.warning(
-                                f"Item '{img_filename}' in images_data is not a PIL Image object."
-                            )
+        rendered = None
+        if page_classes is not None and use_fast_path(use_llm, force_ocr, quality):
+            try:
+                eligible, reason = fast_path_decision(page_classes, extract_images)
+                if eligible:
+                    with timer.stage("text_layer"):
+                        rendered = TextLayerConverter(paginate_output)(temp_file_path)
+                    engine = ENGINE_FAST
                 else:
-                    logger.warning(
-                        f"Expected images_data to be a dict, but got {type(images_data)}. Cannot save images."
+                    logger.info(
+                        f"Task {self.request.id} using full pipeline: {reason}"
                     )
+            except Exception as fast_err:
+                logger.warning(
+                    f"Text-layer conversion failed for task {self.request.id}, falling back to full pipeline: {fast_err}",
+                    exc_info=True,
+                )
+
+        ocr_pages = None
+        if page_classes is not None and use_adaptive_ocr(force_ocr):
+            ocr_pages = pages_needing_ocr(page_classes)
+
+        if rendered is None:
+            converter = get_converter(
+                use_llm=use_llm,
+                force_ocr=force_ocr,
+                extract_images=extract_images,
+                paginate_output=paginate_output,
+                timer=timer,
+                ocr_pages=ocr_pages,
+                quality=quality,
+                artifact_key=file_hash,
+            )
+            rendered = converter(temp_file_path)
+
+        result_data["engine"] = engine
+        text, _, images_data = text_from_rendered(rendered)
+        metadata = dict(getattr(rendered, "metadata", None) or {})
+        paginated_text = metadata.pop(PAGINATED_MARKDOWN, None)
+        if page_classes is not None:
+            metadata["page_decisions"] = page_decisions(
+                page_classes, ocr_pages, metadata.get("page_stats")
+            )
+
+        pending_images = None
+        if extract_images and images_data:
+            try:
+                with timer.stage("image_save"):
+                    if isinstance(images_data, dict):
+                        pending_images = image_store.save_document(
+                            file_hash, images_data
+                        )
+                        # Stored names differ when IMAGE_OUTPUT_FORMAT is set
+                        for name, stored_name in pending_images.renames.items():
+                            if stored_name != name:
+                                text = text.replace(f"]({name})", f"]({stored_name})")
+                                if paginated_text is not None:
+                                    paginated_text = paginated_text.replace(
+                                        f"]({name})", f"]({stored_name})"
+                                    )
+                    else:
+                        logger.warning(
+                            f"Expected images_data to be a dict, but got {type(images_data)}. Cannot save images."
+                        )
 
             except Exception as img_err:
                 logger.error(
@@ -155,34 +480,38 @@ def convert_pdf_task(
                     exc_info=True,
                 )
 
-        page_marker = getattr(settings, "PAGE_NUMBER", "{PAGE_NUMBER}")
-        if (
-            paginate_output
-            and hasattr(rendered, "metadata")
-            and "page_stats" in rendered.metadata
-        ):
-            page_count = len(rendered.metadata["page_stats"])
-            paginated_text = ""
-
-            separator = f"\n\n{page_marker}\n\n"
-            page_texts = text.split(separator)
-
-            for i, page_text in enumerate(page_texts):
-                # Add page number header before the segment for all pages if splitting occurred
-                # Or only for page 2 onwards if the first segment shouldn't have a header
-                if i > 0:  # Add header starting from the second segment (Page 2)
-                    paginated_text += (
-                        f"\n\n## Page {i + 1}\n\n"  # Use i+1 for 1-based numbering
-                    )
-                paginated_text += page_text.strip()
+        with timer.stage("postprocess"):
+            # Stored so page ranges can be read without loading the whole
+            # document
+            page_offsets = page_spans(text, paginated_text)
+
+        image_stats: List[Dict[str, Any]] = []
+        images_reused = 0
+        if pending_images is not None:
+            # Encoding overlapped with postprocessing; wait for what is left
+            with timer.stage("image_wait"):
+                stored = pending_images.result()
+            saved_image_paths = stored["paths"]
+            image_stats = stored["images"]
+            images_reused = stored["reused"]
+            logger.info(
+                f"Stored {len(saved_image_paths)} images for task {self.request.id} ({stored['written']} new, {images_reused} already stored)"
+            )
 
-            text = paginated_text.strip()
+        counters = page_counters(
+            getattr(rendered, "metadata", None), len(saved_image_paths)
+        )
+        counters["images_reused"] = images_reused
+        counters["image_bytes"] = sum(image["bytes"] for image in image_stats)
+        page_count = counters["pages"] or None
 
         result_data["markdown"] = text
         result_data["metadata"] = metadata
         result_data["image_paths"] = saved_image_paths
 
         try:
+            db_write_start = time.perf_counter()
+            timings = timer.as_dict()
             crud.create_conversion(
                 db=db,
                 file_hash=file_hash,
@@ -192,9 +521,21 @@ def convert_pdf_task(
                 paginate_output=paginate_output,
                 extract_images=extract_images,
                 force_ocr=force_ocr,
+                quality=quality,
                 status="COMPLETED",
                 image_paths=saved_image_paths,
+                page_count=page_count,
+                page_offsets=page_offsets,
+                processing_seconds=timings["total"],
+                stats={
+                    "timings": timings,
+                    "counters": counters,
+                    "page_decisions": metadata.get("page_decisions"),
+                    "images": image_stats,
+                },
+                engine=engine,
             )
+            timer.add("db_write", time.perf_counter() - db_write_start)
             logger.info(f"Conversion result for task {self.request.id} saved to DB.")
         except Exception as db_err:
             logger.error(
@@ -202,6 +543,10 @@ def convert_pdf_task(
                 exc_info=True,
             )
 
+        stats = {"timings": timer.as_dict(), "counters": counters, "engine": engine}
+        result_data["stats"] = stats
+        emit_conversion_metrics(self.request.id, stats)
+
         logger.info(
             f"Conversion task {self.request.id} completed successfully for {original_filename}"
         )
@@ -214,6 +559,7 @@ def convert_pdf_task(
             exc_info=True,
         )
         result_data["error"] = str(e)
+        CONVERSIONS.labels(status="failure").inc()
         self.update_state(
             state="FAILURE", meta={"exc_type": type(e).__name__, "exc_message": str(e)}
         )
@@ -221,7 +567,8 @@ def convert_pdf_task(
 
     finally:
         db.close()
-        if temp_file_path and os.path.exists(temp_file_path):
+        # The bulk CLI converts files in place
+        if remove_input and temp_file_path and os.path.exists(temp_file_path):
             try:
                 os.remove(temp_file_path)
                 logger.info(
@@ -0,0 +1,62 @@
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import Task, group  # type: ignore
+from celery.result import AsyncResult
+
+from app.celery_app import celery_app
+from app.core.config import settings
+
+# (task, args, kwargs, queue)
+Job = Tuple[Task, List[Any], Dict[str, Any], str]
+
+
+def local_execution() -> bool:
+    """Whether tasks run on the in-process pool instead of Celery workers"""
+    return settings.EXECUTION_BACKEND == "local"
+
+
+def send(
+    task: Task, args: List[Any], kwargs: Dict[str, Any], queue: str
+) -> AsyncResult:
+    """
+    Run a task on the configured execution backend
+
+    Args:
+        task: Celery task
+        args: Positional task arguments
+        kwargs: Keyword task arguments
+        queue: Queue to route it to
+
+    Returns:
+        AsyncResult: Handle of the task
+    """
+    if local_execution():
+        from app.services.local_backend import executor
+
+        task_id = executor.submit(task.name, args, kwargs, queue)
+        return AsyncResult(task_id, app=celery_app)
+    return task.apply_async(args=args, kwargs=kwargs, queue=queue)
+
+
+def send_group(jobs: List[Job]) -> Tuple[Optional[str], List[str]]:
+    """
+    Run tasks as one group on the configured execution backend
+
+    Args:
+        jobs: (task, args, kwargs, queue) per task
+
+    Returns:
+        Tuple[Optional[str], List[str]]: Group id (None if no jobs) and the
+            task id of each job, in order
+    """
+    if not jobs:
+        return None, []
+    if local_execution():
+        task_ids = [send(*job).id for job in jobs]
+        return str(uuid.uuid4()), task_ids
+    group_result = group(
+        task.signature(args=args, kwargs=kwargs, queue=queue)
+        for task, args, kwargs, queue in jobs
+    ).apply_async()
+    return group_result.id, [result.id for result in group_result.results]
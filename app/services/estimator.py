@@ -0,0 +1,83 @@
+import os
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+import pypdfium2 as pdfium
+
+logger = logging.getLogger("pdf2md.estimator")
+
+# Pages sampled when checking for a text layer; spread over the document so a
+# scanned appendix or a born-digital cover page does not decide on its own.
+TEXT_LAYER_SAMPLE_PAGES = 5
+# Below this many characters per sampled page we treat the page as image-only
+MIN_CHARS_PER_PAGE = 50
+
+
+@dataclass
+class PdfEstimate:
+    """Cheap, model-free description of an uploaded PDF"""
+
+    page_count: int
+    file_size: int
+    has_text_layer: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _sample_indices(page_count: int, samples: int) -> list:
+    if page_count <= samples:
+        return list(range(page_count))
+    step = (page_count - 1) / (samples - 1)
+    return sorted({round(i * step) for i in range(samples)})
+
+
+def estimate_pdf(file_path: str) -> Optional[PdfEstimate]:
+    """
+    Read page count and text-layer presence without loading any models
+
+    Only the document trailer and a handful of sampled pages are parsed, so
+    this stays in the millisecond range even for very large files.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        Optional[PdfEstimate]: The estimate, or None if the PDF could not be read
+    """
+    file_size = os.path.getsize(file_path)
+    try:
+        pdf = pdfium.PdfDocument(file_path)
+    except Exception as e:
+        logger.warning(f"Could not open {file_path} for estimation: {e}")
+        return None
+
+    try:
+        page_count = len(pdf)
+        sampled = _sample_indices(page_count, TEXT_LAYER_SAMPLE_PAGES)
+        pages_with_text = 0
+        for index in sampled:
+            page = pdf[index]
+            try:
+                text_page = page.get_textpage()
+                try:
+                    if text_page.count_chars() >= MIN_CHARS_PER_PAGE:
+                        pages_with_text += 1
+                finally:
+                    text_page.close()
+            finally:
+                page.close()
+    except Exception as e:
+        logger.warning(f"Could not estimate {file_path}: {e}")
+        return None
+    finally:
+        pdf.close()
+
+    # Majority vote over the sample
+    has_text_layer = bool(sampled) and pages_with_text * 2 > len(sampled)
+    return PdfEstimate(
+        page_count=page_count,
+        file_size=file_size,
+        has_text_layer=has_text_layer,
+    )
@@ -0,0 +1,363 @@
+import time
+import shutil
+import logging
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import LargeBinary, cast, func
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import (
+    CACHE_EVICTED_BYTES,
+    CACHE_EVICTED_ENTRIES,
+    CACHE_STORAGE_BYTES,
+)
+from app.db.base import SessionLocal
+from app.db import models
+from app.services.image_store import image_store
+
+logger = logging.getLogger("pdf2md.eviction")
+
+
+def tree_size(path: Path) -> int:
+    if not path.exists():
+        return 0
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def unlinked_size(path: Path) -> int:
+    """
+    Bytes under a directory, leaving out hard links to image blobs
+
+    Images linked from the blob store are counted once, as blobs.
+    """
+    if not path.exists():
+        return 0
+    total = 0
+    for f in path.rglob("*"):
+        stat = f.stat()
+        if f.is_file() and stat.st_nlink == 1:
+            total += stat.st_size
+    return total
+
+
+def blob_size(key: str) -> int:
+    try:
+        return image_store.blob_path(key).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def document_dir(file_hash: str) -> Path:
+    """Directory convert_pdf_task saves a document's images under"""
+    return Path(settings.STORAGE_PATH) / "uploads" / file_hash
+
+
+def source_file(file_hash: str) -> Path:
+    return Path(settings.UPLOAD_PATH) / f"{file_hash}.pdf"
+
+
+@dataclass
+class _Candidate:
+    id: int
+    file_hash: str
+    markdown_bytes: int
+    shared_bytes: int  # This row's share of the hash's images and source PDF
+    value: float
+
+
+@dataclass
+class _Storage:
+    """Bytes on disk per file hash and per image blob"""
+
+    rows_per_hash: Dict[str, int]
+    # Image directory (without blob links) and stored PDF, per file hash
+    hash_bytes: Dict[str, int]
+    blobs_per_hash: Dict[str, Set[str]]
+    blob_bytes: Dict[str, int]
+    blob_refs: Dict[str, int]  # Manifests of cached hashes naming each blob
+
+    @property
+    def total(self) -> int:
+        return sum(self.hash_bytes.values()) + sum(self.blob_bytes.values())
+
+
+def retention_value(row: Row, size_bytes: int, now: datetime.datetime) -> float:
+    """
+    How much keeping a cached conversion is worth; lowest is evicted first
+
+    Reconversion cost (seconds of worker time) times access frequency per
+    byte held, decayed by time since the last access with a half-life of
+    EVICTION_RECENCY_HALF_LIFE_HOURS. Failed conversions are worth nothing.
+
+    Args:
+        row: The cached conversion's status, processing_seconds, page_count,
+            created_at, last_accessed and access_count
+        size_bytes: Bytes it holds
+        now: Current UTC time (naive, as stored)
+
+    Returns:
+        float: Retention value
+    """
+    if row.status != "COMPLETED":
+        return 0.0
+    cost = row.processing_seconds or (
+        (row.page_count or 1) / settings.DEFAULT_PAGES_PER_SECOND
+    )
+    last_accessed = row.last_accessed or row.created_at or now
+    if last_accessed.tzinfo is not None:
+        last_accessed = last_accessed.astimezone(datetime.timezone.utc).replace(
+            tzinfo=None
+        )
+    age_hours = max(0.0, (now - last_accessed).total_seconds() / 3600)
+    recency = 0.5 ** (age_hours / settings.EVICTION_RECENCY_HALF_LIFE_HOURS)
+    frequency = 1 + (row.access_count or 0)
+    return cost * frequency * recency / max(size_bytes, 1)
+
+
+def _candidates(
+    db: Session, now: datetime.datetime
+) -> Tuple[List[_Candidate], _Storage]:
+    # The Markdown itself is measured in the database, not loaded
+    rows = (
+        db.query(
+            models.ConversionCache.id,
+            models.ConversionCache.file_hash,
+            models.ConversionCache.status,
+            models.ConversionCache.processing_seconds,
+            models.ConversionCache.page_count,
+            models.ConversionCache.created_at,
+            models.ConversionCache.last_accessed,
+            models.ConversionCache.access_count,
+            func.coalesce(
+                func.length(cast(models.ConversionCache.markdown_content, LargeBinary)),
+                0,
+            ).label("markdown_bytes"),
+        )
+        .filter(models.ConversionCache.status.in_(("COMPLETED", "FAILED")))
+        .all()
+    )
+    rows_per_hash: Dict[str, int] = {}
+    for row in rows:
+        rows_per_hash[row.file_hash] = rows_per_hash.get(row.file_hash, 0) + 1
+
+    hash_bytes = {
+        file_hash: unlinked_size(document_dir(file_hash))
+        + tree_size(source_file(file_hash))
+        for file_hash in rows_per_hash
+    }
+    # Each blob is on disk once however many documents name it
+    blobs_per_hash = {
+        file_hash: set(image_store.load_manifest(file_hash).values())
+        for file_hash in rows_per_hash
+    }
+    blob_refs: Dict[str, int] = {}
+    for keys in blobs_per_hash.values():
+        for key in keys:
+            blob_refs[key] = blob_refs.get(key, 0) + 1
+    blob_bytes = {key: blob_size(key) for key in blob_refs}
+    storage = _Storage(rows_per_hash, hash_bytes, blobs_per_hash, blob_bytes, blob_refs)
+
+    candidates = []
+    for row in rows:
+        markdown_bytes = row.markdown_bytes
+        hash_share = hash_bytes[row.file_hash] + sum(
+            blob_bytes[key] // blob_refs[key] for key in blobs_per_hash[row.file_hash]
+        )
+        shared_bytes = hash_share // rows_per_hash[row.file_hash]
+        candidates.append(
+            _Candidate(
+                id=row.id,
+                file_hash=row.file_hash,
+                markdown_bytes=markdown_bytes,
+                shared_bytes=shared_bytes,
+                value=retention_value(row, markdown_bytes + shared_bytes, now),
+            )
+        )
+    return candidates, storage
+
+
+def _remove_files(file_hash: str) -> Dict[str, int]:
+    """
+    Delete a document's image directory and stored source, unless written
+    recently; its blobs are left to _remove_unreferenced_blobs
+    """
+    reclaimed = {"images": 0, "source": 0}
+    grace = time.time() - settings.EVICTION_MIN_AGE_SECONDS
+    for kind, path in (
+        ("images", document_dir(file_hash)),
+        ("source", source_file(file_hash)),
+    ):
+        if not path.exists():
+            continue
+        # An in-flight conversion of the same file may be writing here
+        newest = max(f.stat().st_mtime for f in [path, *path.rglob("*")])
+        if newest > grace:
+            continue
+        # Blob links free nothing while the blob itself remains
+        size = unlinked_size(path) if path.is_dir() else tree_size(path)
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+            reclaimed[kind] += size
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+    return reclaimed
+
+
+def _remove_unreferenced_blobs(keys: Set[str]) -> int:
+    """
+    Delete those of the given blobs no manifest names any more
+
+    Manifests are read again here, after the evicted documents' were
+    deleted, so a conversion that started using a blob meanwhile keeps it;
+    blobs used in the last EVICTION_MIN_AGE_SECONDS are kept too.
+
+    Returns:
+        int: Bytes unlinked
+    """
+    if not keys:
+        return 0
+    referenced = image_store.referenced_blobs()
+    grace = time.time() - settings.EVICTION_MIN_AGE_SECONDS
+    freed = 0
+    for key in keys - referenced:
+        path = image_store.blob_path(key)
+        try:
+            stat = path.stat()
+            if stat.st_mtime > grace:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+            continue
+        freed += stat.st_size
+    return freed
+
+
+def evict(
+    db: Session,
+    max_bytes: Optional[int] = None,
+    max_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Delete the least valuable cached conversions until both quotas are met
+
+    A row, its Markdown and, once no other row of the same file remains, the
+    file's image directory and stored PDF are deleted together. Image blobs
+    are counted once however many documents share them, and deleted when
+    the last document naming them goes.
+
+    Args:
+        db: Database session
+        max_bytes: Storage quota; defaults to CACHE_QUOTA_MB (0 = unlimited)
+        max_rows: Row quota; defaults to CACHE_MAX_ROWS (0 = unlimited)
+
+    Returns:
+        Dict[str, Any]: rows and bytes before, rows evicted, bytes reclaimed
+            per kind (markdown, images, source) and in total
+    """
+    if max_bytes is None:
+        max_bytes = settings.CACHE_QUOTA_MB * 1024 * 1024
+    if max_rows is None:
+        max_rows = settings.CACHE_MAX_ROWS
+
+    now = datetime.datetime.utcnow()
+    candidates, storage = _candidates(db, now)
+    total_bytes = sum(c.markdown_bytes for c in candidates) + storage.total
+    total_rows = len(candidates)
+
+    def over_quota(rows: int, size: int) -> bool:
+        return (max_rows > 0 and rows > max_rows) or (
+            max_bytes > 0 and size > max_bytes
+        )
+
+    victims: List[_Candidate] = []
+    rows, size = total_rows, total_bytes
+    rows_left = dict(storage.rows_per_hash)
+    blob_refs = dict(storage.blob_refs)
+    for candidate in sorted(candidates, key=lambda c: c.value):
+        if not over_quota(rows, size):
+            break
+        victims.append(candidate)
+        rows -= 1
+        size -= candidate.markdown_bytes
+        rows_left[candidate.file_hash] -= 1
+        if rows_left[candidate.file_hash]:
+            continue
+        # Last row of the file: its files go, and blobs no one else names
+        size -= storage.hash_bytes[candidate.file_hash]
+        for key in storage.blobs_per_hash[candidate.file_hash]:
+            blob_refs[key] -= 1
+            if not blob_refs[key]:
+                size -= storage.blob_bytes[key]
+
+    reclaimed = {
+        "markdown": sum(v.markdown_bytes for v in victims),
+        "images": 0,
+        "source": 0,
+    }
+    if victims:
+        db.query(models.ConversionCache).filter(
+            models.ConversionCache.id.in_([v.id for v in victims])
+        ).delete(synchronize_session=False)
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        released_blobs: Set[str] = set()
+        for file_hash in {v.file_hash for v in victims}:
+            remaining = (
+                db.query(models.ConversionCache.id)
+                .filter(models.ConversionCache.file_hash == file_hash)
+                .first()
+            )
+            if remaining is None:
+                for kind, freed in _remove_files(file_hash).items():
+                    reclaimed[kind] += freed
+                if not document_dir(file_hash).exists():
+                    released_blobs |= storage.blobs_per_hash[file_hash]
+        reclaimed["images"] += _remove_unreferenced_blobs(released_blobs)
+
+        CACHE_EVICTED_ENTRIES.inc(len(victims))
+        for kind, freed in reclaimed.items():
+            CACHE_EVICTED_BYTES.labels(kind=kind).inc(freed)
+
+    reclaimed_total = sum(reclaimed.values())
+    CACHE_STORAGE_BYTES.set(max(total_bytes - reclaimed_total, 0))
+    report = {
+        "rows_before": total_rows,
+        "bytes_before": total_bytes,
+        "rows_evicted": len(victims),
+        "bytes_reclaimed": reclaimed,
+        "bytes_reclaimed_total": reclaimed_total,
+    }
+    if victims:
+        logger.info(
+            f"Evicted {len(victims)} of {total_rows} cached conversions, "
+            f"reclaimed {reclaimed_total} bytes"
+        )
+    return report
+
+
+@celery_app.task(name="app.services.eviction.evict_cache_task")
+def evict_cache_task() -> Dict[str, Any]:
+    """Periodic eviction run, scheduled by Celery beat"""
+    db = SessionLocal()
+    try:
+        return evict(db)
+    finally:
+        db.close()
@@ -0,0 +1,74 @@
+import time
+import logging
+
+import pypdfium2 as pdfium
+from marker.renderers.markdown import MarkdownOutput
+
+from app.core.config import settings
+from app.services.text_layer import PAGE_SEPARATOR, PAGINATED_MARKDOWN
+
+logger = logging.getLogger("pdf2md.fake_converter")
+
+FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua.\n\n"
+)
+
+
+class FakeConverter:
+    """
+    Stand-in for PdfConverter used when FAKE_CONVERTER is enabled.
+
+    Reads only the page count, sleeps for the configured latency and returns
+    filler Markdown of the configured size, spread over the pages (a
+    paragraph may continue on the next page), in the same MarkdownOutput
+    shape marker produces, so the rest of convert_pdf_task runs unchanged.
+    """
+
+    def __init__(
+        self,
+        latency: float = settings.FAKE_CONVERTER_LATENCY,
+        page_latency: float = settings.FAKE_CONVERTER_PAGE_LATENCY,
+        output_kb: int = settings.FAKE_CONVERTER_OUTPUT_KB,
+        paginate_output: bool = False,
+    ):
+        self.paginate_output = paginate_output
+        self.latency = latency
+        self.page_latency = page_latency
+        self.output_kb = output_kb
+
+    def __call__(self, filepath: str) -> MarkdownOutput:
+        pdf = pdfium.PdfDocument(filepath)
+        try:
+            page_count = len(pdf)
+        finally:
+            pdf.close()
+
+        time.sleep(self.latency + self.page_latency * page_count)
+
+        target_chars = self.output_kb * 1024
+        body = FILLER * (target_chars // len(FILLER) + 1)
+        body = "# Converted document\n\n" + body[:target_chars]
+        page_chars = -(-len(body) // max(page_count, 1))
+        paginated = "".join(
+            f"\n\n{{{page}}}{PAGE_SEPARATOR}\n\n"
+            + body[page * page_chars : (page + 1) * page_chars]
+            for page in range(max(page_count, 1))
+        )
+        metadata = {
+            "table_of_contents": [],
+            "page_stats": [
+                {
+                    "page_id": page,
+                    "text_extraction_method": "pdftext",
+                    "block_counts": [],
+                }
+                for page in range(page_count)
+            ],
+        }
+        if self.paginate_output:
+            markdown = paginated
+        else:
+            markdown = body
+            metadata[PAGINATED_MARKDOWN] = paginated
+        return MarkdownOutput(markdown=markdown, images={}, metadata=metadata)
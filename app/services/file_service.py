@@ -1,4 +1,3 @@
-import os
 import uuid
 import hashlib
 import shutil
@@ -7,17 +6,13 @@ from pathlib import Path
 from fastapi import UploadFile
 from typing import Tuple
 
+from app.core.config import settings
+
 logger = logging.getLogger("pdf2md.file_service")
 
-STORAGE_DIR = Path(
-    os.path.abspath(
-        os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "storage"
-        )
-    )
-)
-TEMP_DIR = STORAGE_DIR / "temp"
-UPLOADS_DIR = STORAGE_DIR / "uploads"
+STORAGE_DIR = Path(settings.STORAGE_PATH)
+TEMP_DIR = Path(settings.TEMP_PATH)
+UPLOADS_DIR = Path(settings.UPLOAD_PATH)
 
 # Create directories if they don't exist
 TEMP_DIR.mkdir(exist_ok=True, parents=True)
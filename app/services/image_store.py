@@ -0,0 +1,297 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.core.metrics import IMAGE_ENCODE_SECONDS, IMAGE_ENCODED_BYTES
+
+logger = logging.getLogger("pdf2md.image_store")
+
+BLOB_DIR = "_blobs"  # Under the uploads directory, so /uploads serves blobs too
+MANIFEST_NAME = "manifest.json"
+
+# IMAGE_OUTPUT_FORMAT -> (PIL format, file extension)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpeg"),
+}
+
+
+@dataclass
+class PendingImages:
+    """Images of one document being encoded and written in the background"""
+
+    # marker image name -> stored name; they differ when the format changes
+    renames: Dict[str, str] = field(default_factory=dict)
+    jobs: List[Tuple[str, Future]] = field(default_factory=list)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Wait for every image to be stored
+
+        Returns:
+            Dict[str, Any]: paths (servable paths relative to the uploads
+                directory), written (new blobs), reused, and per image: name,
+                format, seconds (encode time) and bytes
+        """
+        paths: List[str] = []
+        images: List[Dict[str, Any]] = []
+        written = reused = 0
+        for name, job in self.jobs:
+            try:
+                stored = job.result()
+            except Exception as e:
+                logger.error(f"Error storing image {name}: {e}", exc_info=True)
+                continue
+            paths.append(stored["path"])
+            if stored["written"]:
+                written += 1
+                images.append(
+                    {
+                        "name": name,
+                        "format": stored["format"],
+                        "seconds": round(stored["seconds"], 4),
+                        "bytes": stored["bytes"],
+                    }
+                )
+            else:
+                reused += 1
+        return {"paths": paths, "written": written, "reused": reused, "images": images}
+
+
+class ImageStore:
+    """
+    Content-addressed store for extracted images.
+
+    Each image is written once to <root>/_blobs/<xx>/<sha256>.<ext>, keyed by
+    its pixels and encoding settings, however many documents or option
+    variants contain it. A document's manifest (<root>/<file_hash>/
+    manifest.json) maps its image names to blob keys. The familiar
+    <file_hash>/images/<name> paths are hard links to the blobs where the
+    filesystem allows, and otherwise the manifest is used to resolve names
+    to blob paths.
+
+    Encoding and writing run on a bounded thread pool, so the task can
+    continue while images are stored (see save_document).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        hardlinks: bool = True,
+        output_format: str = "",
+        quality: int = 85,
+        max_dimension: int = 0,
+        workers: int = 4,
+    ):
+        self.root = root
+        self.hardlinks = hardlinks
+        self.output_format = output_format.lower()
+        self.quality = quality
+        self.max_dimension = max_dimension
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created on first use, so importing the API does not start threads
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="image-store"
+                )
+            return self._executor
+
+    def output_name(self, filename: str) -> str:
+        """Stored file name: marker's, with the extension of the output format"""
+        safe_filename = filename.replace(" ", "_")
+        if self.output_format not in OUTPUT_FORMATS:
+            return safe_filename
+        return str(
+            Path(safe_filename).with_suffix(OUTPUT_FORMATS[self.output_format][1])
+        )
+
+    def blob_key(self, image: Image.Image, filename: str) -> str:
+        """Blob name: hash of pixels and encoding settings, plus the extension"""
+        digest = hashlib.sha256(
+            f"{image.mode}{image.size}{self.quality}:{self.max_dimension}".encode()
+        )
+        digest.update(image.tobytes())
+        return f"{digest.hexdigest()}{Path(filename).suffix.lower()}"
+
+    def blob_relative_path(self, key: str) -> str:
+        return f"{BLOB_DIR}/{key[:2]}/{key}"
+
+    def blob_path(self, key: str) -> Path:
+        return self.root / self.blob_relative_path(key)
+
+    def manifest_path(self, file_hash: str) -> Path:
+        return self.root / file_hash / MANIFEST_NAME
+
+    def atomic_write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def encode(self, image: Image.Image, fmt: str) -> bytes:
+        """Encode an image in a PIL format, applying the dimension cap"""
+        if self.max_dimension and max(image.size) > self.max_dimension:
+            image = image.copy()
+            image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options: Dict[str, Any] = {}
+        if fmt in ("JPEG", "WEBP"):
+            options["quality"] = self.quality
+        if fmt == "WEBP":
+            options["method"] = 4
+        if fmt == "PNG":
+            options["optimize"] = True
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt, **options)
+        return buffer.getvalue()
+
+    def _store(
+        self, key: str, image: Image.Image, file_hash: str, name: str
+    ) -> Dict[str, Any]:
+        """Encode and write a blob unless present, then link it; runs on the pool"""
+        path = self.blob_path(key)
+        fmt = Image.registered_extensions().get(path.suffix, "PNG")
+        stored: Dict[str, Any] = {"written": False, "format": fmt}
+        try:
+            # Reused: restart the janitor's grace period, as the manifest
+            # naming it may be written after the janitor lists references
+            os.utime(path)
+        except FileNotFoundError:
+            start = time.perf_counter()
+            data = self.encode(image, fmt)
+            seconds = time.perf_counter() - start
+            self.atomic_write(path, data)
+            IMAGE_ENCODE_SECONDS.labels(format=fmt).observe(seconds)
+            IMAGE_ENCODED_BYTES.labels(format=fmt).observe(len(data))
+            stored.update(written=True, seconds=seconds, bytes=len(data))
+
+        legacy = Path(file_hash) / "images" / name
+        if self.hardlinks and self._link(path, self.root / legacy):
+            stored["path"] = str(legacy)
+        else:
+            stored["path"] = self.blob_relative_path(key)
+        return stored
+
+    def _link(self, blob: Path, target: Path) -> bool:
+        """Hard link target to blob; False if the filesystem does not allow it"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if target.exists() and os.path.samefile(blob, target):
+                return True
+            tmp = target.with_name(f".{target.name}.link")
+            if tmp.exists():
+                tmp.unlink()
+            os.link(blob, tmp)
+            os.replace(tmp, target)
+            return True
+        except OSError as e:
+            logger.debug(f"Could not hard link {target}: {e}")
+            return False
+
+    def save_document(
+        self, file_hash: str, images: Dict[str, Image.Image]
+    ) -> PendingImages:
+        """
+        Store a document's images in the background and write its manifest
+
+        Only hashing happens on the calling thread; call result() on the
+        returned handle before publishing the image paths.
+
+        Args:
+            file_hash: Hash of the source PDF
+            images: marker's {filename: PIL image}
+
+        Returns:
+            PendingImages: Stored names and the pending writes
+        """
+        manifest = self.load_manifest(file_hash)
+        pending = PendingImages()
+        for filename, image in images.items():
+            if not isinstance(image, Image.Image):
+                logger.warning(
+                    f"Item '{filename}' in images_data is not a PIL Image object."
+                )
+                continue
+            name = self.output_name(filename)
+            key = self.blob_key(image, name)
+            manifest[name] = key
+            pending.renames[filename] = name
+            pending.jobs.append(
+                (name, self.executor.submit(self._store, key, image, file_hash, name))
+            )
+
+        if manifest:
+            self.atomic_write(
+                self.manifest_path(file_hash), json.dumps(manifest, indent=1).encode()
+            )
+        return pending
+
+    def load_manifest(self, file_hash: str) -> Dict[str, str]:
+        """Image name -> blob key for a document (empty if none)"""
+        try:
+            return json.loads(self.manifest_path(file_hash).read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def resolve(
+        self, file_hash: str, name: str, manifest: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        Servable path, relative to the uploads directory, of a document image
+
+        Falls back to the <file_hash>/images/<name> path for documents
+        converted before the store existed.
+        """
+        if manifest is None:
+            manifest = self.load_manifest(file_hash)
+        name = name.lstrip("/")
+        key = manifest.get(name)
+        if key is None:
+            return f"{file_hash}/images/{name}"
+        return self.blob_relative_path(key)
+
+    def referenced_blobs(self) -> Set[str]:
+        """Blob keys named by any manifest"""
+        keys = set()
+        for manifest in self.root.glob(f"*/{MANIFEST_NAME}"):
+            try:
+                keys.update(json.loads(manifest.read_text()).values())
+            except (FileNotFoundError, ValueError):
+                continue
+        return keys
+
+
+image_store = ImageStore(
+    Path(settings.STORAGE_PATH) / "uploads",
+    hardlinks=settings.IMAGE_STORE_HARDLINKS,
+    output_format=settings.IMAGE_OUTPUT_FORMAT,
+    quality=settings.IMAGE_QUALITY,
+    max_dimension=settings.IMAGE_MAX_DIMENSION,
+    workers=settings.IMAGE_ENCODE_WORKERS,
+)
@@ -0,0 +1,118 @@
+import os
+import re
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.artifacts import enforce_lru_limit
+from app.services.image_store import BLOB_DIR, OUTPUT_FORMATS, image_store
+
+logger = logging.getLogger("pdf2md.image_variants")
+
+DERIVED_DIR = Path(settings.STORAGE_PATH) / "derived_images"
+FILE_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def variant_width(requested: int) -> int:
+    """Smallest configured variant width at least as wide as requested"""
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    for width in widths:
+        if width >= requested:
+            return width
+    return widths[-1]
+
+
+def source_path(file_hash: str, name: str) -> Optional[Path]:
+    """
+    File of a document image, or None if it does not exist
+
+    Resolves through the document's manifest and never leaves the uploads
+    directory.
+    """
+    if not FILE_HASH_RE.match(file_hash):
+        return None
+    root = image_store.root.resolve()
+    path = (root / image_store.resolve(file_hash, name)).resolve()
+    if root not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def get_variant(
+    source: Path, width: int, fmt: Optional[str] = None
+) -> Tuple[Path, str]:
+    """
+    Path of a resized (and possibly re-encoded) copy of an image
+
+    Generated on first request and kept under storage/derived_images, named
+    after the source file, so blobs shared by several documents share their
+    variants too. Images are never enlarged; if no resize or re-encode is
+    needed the source itself is returned.
+
+    Args:
+        source: Image file (see source_path)
+        width: Requested width; rounded up to a configured variant width
+        fmt: webp, png or jpeg; None keeps the source format
+
+    Returns:
+        Tuple[Path, str]: File to serve and its media type
+    """
+    fmt = (fmt or "").lower()
+    extension = OUTPUT_FORMATS[fmt][1] if fmt in OUTPUT_FORMATS else source.suffix
+    width = variant_width(width)
+    with Image.open(source) as probe:
+        source_width = probe.width
+    if width >= source_width and extension == source.suffix:
+        return source, _media_type(source.suffix)
+
+    # Blob names are content hashes; legacy files are keyed by their path
+    if source.parent.parent.name == BLOB_DIR:
+        key = source.stem
+    else:
+        key = f"{source.parent.parent.name}_{source.stem}"
+    target = DERIVED_DIR / key[:2] / f"{key}.w{width}{extension}"
+    if target.exists():
+        CACHE_LOOKUPS.labels(tier="image_variant", result="hit").inc()
+        try:
+            os.utime(target)  # Recency for eviction
+        except OSError:
+            pass
+        return target, _media_type(extension)
+
+    CACHE_LOOKUPS.labels(tier="image_variant", result="miss").inc()
+    with Image.open(source) as image:
+        image.load()
+        if image.width > width:
+            image.thumbnail((width, image.height), Image.LANCZOS)
+        pil_format = Image.registered_extensions().get(extension, "PNG")
+        image_store.atomic_write(target, image_store.encode(image, pil_format))
+    return target, _media_type(extension)
+
+
+def _media_type(extension: str) -> str:
+    fmt = Image.registered_extensions().get(extension.lower())
+    return Image.MIME.get(fmt, "application/octet-stream")
+
+
+def srcset(file_hash: str, name: str) -> List[Tuple[str, int]]:
+    """(url, width) of every variant of a document image, for srcset"""
+    return [
+        (f"/images/{file_hash}/{name}?w={width}", width)
+        for width in sorted(settings.IMAGE_VARIANT_WIDTHS)
+    ]
+
+
+def enforce_limit() -> Tuple[int, int]:
+    """
+    Evict least recently served variants beyond DERIVED_IMAGE_CACHE_MAX_MB
+
+    Returns:
+        Tuple[int, int]: Files and bytes removed
+    """
+    return enforce_lru_limit(
+        DERIVED_DIR, settings.DERIVED_IMAGE_CACHE_MAX_MB * 1024 * 1024
+    )
@@ -0,0 +1,425 @@
+import os
+import time
+import uuid
+import shutil
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import logging.config
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import INGESTED_DOCUMENTS
+from app.db import crud
+from app.db.base import SessionLocal, init_db
+from app.services import dispatch
+from app.services.converter import convert_pdf_task
+from app.services.estimator import estimate_pdf
+from app.services.file_service import TEMP_DIR, calculate_file_hash
+from app.services.quality import get_quality_profile
+from app.services.queue_stats import get_queue_lengths
+from app.services.routing import PROFILE_PREWARM, queue_for_profile
+
+logger = logging.getLogger("pdf2md.ingest")
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Fully written PDFs end with this marker (plus a trailing newline or so)
+PDF_EOF = b"%%EOF"
+
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "use_llm": False,
+    "paginate_output": False,
+    "extract_images": True,
+    "force_ocr": False,
+}
+
+FileSignature = Tuple[int, float]  # (size, mtime)
+
+
+def is_candidate(path: Path) -> bool:
+    """PDFs, ignoring hidden files such as editors' and rsync's partials"""
+    return path.suffix.lower() == ".pdf" and not path.name.startswith(".")
+
+
+def signature(path: Path) -> Optional[FileSignature]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def scan(root: Path) -> Dict[Path, FileSignature]:
+    """Every candidate PDF under root with its size and mtime"""
+    found = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = Path(dirpath) / name
+            if is_candidate(path):
+                sig = signature(path)
+                if sig is not None:
+                    found[path] = sig
+    return found
+
+
+def looks_complete(path: Path) -> bool:
+    """Whether the file ends like a finished PDF"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, path.stat().st_size - 1024))
+            return PDF_EOF in f.read()
+    except OSError:
+        return False
+
+
+class Inotify:
+    """
+    Minimal inotify binding through libc, watching directory trees
+
+    Raises OSError where inotify is not available, so callers can fall back
+    to polling.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this platform")
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self.fd = fd
+        self._dirs: Dict[int, Path] = {}
+
+    def watch_tree(self, root: Path) -> None:
+        """Watch root and every directory below it"""
+        for dirpath, _, _ in os.walk(root):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                # Typically fs.inotify.max_user_watches exhausted
+                raise OSError(errno, f"Cannot watch {dirpath}: {os.strerror(errno)}")
+            self._dirs[wd] = Path(dirpath)
+
+    def read(self, timeout: float) -> List[Tuple[Path, int]]:
+        """
+        Wait up to timeout for events
+
+        Returns:
+            List[Tuple[Path, int]]: (path, event mask) per event
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((Path(), mask))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # Directory removed or unmounted
+                del self._dirs[wd]
+                continue
+            events.append((directory / os.fsdecode(name), mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class SettleTracker:
+    """
+    Holds back files until they stop changing
+
+    A file is released once its size and mtime have been unchanged, and no
+    write was reported, for settle_seconds, and it ends like a complete PDF.
+    Files that never do (e.g. damaged PDFs) are released after ten times as
+    long and left to fail conversion.
+    """
+
+    def __init__(self, settle_seconds: float):
+        self.settle_seconds = settle_seconds
+        self._pending: Dict[Path, Tuple[FileSignature, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, path: Path, now: float) -> None:
+        """Record activity on a file"""
+        sig = signature(path)
+        if sig is not None:
+            self._pending[path] = (sig, now)
+
+    def ready(self, now: float) -> List[Path]:
+        """Files that have settled; they are no longer tracked"""
+        released = []
+        for path, (sig, changed_at) in list(self._pending.items()):
+            current = signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != sig:
+                self._pending[path] = (current, now)
+            elif now - changed_at >= self.settle_seconds and (
+                now - changed_at >= 10 * self.settle_seconds or looks_complete(path)
+            ):
+                del self._pending[path]
+                released.append(path)
+        return released
+
+
+def ingest_profiles() -> List[Dict[str, Any]]:
+    """
+    Conversion options for each entry of INGEST_PROFILES
+
+    Raises:
+        ValueError: Unknown option or quality profile
+    """
+    profiles = []
+    for overrides in settings.INGEST_PROFILES:
+        unknown = set(overrides) - set(DEFAULT_OPTIONS) - {"quality"}
+        if unknown:
+            raise ValueError(f"Unknown ingestion options: {', '.join(sorted(unknown))}")
+        options = dict(DEFAULT_OPTIONS, quality=settings.DEFAULT_QUALITY)
+        options.update(overrides)
+        get_quality_profile(options["quality"])
+        if options["use_llm"] and not settings.llm_available:
+            logger.warning("Ingestion profile asks for LLM but no API keys configured")
+            options["use_llm"] = False
+        if options not in profiles:
+            profiles.append(options)
+    return profiles
+
+
+class Ingestor:
+    """
+    Enqueues conversions of settled files on the prewarm queue
+
+    Files are hashed and checked against the cache once per option profile.
+    Conversions wait in a local backlog while user-facing queues have more
+    than INGEST_MAX_QUEUE_DEPTH jobs waiting or the prewarm queue already
+    holds INGEST_MAX_PENDING, so pre-warming never delays user requests by
+    more than a couple of jobs.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]]):
+        self.profiles = profiles
+        self.queue = queue_for_profile(PROFILE_PREWARM)
+        self.backlog: Deque[Tuple[Path, str, Dict[str, Any]]] = deque()
+        self._handled: Dict[Path, FileSignature] = {}
+        self._enqueued: Set[Tuple[str, str]] = set()
+        self._next_drain = 0.0
+
+    def submit(self, path: Path) -> None:
+        """Queue the conversions a settled file still needs"""
+        sig = signature(path)
+        if sig is None or self._handled.get(path) == sig:
+            return
+        self._handled[path] = sig
+        try:
+            file_hash = calculate_file_hash(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            INGESTED_DOCUMENTS.labels(result="error").inc()
+            return
+
+        db = SessionLocal()
+        try:
+            for options in self.profiles:
+                key = (file_hash, repr(sorted(options.items())))
+                if key in self._enqueued:
+                    INGESTED_DOCUMENTS.labels(result="duplicate").inc()
+                elif crud.get_conversion_by_hash_and_params(db, file_hash, **options):
+                    INGESTED_DOCUMENTS.labels(result="cached").inc()
+                else:
+                    self._enqueued.add(key)
+                    self.backlog.append((path, file_hash, options))
+        finally:
+            db.close()
+
+    def capacity(self) -> int:
+        """Conversions that may be enqueued now"""
+        try:
+            lengths = get_queue_lengths()
+        except Exception as e:
+            logger.warning(f"Could not read queue lengths, holding back: {e}")
+            return 0
+        waiting_user_jobs = sum(
+            depth for queue, depth in lengths.items() if queue != self.queue
+        )
+        if waiting_user_jobs > settings.INGEST_MAX_QUEUE_DEPTH:
+            return 0
+        return max(0, settings.INGEST_MAX_PENDING - lengths.get(self.queue, 0))
+
+    def drain(self) -> int:
+        """Enqueue backlog entries while there is capacity; returns how many"""
+        # Queue lengths are cached for QUEUE_STATS_TTL; wait for fresh ones
+        if time.monotonic() < self._next_drain:
+            return 0
+        self._next_drain = time.monotonic() + settings.QUEUE_STATS_TTL
+        allowance = self.capacity()
+        sent = 0
+        while self.backlog and sent < allowance:
+            path, file_hash, options = self.backlog.popleft()
+            try:
+                if self._enqueue(path, file_hash, options):
+                    sent += 1
+            except Exception as e:
+                logger.error(f"Could not enqueue {path}: {e}", exc_info=True)
+                INGESTED_DOCUMENTS.labels(result="error").inc()
+        return sent
+
+    def _enqueue(self, path: Path, file_hash: str, options: Dict[str, Any]) -> bool:
+        # The task deletes its input, and the watched file must stay
+        temp_file_path = TEMP_DIR / f"{uuid.uuid4()}.pdf"
+        try:
+            os.link(path, temp_file_path)
+        except OSError:
+            shutil.copyfile(path, temp_file_path)
+        if calculate_file_hash(temp_file_path) != file_hash:
+            # Rewritten since it settled; it will be submitted again
+            temp_file_path.unlink()
+            self._handled.pop(path, None)
+            return False
+        estimate = estimate_pdf(str(temp_file_path))
+        task = dispatch.send(
+            convert_pdf_task,
+            [str(temp_file_path), file_hash, path.name],
+            dict(options, estimated_pages=estimate.page_count if estimate else None),
+            self.queue,
+        )
+        INGESTED_DOCUMENTS.labels(result="enqueued").inc()
+        logger.info(
+            f"Enqueued {path} (hash: {file_hash}, quality: {options['quality']}) as task {task.id}"
+        )
+        return True
+
+
+def _initial_files(root: Path) -> Dict[Path, FileSignature]:
+    return scan(root) if root.exists() else {}
+
+
+def watch(root: Path, stop: Optional[threading.Event] = None) -> None:
+    """
+    Ingest PDFs written to root until stop is set
+
+    Uses inotify where available, otherwise rescans root every
+    INGEST_POLL_INTERVAL seconds.
+
+    Args:
+        root: Directory to watch (recursively)
+        stop: Set to end the loop
+    """
+    stop = stop or threading.Event()
+    root.mkdir(parents=True, exist_ok=True)
+    tracker = SettleTracker(settings.INGEST_SETTLE_SECONDS)
+    ingestor = Ingestor(ingest_profiles())
+
+    inotify: Optional[Inotify] = None
+    if settings.INGEST_USE_INOTIFY:
+        try:
+            inotify = Inotify()
+            inotify.watch_tree(root)
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}); polling {root} instead")
+            if inotify is not None:
+                inotify.close()
+            inotify = None
+
+    known = _initial_files(root)
+    now = time.monotonic()
+    if settings.INGEST_SCAN_EXISTING:
+        for path in known:
+            tracker.touch(path, now)
+    logger.info(
+        f"Watching {root} ({'inotify' if inotify else 'polling'}) for "
+        f"{len(ingestor.profiles)} option profiles on queue {ingestor.queue}"
+    )
+
+    # Short ticks while files are settling or waiting for capacity
+    tick = min(1.0, settings.INGEST_SETTLE_SECONDS / 2)
+    next_scan = time.monotonic() + settings.INGEST_POLL_INTERVAL
+    try:
+        while not stop.is_set():
+            busy = len(tracker) or ingestor.backlog
+            if inotify:
+                for path, mask in inotify.read(tick if busy else 5 * tick):
+                    now = time.monotonic()
+                    if mask & IN_Q_OVERFLOW:
+                        logger.warning("inotify queue overflowed; rescanning")
+                        inotify.watch_tree(root)
+                        for found in _initial_files(root):
+                            tracker.touch(found, now)
+                    elif mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            # Watch it, and pick up files moved in with it
+                            inotify.watch_tree(path)
+                            for found in _initial_files(path):
+                                tracker.touch(found, now)
+                    elif is_candidate(path):
+                        tracker.touch(path, now)
+            else:
+                stop.wait(
+                    tick if busy else min(5 * tick, settings.INGEST_POLL_INTERVAL)
+                )
+                if time.monotonic() >= next_scan:
+                    next_scan = time.monotonic() + settings.INGEST_POLL_INTERVAL
+                    current = _initial_files(root)
+                    now = time.monotonic()
+                    for path, sig in current.items():
+                        if known.get(path) != sig:
+                            tracker.touch(path, now)
+                    known = current
+
+            for path in tracker.ready(time.monotonic()):
+                ingestor.submit(path)
+            if ingestor.backlog:
+                ingestor.drain()
+    finally:
+        if inotify:
+            inotify.close()
+
+
+def main() -> None:
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+    if not settings.INGEST_DIR:
+        logger.error("INGEST_DIR is not set; nothing to watch")
+        raise SystemExit(1)
+    if dispatch.local_execution():
+        logger.error("With EXECUTION_BACKEND=local the API server runs ingestion")
+        raise SystemExit(1)
+    init_db()
+    watch(Path(settings.INGEST_DIR))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.metrics import (
+    CONVERSIONS,
+    CONVERSION_ENGINES,
+    CONVERSION_SECONDS_PER_PAGE,
+    CONVERSION_STAGE_SECONDS,
+    MODEL_LOAD_SECONDS,
+    record_worker_memory,
+)
+
+logger = logging.getLogger("pdf2md.instrumentation")
+metrics_logger = logging.getLogger("pdf2md.metrics")
+
+
+class StageTimer:
+    """Accumulates wall time per named stage of a conversion."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = defaultdict(float)
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] += max(seconds, 0.0)
+
+    def recorded(self) -> float:
+        """Total seconds recorded across all stages so far"""
+        return sum(self.stages.values())
+
+    def wrap(self, target: Any, name: str) -> "TimedCall":
+        return TimedCall(target, self, name)
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: round(seconds, 4) for name, seconds in self.stages.items()}
+        timings["total"] = round(time.perf_counter() - self._started, 4)
+        return timings
+
+
+class TimedCall:
+    """
+    Proxy that times calls to a builder, processor or renderer.
+
+    Attribute access is forwarded, so the proxy can stand in wherever marker
+    expects the wrapped object.
+    """
+
+    def __init__(self, target: Any, timer: StageTimer, name: str):
+        self._target = target
+        self._timer = timer
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        with self._timer.stage(self._name):
+            return self._target(*args, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self._target, item)
+
+
+def page_counters(
+    metadata: Optional[Dict[str, Any]], image_count: int = 0
+) -> Dict[str, int]:
+    """
+    Summarise marker's per-page stats into document-level counters
+
+    Args:
+        metadata: Rendered document metadata (with "page_stats")
+        image_count: Number of extracted images
+
+    Returns:
+        Dict[str, int]: pages, ocr_pages, blocks, tables, llm_requests,
+            llm_errors, llm_tokens and images
+    """
+    counters = {
+        "pages": 0,
+        "ocr_pages": 0,
+        "blocks": 0,
+        "tables": 0,
+        "llm_requests": 0,
+        "llm_errors": 0,
+        "llm_tokens": 0,
+        "images": image_count,
+    }
+    for page in (metadata or {}).get("page_stats", []):
+        counters["pages"] += 1
+        if page.get("text_extraction_method") == "surya":
+            counters["ocr_pages"] += 1
+        for block_type, count in page.get("block_counts", []):
+            counters["blocks"] += count
+            if block_type == "Table":
+                counters["tables"] += count
+        block_metadata = page.get("block_metadata") or {}
+        counters["llm_requests"] += block_metadata.get("llm_request_count", 0)
+        counters["llm_errors"] += block_metadata.get("llm_error_count", 0)
+        counters["llm_tokens"] += block_metadata.get("llm_tokens_used", 0)
+    return counters
+
+
+def emit_conversion_metrics(task_id: str, stats: Dict[str, Any]) -> None:
+    """
+    Log conversion stats as a single structured (JSON) record and feed them
+    to the Prometheus collectors
+    """
+    metrics_logger.info(
+        json.dumps({"event": "conversion", "task_id": task_id, **stats})
+    )
+    timings = stats.get("timings", {})
+    pages = stats.get("counters", {}).get("pages")
+    for stage, seconds in timings.items():
+        if stage == "total":
+            continue
+        CONVERSION_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    if "model_load" in timings:
+        MODEL_LOAD_SECONDS.observe(timings["model_load"])
+    if pages and "total" in timings:
+        CONVERSION_SECONDS_PER_PAGE.observe(timings["total"] / pages)
+    CONVERSIONS.labels(status="success").inc()
+    if stats.get("engine"):
+        CONVERSION_ENGINES.labels(engine=stats["engine"]).inc()
+    record_worker_memory()
@@ -0,0 +1,191 @@
+import time
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Set
+
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import JANITOR_REMOVED_BYTES, JANITOR_REMOVED_FILES
+from app.db.base import SessionLocal
+from app.db import models
+from app.services.artifacts import artifact_cache
+from app.services.eviction import tree_size
+from app.services.image_store import BLOB_DIR, image_store
+from app.services import image_variants
+
+logger = logging.getLogger("pdf2md.janitor")
+
+
+def _newest_mtime(path: Path) -> float:
+    return max(f.stat().st_mtime for f in [path, *path.rglob("*")])
+
+
+def _remove(path: Path, kind: str, report: Dict[str, Dict[str, int]]) -> None:
+    size = tree_size(path)
+    try:
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {e}")
+        return
+    report[kind]["files"] += 1
+    report[kind]["bytes"] += size
+    JANITOR_REMOVED_FILES.labels(kind=kind).inc()
+    JANITOR_REMOVED_BYTES.labels(kind=kind).inc(size)
+
+
+def clean_temp_files(report: Dict[str, Dict[str, int]]) -> None:
+    """Delete uploads left in TEMP_PATH by tasks that never finished"""
+    cutoff = time.time() - settings.TEMP_FILE_MAX_AGE_SECONDS
+    temp_dir = Path(settings.TEMP_PATH)
+    if not temp_dir.is_dir():
+        return
+    for path in temp_dir.iterdir():
+        try:
+            stale = path.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            _remove(path, "temp", report)
+
+
+def clean_artifact_temp_files(report: Dict[str, Dict[str, int]]) -> None:
+    """Delete half-written artifact cache files of crashed workers"""
+    cutoff = time.time() - settings.PARTIAL_OUTPUT_MIN_AGE_SECONDS
+    root = Path(settings.STORAGE_PATH) / "artifacts"
+    if not root.is_dir():
+        return
+    for path in root.rglob("*.tmp"):
+        try:
+            stale = path.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            _remove(path, "artifact_temp", report)
+
+
+def clean_partial_outputs(db: Session, report: Dict[str, Dict[str, int]]) -> None:
+    """
+    Delete image directories no completed conversion refers to
+
+    These are left by conversions that failed or were killed after saving
+    images, and by evictions that found the directory still being written.
+    Directories modified in the last PARTIAL_OUTPUT_MIN_AGE_SECONDS may
+    belong to a running conversion and are kept.
+    """
+    uploads = Path(settings.STORAGE_PATH) / "uploads"
+    if not uploads.is_dir():
+        return
+    completed: Set[str] = {
+        file_hash
+        for (file_hash,) in db.query(models.ConversionCache.file_hash)
+        .filter(models.ConversionCache.status == "COMPLETED")
+        .distinct()
+    }
+    cutoff = time.time() - settings.PARTIAL_OUTPUT_MIN_AGE_SECONDS
+    for path in uploads.iterdir():
+        if not path.is_dir() or path.name in completed or path.name == BLOB_DIR:
+            continue
+        try:
+            stale = _newest_mtime(path) < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            _remove(path, "partial_output", report)
+
+
+def clean_image_blobs(report: Dict[str, Dict[str, int]]) -> None:
+    """Delete stored images that no document manifest refers to any more"""
+    blobs = image_store.root / BLOB_DIR
+    if not blobs.is_dir():
+        return
+    referenced = image_store.referenced_blobs()
+    cutoff = time.time() - settings.PARTIAL_OUTPUT_MIN_AGE_SECONDS
+    stale = []
+    for path in blobs.glob("*/*"):
+        if path.name in referenced:
+            continue
+        try:
+            # Written or reused by a conversion whose manifest is not saved yet
+            if path.stat().st_mtime < cutoff:
+                stale.append(path)
+        except FileNotFoundError:
+            continue
+    if not stale:
+        return
+    # Manifests saved while the blobs were listed
+    referenced = image_store.referenced_blobs()
+    for path in stale:
+        if path.name not in referenced:
+            _remove(path, "image_blob", report)
+
+
+def clean_artifact_cache(report: Dict[str, Dict[str, int]]) -> None:
+    """Evict least recently used page artifacts beyond ARTIFACT_CACHE_MAX_MB"""
+    if not settings.ARTIFACT_CACHE_ENABLED:
+        return
+    files, removed = artifact_cache.enforce_limit()
+    report["artifact"]["files"] += files
+    report["artifact"]["bytes"] += removed
+    JANITOR_REMOVED_FILES.labels(kind="artifact").inc(files)
+    JANITOR_REMOVED_BYTES.labels(kind="artifact").inc(removed)
+
+
+def clean_derived_images(report: Dict[str, Dict[str, int]]) -> None:
+    """Evict least recently served image variants beyond their cache size"""
+    files, removed = image_variants.enforce_limit()
+    report["derived_image"]["files"] += files
+    report["derived_image"]["bytes"] += removed
+    JANITOR_REMOVED_FILES.labels(kind="derived_image").inc(files)
+    JANITOR_REMOVED_BYTES.labels(kind="derived_image").inc(removed)
+
+
+def run_janitor(db: Session) -> Dict[str, Dict[str, int]]:
+    """
+    Remove leftovers of crashed, killed or failed conversions
+
+    Returns:
+        Dict[str, Dict[str, int]]: Files (or directories) and bytes removed,
+            per kind: temp, artifact_temp, partial_output, image_blob,
+            artifact and derived_image
+    """
+    report = {
+        kind: {"files": 0, "bytes": 0}
+        for kind in (
+            "temp",
+            "artifact_temp",
+            "partial_output",
+            "image_blob",
+            "artifact",
+            "derived_image",
+        )
+    }
+    clean_temp_files(report)
+    clean_artifact_temp_files(report)
+    clean_partial_outputs(db, report)
+    # After partial outputs, whose manifests may have been the last reference
+    clean_image_blobs(report)
+    clean_artifact_cache(report)
+    clean_derived_images(report)
+
+    removed = sum(counts["files"] for counts in report.values())
+    if removed:
+        logger.info(f"Janitor removed {removed} leftovers: {report}")
+    return report
+
+
+@celery_app.task(name="app.services.janitor.janitor_task")
+def janitor_task() -> Dict[str, Dict[str, int]]:
+    """Periodic cleanup run, scheduled by Celery beat"""
+    db = SessionLocal()
+    try:
+        return run_janitor(db)
+    finally:
+        db.close()
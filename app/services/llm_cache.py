@@ -0,0 +1,101 @@
+import hashlib
+import logging
+from functools import lru_cache
+from typing import List, Union
+
+from PIL import Image
+from marker.services import BaseService
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.db.base import SessionLocal
+from app.db import crud
+
+logger = logging.getLogger("pdf2md.llm_cache")
+
+# Attribute holding the model name, per marker LLM service
+MODEL_ATTRIBUTES = (
+    "gemini_model_name",
+    "openai_model",
+    "claude_model_name",
+    "ollama_model",
+    "mock_model_name",
+)
+
+
+def service_model(service: BaseService) -> str:
+    """Model name configured on a marker LLM service"""
+    for attribute in MODEL_ATTRIBUTES:
+        value = getattr(service, attribute, None)
+        if value:
+            return str(value)
+    return ""
+
+
+def content_hash(
+    prompt: str,
+    image: Union[Image.Image, List[Image.Image], None],
+    response_schema: type,
+) -> str:
+    """
+    Hash of everything the LLM sees for one block
+
+    The prompt embeds the block's text or HTML, and the block's page crop is
+    hashed by pixels, so identical tables or boilerplate in other documents
+    hash alike.
+    """
+    digest = hashlib.sha256()
+    digest.update(prompt.encode())
+    digest.update(getattr(response_schema, "__name__", "").encode())
+    images = image if isinstance(image, list) else [image] if image else []
+    for img in images:
+        digest.update(f"{img.mode}{img.size}".encode())
+        digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+class LLMCacheMixin:
+    """Answers repeated LLM requests from the persistent response cache"""
+
+    llm_provider: str = ""  # Class name of the wrapped service
+
+    def __call__(self, prompt, image, block, response_schema, *args, **kwargs):
+        provider = self.llm_provider
+        model = service_model(self)
+        cache_key = hashlib.sha256(
+            f"{provider}\0{model}\0{content_hash(prompt, image, response_schema)}".encode()
+        ).hexdigest()
+
+        # One session per call: marker's LLM processors call from threads
+        db = SessionLocal()
+        try:
+            try:
+                cached = crud.get_llm_response(db, cache_key)
+            except Exception as e:
+                logger.warning(f"LLM cache lookup failed: {e}")
+                cached = None
+            CACHE_LOOKUPS.labels(
+                tier="llm", result="miss" if cached is None else "hit"
+            ).inc()
+            if cached is not None:
+                return cached
+
+            response = super().__call__(
+                prompt, image, block, response_schema, *args, **kwargs
+            )
+            # Services return an empty dict on failure; retry those next time
+            if response:
+                try:
+                    crud.save_llm_response(db, cache_key, provider, model, response)
+                except Exception as e:
+                    logger.warning(f"Could not cache LLM response: {e}")
+            return response
+        finally:
+            db.close()
+
+
+@lru_cache(maxsize=None)
+def with_llm_cache(cls: type) -> type:
+    """Subclass of a marker LLM service that reads and writes the cache"""
+    return type(
+        f"Cached{cls.__name__}", (LLMCacheMixin, cls), {"llm_provider": cls.__name__}
+    )
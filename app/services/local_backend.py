@@ -0,0 +1,389 @@
+"""
+Local execution backend (EXECUTION_BACKEND=local)
+
+Runs tasks on a process pool inside the API process instead of sending them
+to Celery workers through a broker. Pool processes load the marker models
+once and keep them for every task they run. Task state is stored in the
+local_task table by a Celery result backend, so AsyncResult, /tasks/{id},
+admission control and batches work as they do with Celery. Queue statistics
+are read from the same table, and the beat schedule and folder ingestion run
+on threads.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import datetime
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from celery import states  # type: ignore
+from celery.backends.base import BaseBackend  # type: ignore
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db import crud
+from app.db.base import SessionLocal
+from app.services.routing import all_queues
+
+logger = logging.getLogger("pdf2md.local_backend")
+
+CLEANUP_INTERVAL_SECONDS = 3600.0
+
+
+class LocalResultBackend(BaseBackend):
+    """Celery result backend over the local_task table"""
+
+    def _store_result(
+        self, task_id, result, state, traceback=None, request=None, **kwargs
+    ):
+        db = SessionLocal()
+        try:
+            crud.store_local_task_result(
+                db, task_id, state, {"result": result, "traceback": traceback}
+            )
+        finally:
+            db.close()
+        return result
+
+    def _get_task_meta_for(self, task_id):
+        db = SessionLocal()
+        try:
+            task = crud.get_local_task(db, task_id)
+        finally:
+            db.close()
+        if task is None or task.meta is None:
+            return {"status": states.PENDING, "result": None}
+        meta = json.loads(task.meta)
+        return self.meta_from_decoded(
+            {
+                "task_id": task_id,
+                "status": task.status,
+                "result": meta.get("result"),
+                "traceback": meta.get("traceback"),
+                "children": [],
+                "date_done": (
+                    task.updated_at if task.status in states.READY_STATES else None
+                ),
+            }
+        )
+
+    def _forget(self, task_id):
+        db = SessionLocal()
+        try:
+            crud.delete_local_tasks(db, task_id=task_id)
+        finally:
+            db.close()
+
+    def cleanup(self):
+        """Delete finished tasks older than LOCAL_RESULT_EXPIRES"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            seconds=settings.LOCAL_RESULT_EXPIRES
+        )
+        db = SessionLocal()
+        try:
+            deleted = crud.delete_local_tasks(db, finished_before=cutoff)
+        finally:
+            db.close()
+        if deleted:
+            logger.info(f"Deleted {deleted} expired local task results")
+
+
+def _init_worker() -> None:
+    """Pool initializer: pin the process, register tasks and load models"""
+    from app.core.cpu import configure_worker_cpu
+    from app.core.metrics import MODEL_LOAD_SECONDS
+    from app.services.converter import use_preloaded_models
+
+    identity = multiprocessing.current_process()._identity
+    index = (identity[0] - 1) % settings.LOCAL_WORKERS if identity else 0
+    configure_worker_cpu(settings.WORKER_INDEX + index)
+    celery_app.loader.import_default_modules()
+    if not settings.FAKE_CONVERTER:
+        from marker.models import create_model_dict
+
+        start = time.perf_counter()
+        use_preloaded_models(create_model_dict())
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - start)
+
+
+def _run_task(
+    task_id: str, name: str, args: List[Any], kwargs: Dict[str, Any], queue: str
+) -> None:
+    # Stores its states and result through LocalResultBackend; failures are
+    # stored too rather than raised
+    celery_app.tasks[name].apply(
+        args=args, kwargs=kwargs, task_id=task_id, routing_key=queue
+    )
+
+
+class LocalExecutor:
+    """Process pool that runs tasks in place of Celery workers"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Models cannot be shared with forked children safely
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+
+    def submit(
+        self, name: str, args: List[Any], kwargs: Dict[str, Any], queue: str
+    ) -> str:
+        """
+        Record a task as PENDING and hand it to the pool
+
+        Args:
+            name: Registered task name
+            args: Positional task arguments
+            kwargs: Keyword task arguments
+            queue: Queue the task is routed to, reported to the task as its
+                delivery routing key
+
+        Returns:
+            str: Task id
+        """
+        task_id = str(uuid.uuid4())
+        db = SessionLocal()
+        try:
+            crud.create_local_task(
+                db, task_id, name, queue, kwargs.get("estimated_pages"), os.getpid()
+            )
+        finally:
+            db.close()
+        pool = self._get_pool()
+        try:
+            future = pool.submit(_run_task, task_id, name, args, kwargs, queue)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            future = pool.submit(_run_task, task_id, name, args, kwargs, queue)
+        future.add_done_callback(functools.partial(self._task_done, task_id, pool))
+        return task_id
+
+    def _task_done(
+        self, task_id: str, pool: ProcessPoolExecutor, future: Future
+    ) -> None:
+        if future.cancelled():
+            error: Optional[BaseException] = RuntimeError("Cancelled at shutdown")
+        else:
+            error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            # A pool process died (e.g. out of memory); the pool cannot be
+            # used again and every task it still held fails with this one
+            self._discard_pool(pool)
+            error = RuntimeError(f"Worker process died: {error}")
+        logger.error(f"Local task {task_id} failed outside the task: {error}")
+        celery_app.backend.mark_as_failure(task_id, error)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+executor = LocalExecutor(settings.LOCAL_WORKERS)
+
+
+class LocalScheduler(threading.Thread):
+    """Runs the beat schedule, and result cleanup, in this process"""
+
+    def __init__(self):
+        super().__init__(name="local-beat", daemon=True)
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        intervals = {
+            entry["task"]: float(entry["schedule"])
+            for entry in celery_app.conf.beat_schedule.values()
+        }
+        intervals["cleanup"] = CLEANUP_INTERVAL_SECONDS
+        # Like beat, the first run is one interval after startup
+        due = {
+            name: time.monotonic() + interval for name, interval in intervals.items()
+        }
+        while not self._stop_event.wait(1.0):
+            for name, interval in intervals.items():
+                now = time.monotonic()
+                if now < due[name]:
+                    continue
+                due[name] = now + interval
+                try:
+                    if name == "cleanup":
+                        celery_app.backend.cleanup()
+                    else:
+                        celery_app.tasks[name]()
+                except Exception as e:
+                    logger.error(f"Scheduled task {name} failed: {e}", exc_info=True)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_scheduler: Optional[LocalScheduler] = None
+_ingest_stop = threading.Event()
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    # At startup nothing belongs to this process yet; in a container a
+    # restarted server often gets the pid of the one it replaces
+    if pid is None or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def fail_orphaned_tasks() -> int:
+    """
+    Mark unfinished tasks of processes that have exited as failed
+
+    Returns:
+        int: Number of tasks marked
+    """
+    db = SessionLocal()
+    try:
+        tasks = crud.get_unfinished_local_tasks(db)
+    finally:
+        db.close()
+    orphaned = [task.task_id for task in tasks if not _pid_alive(task.owner_pid)]
+    for task_id in orphaned:
+        celery_app.backend.mark_as_failure(
+            task_id, RuntimeError("Interrupted: the server running it stopped")
+        )
+    if orphaned:
+        logger.warning(f"Marked {len(orphaned)} interrupted local tasks as failed")
+    return len(orphaned)
+
+
+def start() -> None:
+    """Prepare this process to run tasks; call once at API startup"""
+    global _scheduler
+    celery_app.loader.import_default_modules()
+    fail_orphaned_tasks()
+    _scheduler = LocalScheduler()
+    _scheduler.start()
+    if settings.INGEST_DIR:
+        from app.services.ingest import watch
+
+        # In this process, so ingested files go to this pool; a separate
+        # watcher process would start a pool of its own
+        threading.Thread(
+            target=watch,
+            args=(Path(settings.INGEST_DIR), _ingest_stop),
+            name="local-ingest",
+            daemon=True,
+        ).start()
+    logger.info(f"Local execution backend with {settings.LOCAL_WORKERS} workers")
+
+
+def stop() -> None:
+    if _scheduler is not None:
+        _scheduler.stop()
+    _ingest_stop.set()
+    executor.shutdown()
+
+
+def queue_lengths() -> Dict[str, int]:
+    """Pending tasks per queue"""
+    db = SessionLocal()
+    try:
+        counts = crud.count_unfinished_local_tasks(db)
+    finally:
+        db.close()
+    lengths = {name: 0 for name in all_queues()}
+    for (queue, status), count in counts.items():
+        if status == states.PENDING and queue in lengths:
+            lengths[queue] = count
+    return lengths
+
+
+def queue_consumers() -> Dict[str, List[str]]:
+    """Every pool process takes tasks from every queue"""
+    workers = [
+        f"local-{index}@{socket.gethostname()}"
+        for index in range(settings.LOCAL_WORKERS)
+    ]
+    return {name: list(workers) for name in all_queues()}
+
+
+def worker_activity() -> List[Dict[str, Any]]:
+    """The pool as one worker, with running and waiting task counts"""
+    db = SessionLocal()
+    try:
+        counts = crud.count_unfinished_local_tasks(db)
+    finally:
+        db.close()
+    active = sum(
+        count for (_, status), count in counts.items() if status != states.PENDING
+    )
+    reserved = sum(
+        count for (_, status), count in counts.items() if status == states.PENDING
+    )
+    return [
+        {
+            "name": f"local@{socket.gethostname()}",
+            "queues": all_queues(),
+            "active": active,
+            "reserved": reserved,
+        }
+    ]
+
+
+def worker_cpu() -> Dict[str, Dict[str, Any]]:
+    """The pool as one worker, with each process's configured CPU layout"""
+    from app.core.cpu import planned_cpu_info
+
+    return {
+        f"local@{socket.gethostname()}": {
+            "processes": [
+                planned_cpu_info(settings.WORKER_INDEX + index)
+                for index in range(settings.LOCAL_WORKERS)
+            ]
+        }
+    }
+
+
+def find_queued_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Queue, position and estimated_pages of a pending task"""
+    db = SessionLocal()
+    try:
+        task = crud.get_local_task(db, task_id)
+        if task is None or task.status != states.PENDING:
+            return None
+        return {
+            "queue": task.queue,
+            "position": crud.get_local_task_position(db, task),
+            "estimated_pages": task.estimated_pages,
+        }
+    finally:
+        db.close()
@@ -0,0 +1,66 @@
+import time
+import logging
+from typing import Any, List, Optional, Union, get_args, get_origin
+
+from PIL import Image
+from pydantic import BaseModel
+from marker.schema.blocks import Block
+from marker.services import BaseService
+
+from app.core.config import settings
+
+logger = logging.getLogger("pdf2md.mock_llm")
+
+# marker's LLM processors leave a block unchanged on this answer
+NO_CHANGES = "No corrections needed."
+
+
+def _placeholder(annotation: Any) -> Any:
+    """Neutral value of a response schema field type"""
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        return []
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _placeholder(args[0]) if args else None
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return {
+                name: _placeholder(field.annotation)
+                for name, field in annotation.model_fields.items()
+            }
+        if issubclass(annotation, bool):
+            return False
+        if issubclass(annotation, (int, float)):
+            return 0
+        if issubclass(annotation, str):
+            return NO_CHANGES
+    return None
+
+
+class MockLLMService(BaseService):
+    """
+    Stand-in for marker's LLM services used when MOCK_LLM is enabled.
+
+    Sleeps for the configured latency and answers every prompt with neutral
+    values for the requested schema ("no corrections" for text fields, empty
+    lists), so use_llm conversions and the LLM response cache can be
+    exercised without API keys or token spend.
+    """
+
+    mock_latency: float = settings.MOCK_LLM_LATENCY
+    mock_model_name: str = "mock"
+
+    def __call__(
+        self,
+        prompt: str,
+        image: Union[Image.Image, List[Image.Image], None],
+        block: Optional[Block],
+        response_schema: type[BaseModel],
+        max_retries: Optional[int] = None,
+        timeout: Optional[int] = None,
+    ):
+        time.sleep(self.mock_latency)
+        if block is not None:
+            block.update_metadata(llm_request_count=1, llm_tokens_used=len(prompt) // 4)
+        return _placeholder(response_schema)
@@ -0,0 +1,132 @@
+import re
+from typing import List, Optional, Tuple
+
+from app.services.text_layer import PAGE_SEPARATOR
+
+# Marker (and the text-layer engine) start each page of paginated output
+# with "\n\n{page_id}" followed by PAGE_SEPARATOR
+PAGE_BREAK = re.compile(r"\n*\{(\d+)\}" + re.escape(PAGE_SEPARATOR) + r"\n*")
+
+
+def split_pages(text: str) -> List[Tuple[int, str]]:
+    """
+    Split paginated converter output into pages
+
+    Args:
+        text: Markdown rendered with paginate_output
+
+    Returns:
+        List[Tuple[int, str]]: (page id, Markdown) per page, in order; the
+            whole text as page 0 if it has no page breaks
+    """
+    parts = PAGE_BREAK.split(text)
+    if len(parts) == 1:
+        return [(0, text)]
+    # parts: [text before the first break, id, page, id, page, ...]
+    pages = [(int(parts[i]), parts[i + 1]) for i in range(1, len(parts), 2)]
+    if parts[0].strip():
+        pages[0] = (pages[0][0], parts[0] + "\n\n" + pages[0][1])
+    return pages
+
+
+def locate_pages(text: str, pages: List[Tuple[int, str]]) -> Optional[List[List[int]]]:
+    """
+    Page index of unpaginated Markdown, from a paginated rendering of the
+    same document
+
+    Marker renders each page's blocks alike either way and only joins pages
+    differently (a paragraph continuing on the next page is joined with a
+    space, or without its trailing hyphen), so each page's content appears
+    in the text, in order.
+
+    Args:
+        text: Markdown rendered without paginate_output
+        pages: (page id, Markdown) per page of the paginated rendering, from
+            split_pages
+
+    Returns:
+        Optional[List[List[int]]]: [start, end) character offsets per page,
+            or None if a page's content is not found in the text
+    """
+    spans = []
+    position = 0
+    for _, page_text in pages:
+        content = page_text.strip()
+        start = text.find(content, position) if content else position
+        if start < 0:
+            return None
+        spans.append([start, start + len(content)])
+        position = start + len(content)
+    return spans
+
+
+def page_spans(text: str, paginated: Optional[str]) -> Optional[List[List[int]]]:
+    """
+    Page index of a conversion's Markdown
+
+    Args:
+        text: The Markdown as stored
+        paginated: Paginated rendering of the same document, if text was
+            rendered without page breaks
+
+    Returns:
+        Optional[List[List[int]]]: [start, end) character offsets per page,
+            or None if the pages cannot be told apart
+    """
+    if paginated is None:
+        return find_page_spans(text)
+    return locate_pages(text, split_pages(paginated))
+
+
+def find_page_spans(text: str) -> Optional[List[List[int]]]:
+    """
+    Page index of Markdown that has page breaks
+
+    Args:
+        text: Stored Markdown
+
+    Returns:
+        Optional[List[List[int]]]: [start, end) character offsets per page,
+            or None if the text has no page breaks
+    """
+    breaks = list(PAGE_BREAK.finditer(text))
+    if not breaks:
+        return None
+    spans = []
+    for i, match in enumerate(breaks):
+        end = breaks[i + 1].start() if i + 1 < len(breaks) else len(text)
+        spans.append([match.end(), end])
+    if text[: breaks[0].start()].strip():
+        spans[0][0] = 0
+    return spans
+
+
+def parse_page_range(value: str, page_count: int) -> Tuple[int, int]:
+    """
+    Parse a 1-based, inclusive page range such as "40-45", "7" or "40-"
+
+    Args:
+        value: The range
+        page_count: Pages in the document
+
+    Returns:
+        Tuple[int, int]: First and last page, 1-based and inclusive
+
+    Raises:
+        ValueError: Malformed range, or outside the document
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*(?:(-)\s*(\d*)\s*)?", value)
+    if not match:
+        raise ValueError(f"Invalid page range '{value}'; expected e.g. 40-45")
+    first = int(match.group(1))
+    if match.group(3):
+        last = int(match.group(3))
+    elif match.group(2):
+        last = page_count
+    else:
+        last = first
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid page range '{value}'")
+    if first > page_count:
+        raise ValueError(f"Page {first} is beyond the last page ({page_count})")
+    return first, min(last, page_count)
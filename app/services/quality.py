@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+QUALITY_DRAFT = "draft"
+QUALITY_STANDARD = "standard"
+QUALITY_HIGH = "high"
+
+
+@dataclass(frozen=True)
+class QualityProfile:
+    """Bundle of marker settings trading accuracy for speed"""
+
+    name: str
+    description: str
+    config: Dict[str, Any] = field(default_factory=dict)  # marker config overrides
+    disabled_processors: Tuple[str, ...] = ()  # marker processor class names
+    fast_path: bool = True  # Whether the text-layer engine may be used
+
+
+QUALITY_PROFILES: Dict[str, QualityProfile] = {
+    QUALITY_DRAFT: QualityProfile(
+        name=QUALITY_DRAFT,
+        description="Fastest: lower-resolution page images, no table "
+        "structure or equation recognition, larger batches",
+        config={
+            "lowres_image_dpi": 72,
+            "highres_image_dpi": 144,
+            "layout_batch_size": 8,
+            "detection_batch_size": 8,
+            "recognition_batch_size": 64,
+        },
+        disabled_processors=("TableProcessor", "EquationProcessor"),
+    ),
+    QUALITY_STANDARD: QualityProfile(
+        name=QUALITY_STANDARD,
+        description="marker defaults",
+    ),
+    QUALITY_HIGH: QualityProfile(
+        name=QUALITY_HIGH,
+        description="Most accurate: higher-resolution OCR, inline math "
+        "recognition, always the full model pipeline",
+        config={
+            "highres_image_dpi": 288,
+            "texify_inline_spans": True,
+        },
+        fast_path=False,
+    ),
+}
+
+
+def get_quality_profile(name: str) -> QualityProfile:
+    """
+    Look up a quality profile by name
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    try:
+        return QUALITY_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown quality profile '{name}'. "
+            f"Available: {', '.join(QUALITY_PROFILES)}"
+        )
+
+
+def profile_processors(
+    profile: QualityProfile, default_processors
+) -> Optional[List[str]]:
+    """
+    marker processor list for a profile
+
+    Args:
+        profile: The quality profile
+        default_processors: PdfConverter.default_processors
+
+    Returns:
+        Optional[List[str]]: Import paths of the processors to run, or None
+            to keep marker's defaults
+    """
+    if not profile.disabled_processors:
+        return None
+    return [
+        f"{cls.__module__}.{cls.__name__}"
+        for cls in default_processors
+        if cls.__name__ not in profile.disabled_processors
+    ]
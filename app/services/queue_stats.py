@@ -0,0 +1,313 @@
+import json
+import time
+import base64
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache, cached
+from celery.result import AsyncResult
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db import crud
+from app.services.dispatch import local_execution
+from app.services.routing import all_queues
+
+logger = logging.getLogger("pdf2md.queue_stats")
+
+# Broker and worker lookups are round trips (inspect is a broadcast with a
+# timeout), so keep them off the hot path of every upload.
+_queue_length_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.QUEUE_STATS_TTL)
+_worker_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.WORKER_STATS_TTL)
+_throughput_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.QUEUE_STATS_TTL)
+_worker_activity_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.WORKER_ACTIVITY_TTL)
+_worker_cpu_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.WORKER_STATS_TTL)
+
+
+@cached(_queue_length_cache, key=lambda: "queues")
+def get_queue_lengths() -> Dict[str, int]:
+    """
+    Number of messages waiting in each conversion queue on the broker
+
+    Returns:
+        Dict[str, int]: Queue name to message count
+    """
+    if local_execution():
+        from app.services import local_backend
+
+        return local_backend.queue_lengths()
+    lengths: Dict[str, int] = {}
+    with celery_app.connection_or_acquire() as conn:
+        channel = conn.default_channel
+        for name in all_queues():
+            try:
+                _, message_count, _ = channel.queue_declare(queue=name, passive=True)
+                lengths[name] = message_count
+            except Exception:
+                # Redis drops empty lists, so a passive declare of an idle
+                # queue fails rather than reporting zero
+                lengths[name] = 0
+    return lengths
+
+
+@cached(_worker_cache, key=lambda: "workers")
+def get_queue_consumers() -> Optional[Dict[str, List[str]]]:
+    """
+    Workers currently consuming each queue, from Celery inspect
+
+    Returns:
+        Optional[Dict[str, List[str]]]: Queue name to worker hostnames, or
+            None if no worker replied
+    """
+    if local_execution():
+        from app.services import local_backend
+
+        return local_backend.queue_consumers()
+    try:
+        replies = celery_app.control.inspect(
+            timeout=settings.INSPECT_TIMEOUT
+        ).active_queues()
+    except Exception as e:
+        logger.warning(f"Could not inspect worker queues: {e}")
+        return None
+    if not replies:
+        return None
+    consumers: Dict[str, List[str]] = {}
+    for worker, queues in replies.items():
+        for queue in queues or []:
+            consumers.setdefault(queue["name"], []).append(worker)
+    return consumers
+
+
+@cached(_throughput_cache, key=lambda db: "throughput")
+def get_throughput(db: Session) -> Dict[str, float]:
+    """
+    Rolling per-worker throughput from recently completed conversions
+
+    Falls back to DEFAULT_PAGES_PER_SECOND / DEFAULT_PAGES_PER_JOB until
+    enough conversions have been recorded.
+
+    Returns:
+        Dict[str, float]: pages_per_second (per worker), pages_per_job and
+            the number of samples used
+    """
+    jobs, pages, seconds = crud.get_recent_throughput(
+        db, limit=settings.THROUGHPUT_WINDOW
+    )
+    if jobs < settings.THROUGHPUT_MIN_SAMPLES or seconds <= 0:
+        return {
+            "pages_per_second": settings.DEFAULT_PAGES_PER_SECOND,
+            "pages_per_job": settings.DEFAULT_PAGES_PER_JOB,
+            "samples": jobs,
+        }
+    return {
+        "pages_per_second": pages / seconds,
+        "pages_per_job": pages / jobs,
+        "samples": jobs,
+    }
+
+
+def estimate_queue_wait(db: Session, queue: str) -> float:
+    """
+    Estimate seconds until a job enqueued now on `queue` would start
+
+    Args:
+        db: Database session
+        queue: Target queue name
+
+    Returns:
+        float: Estimated wait in seconds
+    """
+    depth = get_queue_lengths().get(queue, 0)
+    if not depth:
+        return 0.0
+    throughput = get_throughput(db)
+    consumers = get_queue_consumers()
+    # Without an inspect reply, assume a single worker rather than none so a
+    # slow control channel does not shut admission completely
+    workers = len(consumers.get(queue, [])) if consumers else 1
+    backlog_pages = depth * throughput["pages_per_job"]
+    return backlog_pages / (throughput["pages_per_second"] * max(workers, 1))
+
+
+@cached(_worker_activity_cache, key=lambda: "activity")
+def get_worker_activity() -> Optional[List[Dict[str, Any]]]:
+    """
+    Active and reserved task counts per worker, from Celery inspect
+
+    Solo-pool workers only answer between tasks, so a busy worker can be
+    missing from the reply.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: One entry per worker (name, queues,
+            active, reserved), or None if no worker replied
+    """
+    if local_execution():
+        from app.services import local_backend
+
+        return local_backend.worker_activity()
+    try:
+        inspect = celery_app.control.inspect(timeout=settings.INSPECT_TIMEOUT)
+        active = inspect.active() or {}
+        reserved = inspect.reserved() or {}
+        active_queues = inspect.active_queues() or {}
+    except Exception as e:
+        logger.warning(f"Could not inspect workers: {e}")
+        return None
+    names = sorted(set(active) | set(reserved) | set(active_queues))
+    if not names:
+        return None
+    return [
+        {
+            "name": name,
+            "queues": [queue["name"] for queue in active_queues.get(name) or []],
+            "active": len(active.get(name) or []),
+            "reserved": len(reserved.get(name) or []),
+        }
+        for name in names
+    ]
+
+
+@cached(_worker_cpu_cache, key=lambda: "cpu")
+def get_worker_cpu() -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    CPU and thread configuration per worker, from the cpu_config inspect
+    command of app.celery_app
+
+    Returns:
+        Optional[Dict[str, Dict[str, Any]]]: Worker name to its layout (see
+            app.core.cpu.cpu_info), or None if no worker replied
+    """
+    if local_execution():
+        from app.services import local_backend
+
+        return local_backend.worker_cpu()
+    try:
+        replies = celery_app.control.broadcast(
+            "cpu_config", reply=True, timeout=settings.INSPECT_TIMEOUT
+        )
+    except Exception as e:
+        logger.warning(f"Could not inspect worker CPU configuration: {e}")
+        return None
+    workers = {name: info for reply in replies or [] for name, info in reply.items()}
+    return workers or None
+
+
+def _message_estimated_pages(message: Dict[str, Any]) -> Optional[int]:
+    """Read the estimated_pages kwarg from a raw task message, if present"""
+    try:
+        body = message["body"]
+        if message.get("properties", {}).get("body_encoding") == "base64":
+            body = base64.b64decode(body)
+        _, kwargs, _ = json.loads(body)
+        return kwargs.get("estimated_pages")
+    except Exception:
+        return None
+
+
+def find_queued_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Locate a task message waiting on the broker
+
+    Only supported on Redis, where a queue is a list that can be scanned; the
+    scan is capped at QUEUE_SCAN_LIMIT messages per queue.
+
+    Args:
+        task_id: Celery task id
+
+    Returns:
+        Optional[Dict[str, Any]]: queue, position (0 = next to run) and
+            estimated_pages, or None if the task is not queued
+    """
+    if local_execution():
+        from app.services import local_backend
+
+        return local_backend.find_queued_task(task_id)
+    with celery_app.connection_or_acquire() as conn:
+        client = getattr(conn.default_channel, "client", None)
+        if client is None:
+            return None
+        for name in all_queues():
+            # Workers pop from the right, so the last element runs next
+            messages = client.lrange(name, -settings.QUEUE_SCAN_LIMIT, -1)
+            for position, raw in enumerate(reversed(messages)):
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                if message.get("headers", {}).get("id") == task_id:
+                    return {
+                        "queue": name,
+                        "position": position,
+                        "estimated_pages": _message_estimated_pages(message),
+                    }
+    return None
+
+
+def _to_datetime(timestamp: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+def estimate_task_completion(db: Session, task_id: str) -> Dict[str, Any]:
+    """
+    Estimate when a task will start and finish
+
+    Running tasks are timed from the start time they publish with their
+    STARTED state; queued tasks from their position in the queue and the
+    rolling throughput model.
+
+    Args:
+        db: Database session
+        task_id: Celery task id
+
+    Returns:
+        Dict[str, Any]: task_id, state, queue, position, estimated_start and
+            estimated_completion (None where unknown)
+    """
+    result = AsyncResult(task_id, app=celery_app)
+    eta: Dict[str, Any] = {
+        "task_id": task_id,
+        "state": result.state,
+        "queue": None,
+        "position": None,
+        "estimated_start": None,
+        "estimated_completion": None,
+    }
+    if result.ready():
+        return eta
+
+    throughput = get_throughput(db)
+    pages_per_second = throughput["pages_per_second"]
+    now = time.time()
+
+    info = result.info
+    if result.state == "STARTED" and isinstance(info, dict):
+        pages = info.get("estimated_pages") or throughput["pages_per_job"]
+        started_at = info.get("started_at") or now
+        eta["queue"] = info.get("queue")
+        eta["estimated_start"] = _to_datetime(started_at)
+        eta["estimated_completion"] = _to_datetime(
+            max(now, started_at + pages / pages_per_second)
+        )
+        return eta
+
+    queued = find_queued_task(task_id)
+    if not queued:
+        return eta
+    consumers = get_queue_consumers()
+    workers = len(consumers.get(queued["queue"], [])) if consumers else 1
+    ahead_seconds = (
+        queued["position"]
+        * throughput["pages_per_job"]
+        / (pages_per_second * max(workers, 1))
+    )
+    pages = queued["estimated_pages"] or throughput["pages_per_job"]
+    eta["queue"] = queued["queue"]
+    eta["position"] = queued["position"]
+    eta["estimated_start"] = _to_datetime(now + ahead_seconds)
+    eta["estimated_completion"] = _to_datetime(
+        now + ahead_seconds + pages / pages_per_second
+    )
+    return eta
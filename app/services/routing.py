@@ -0,0 +1,89 @@
+import logging
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.estimator import PdfEstimate
+
+logger = logging.getLogger("pdf2md.routing")
+
+PROFILE_SMALL = "small"
+PROFILE_FAST = "fast"
+PROFILE_OCR = "ocr"
+PROFILE_LLM = "llm"
+PROFILE_LARGE = "large"
+PROFILE_PREWARM = "prewarm"  # Watched-folder ingestion only
+
+PROFILES = (
+    PROFILE_SMALL,
+    PROFILE_FAST,
+    PROFILE_OCR,
+    PROFILE_LLM,
+    PROFILE_LARGE,
+    PROFILE_PREWARM,
+)
+
+
+def select_profile(
+    use_llm: bool,
+    force_ocr: bool,
+    file_size: int,
+    estimate: Optional[PdfEstimate] = None,
+) -> str:
+    """
+    Pick the conversion profile for a job
+
+    Large documents take precedence because their runtime dominates whatever
+    options they were submitted with; then LLM and OCR jobs, which are slow
+    per page. The remaining text-layer jobs are split into size classes by
+    page count, so short documents never queue behind long ones. Each
+    class has its own queue, and workers consuming several queues take from
+    them in turn, so no class is starved.
+
+    Args:
+        use_llm: Whether LLM enhancement will be used
+        force_ocr: Whether OCR is forced on every page
+        file_size: Size of the uploaded PDF in bytes
+        estimate: Page count / text layer estimate, if the PDF could be read
+
+    Returns:
+        str: One of PROFILES
+    """
+    if file_size > settings.LARGE_DOCUMENT_MB * 1024 * 1024:
+        return PROFILE_LARGE
+    if estimate and estimate.page_count > settings.LARGE_DOCUMENT_PAGES:
+        return PROFILE_LARGE
+    if use_llm:
+        return PROFILE_LLM
+    if force_ocr or (estimate and not estimate.has_text_layer):
+        return PROFILE_OCR
+    if estimate and estimate.page_count <= settings.SMALL_JOB_MAX_PAGES:
+        return PROFILE_SMALL
+    return PROFILE_FAST
+
+
+def queue_for_profile(profile: str) -> str:
+    """
+    Map a profile to its Celery queue name
+
+    With TASK_ROUTING_ENABLED off every profile goes to the default queue.
+    """
+    if not settings.TASK_ROUTING_ENABLED:
+        return default_queue()
+    queue = settings.CONVERSION_QUEUES.get(profile)
+    if not queue:
+        logger.warning(f"No queue configured for profile '{profile}'; using default")
+        return default_queue()
+    return queue
+
+
+def default_queue() -> str:
+    return settings.CONVERSION_QUEUES.get(PROFILE_FAST, "celery")
+
+
+def all_queues() -> List[str]:
+    """All distinct conversion queue names, default queue first"""
+    queues = [default_queue()]
+    for name in settings.CONVERSION_QUEUES.values():
+        if name not in queues:
+            queues.append(name)
+    return queues
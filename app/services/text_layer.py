@@ -0,0 +1,363 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from pdftext.extraction import dictionary_output
+from marker.renderers.markdown import MarkdownOutput
+
+from app.core.config import settings
+from app.services.estimator import MIN_CHARS_PER_PAGE
+
+ENGINE_FULL = "full"
+ENGINE_FAST = "fast"
+
+PAGE_TEXT = "text"  # Usable embedded text
+PAGE_GARBLED = "garbled"  # Text layer present but broken (bad encoding, CID junk)
+PAGE_IMAGE = "image"  # Little text and a page-sized image: a scan
+PAGE_BLANK = "blank"  # Little or no text and no images; nothing to OCR
+# Classes whose embedded text is used as is
+TEXT_LAYER_KINDS = (PAGE_TEXT, PAGE_BLANK)
+
+# Separator marker's markdown renderer uses between pages when paginating
+PAGE_SEPARATOR = "-" * 48
+# Metadata key under which converters also return a paginated rendering of
+# unpaginated output, to locate its pages (see app.services.pages)
+PAGINATED_MARKDOWN = "paginated_markdown"
+BULLET_RE = re.compile(r"^[•◦▪●–\*\-]\s+")
+
+
+def _garbled_ratio(text: str) -> float:
+    """Share of characters that indicate a broken text layer"""
+    if not text:
+        return 0.0
+    bad = sum(
+        1
+        for char in text
+        if char == "�"
+        or (unicodedata.category(char) in ("Co", "Cc") and char not in "\r\n\t")
+    )
+    return bad / len(text)
+
+
+def _image_coverage(page: pdfium.PdfPage) -> Tuple[float, int]:
+    """
+    Fraction of the page area covered by image objects (capped at 1), and
+    the number of image objects
+    """
+    width, height = page.get_size()
+    page_area = width * height or 1
+    covered = 0.0
+    count = 0
+    for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)):
+        # get_pos() was renamed get_bounds() in pypdfium2 5
+        get_bounds = getattr(obj, "get_bounds", None) or obj.get_pos
+        left, bottom, right, top = get_bounds()
+        covered += max(0.0, right - left) * max(0.0, top - bottom)
+        count += 1
+    return min(covered / page_area, 1.0), count
+
+
+def classify_pages(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Classify every page by the quality of its text layer
+
+    Uses pdfium only (no models), so it is cheap enough to run on every job.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        List[Dict[str, Any]]: Per page: page (0-based), kind (PAGE_TEXT,
+            PAGE_GARBLED, PAGE_IMAGE or PAGE_BLANK), chars, garbled_ratio,
+            image_coverage, images (number of image objects)
+    """
+    pages = []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            try:
+                text_page = page.get_textpage()
+                try:
+                    text = text_page.get_text_range()
+                finally:
+                    text_page.close()
+                chars = len(text.strip())
+                garbled = _garbled_ratio(text)
+                coverage, images = _image_coverage(page)
+            finally:
+                page.close()
+
+            if chars < MIN_CHARS_PER_PAGE:
+                if coverage >= settings.TEXT_LAYER_SCAN_MIN_IMAGE_COVERAGE:
+                    kind = PAGE_IMAGE
+                elif images:
+                    # A figure with a short caption; marker extracts the image
+                    kind = PAGE_TEXT
+                else:
+                    kind = PAGE_BLANK
+            elif garbled > settings.TEXT_LAYER_MAX_GARBLED_RATIO:
+                kind = PAGE_GARBLED
+            else:
+                kind = PAGE_TEXT
+            pages.append(
+                {
+                    "page": index,
+                    "kind": kind,
+                    "chars": chars,
+                    "garbled_ratio": round(garbled, 4),
+                    "image_coverage": round(coverage, 4),
+                    "images": images,
+                }
+            )
+    finally:
+        pdf.close()
+    return pages
+
+
+def fast_path_decision(
+    pages: List[Dict[str, Any]], extract_images: bool = False
+) -> Tuple[bool, str]:
+    """
+    Decide whether the text-layer engine can convert this document
+
+    Every page must have a clean text layer or be blank, at least one must
+    have text, and no page may be dominated by images (scans with an OCR
+    layer belong to the full pipeline). The
+    text-layer engine extracts no images, so when they are requested no page
+    may contain any.
+
+    Args:
+        pages: Output of classify_pages
+        extract_images: Whether the conversion must include images
+
+    Returns:
+        Tuple[bool, str]: (eligible, reason)
+    """
+    if not pages:
+        return False, "document has no pages"
+    for page in pages:
+        if page["kind"] not in TEXT_LAYER_KINDS:
+            return False, f"page {page['page'] + 1} is {page['kind']}"
+        if page["image_coverage"] > settings.FAST_PATH_MAX_IMAGE_COVERAGE:
+            return False, f"page {page['page'] + 1} is image-heavy"
+        if extract_images and page["images"]:
+            return False, f"page {page['page'] + 1} has images to extract"
+    # Text drawn as outlines leaves every page blank; marker may still read it
+    if all(page["kind"] == PAGE_BLANK for page in pages):
+        return False, "no page has text"
+    return True, "clean text layer"
+
+
+def pages_needing_ocr(pages: List[Dict[str, Any]]) -> List[int]:
+    """0-based ids of the pages whose text layer cannot be used"""
+    return [page["page"] for page in pages if page["kind"] not in TEXT_LAYER_KINDS]
+
+
+def page_decisions(
+    pages: List[Dict[str, Any]],
+    ocr_pages: Optional[List[int]] = None,
+    page_stats: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Per-page OCR decisions, for storing alongside the result
+
+    Args:
+        pages: Output of classify_pages
+        ocr_pages: Pages sent to OCR (see pages_needing_ocr)
+        page_stats: marker's page_stats, to record the method actually used
+
+    Returns:
+        List[Dict[str, Any]]: Per page: page, kind, ocr (requested) and
+            method (text extraction method marker reported, if known)
+    """
+    selected = set(ocr_pages or [])
+    methods = {
+        stat.get("page_id"): stat.get("text_extraction_method")
+        for stat in page_stats or []
+    }
+    return [
+        {
+            "page": page["page"],
+            "kind": page["kind"],
+            "ocr": page["page"] in selected,
+            "method": methods.get(page["page"]),
+        }
+        for page in pages
+    ]
+
+
+class TextLayerConverter:
+    """
+    Converts born-digital PDFs straight from their embedded text.
+
+    Headings come from font sizes larger than the body text, simple tables
+    from runs of lines split into the same number of cells by wide gaps, and
+    everything else from pdftext's blocks as paragraphs. No models are used.
+    Returns the same MarkdownOutput shape as marker so convert_pdf_task
+    handles both engines alike.
+    """
+
+    def __init__(self, paginate_output: bool = False):
+        self.paginate_output = paginate_output
+
+    def __call__(self, filepath: str) -> MarkdownOutput:
+        pages = dictionary_output(filepath)
+        heading_levels = self._font_levels(pages)
+
+        page_markdown = []
+        page_stats = []
+        for page in pages:
+            markdown, counts = self._render_page(page, heading_levels)
+            page_markdown.append(markdown)
+            page_stats.append(
+                {
+                    "page_id": page.get("page", len(page_stats)),
+                    "text_extraction_method": "pdftext",
+                    "block_counts": list(counts.items()),
+                }
+            )
+
+        paginated = "".join(
+            f"\n\n{{{index}}}{PAGE_SEPARATOR}\n\n{text}"
+            for index, text in enumerate(page_markdown)
+        )
+        metadata: Dict[str, Any] = {"table_of_contents": [], "page_stats": page_stats}
+        if self.paginate_output:
+            markdown = paginated
+        else:
+            markdown = "\n\n".join(text for text in page_markdown if text)
+            metadata[PAGINATED_MARKDOWN] = paginated
+
+        return MarkdownOutput(markdown=markdown, images={}, metadata=metadata)
+
+    @staticmethod
+    def _line_text(line: Dict[str, Any]) -> str:
+        return "".join(span["text"] for span in line["spans"]).strip()
+
+    @staticmethod
+    def _line_size(line: Dict[str, Any]) -> float:
+        return max((span["font"]["size"] or 0) for span in line["spans"])
+
+    @staticmethod
+    def _line_cells(line: Dict[str, Any]) -> List[str]:
+        cells, current, previous_right = [], "", None
+        for span in line["spans"]:
+            left = span["bbox"][0]
+            if (
+                previous_right is not None
+                and left - previous_right > settings.FAST_PATH_TABLE_CELL_GAP
+            ):
+                cells.append(current.strip())
+                current = ""
+            current += span["text"]
+            previous_right = span["bbox"][2]
+        cells.append(current.strip())
+        return [cell for cell in cells if cell]
+
+    def _font_levels(self, pages: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Heading level per (rounded) font size larger than the body text"""
+        sizes: Counter = Counter()
+        for page in pages:
+            for block in page["blocks"]:
+                for line in block["lines"]:
+                    for span in line["spans"]:
+                        if span["font"]["size"]:
+                            sizes[round(span["font"]["size"])] += len(span["text"])
+        if not sizes:
+            return {}
+        body_size = sizes.most_common(1)[0][0]
+        larger = sorted(
+            (size for size in sizes if size >= body_size * 1.15), reverse=True
+        )
+        return {size: level for level, size in enumerate(larger[:3], 1)}
+
+    def _heading_level(self, entry: Dict[str, Any], heading_levels) -> Optional[int]:
+        if len(entry["text"]) > 120:
+            return None
+        return heading_levels.get(round(entry["size"]))
+
+    def _render_page(
+        self, page: Dict[str, Any], heading_levels: Dict[int, int]
+    ) -> Tuple[str, Counter]:
+        entries = []
+        for block_index, block in enumerate(page["blocks"]):
+            for line in block["lines"]:
+                if not line["spans"]:
+                    continue
+                text = self._line_text(line)
+                if not text:
+                    continue
+                entries.append(
+                    {
+                        "block": block_index,
+                        "text": text,
+                        "size": self._line_size(line),
+                        "cells": self._line_cells(line),
+                    }
+                )
+
+        parts: List[str] = []
+        counts: Counter = Counter()
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+
+            columns = len(entry["cells"])
+            if columns >= 2:
+                j = i
+                while j < len(entries) and len(entries[j]["cells"]) == columns:
+                    j += 1
+                if j - i >= settings.FAST_PATH_MIN_TABLE_ROWS:
+                    parts.append(self._table([e["cells"] for e in entries[i:j]]))
+                    counts["Table"] += 1
+                    i = j
+                    continue
+
+            level = self._heading_level(entry, heading_levels)
+            if level:
+                parts.append(f"{'#' * level} {entry['text']}")
+                counts["SectionHeader"] += 1
+                i += 1
+                continue
+
+            lines = [entry["text"]]
+            j = i + 1
+            while (
+                j < len(entries)
+                and entries[j]["block"] == entry["block"]
+                and not self._heading_level(entries[j], heading_levels)
+                and not BULLET_RE.match(entries[j]["text"])
+            ):
+                lines.append(entries[j]["text"])
+                j += 1
+            parts.append(self._paragraph(lines))
+            counts["ListItem" if BULLET_RE.match(lines[0]) else "Text"] += 1
+            i = j
+
+        return "\n\n".join(parts), counts
+
+    @staticmethod
+    def _paragraph(lines: List[str]) -> str:
+        text = ""
+        for line in lines:
+            if text.endswith("-") and line[:1].islower():
+                text = text[:-1] + line  # Re-join hyphenated words
+            else:
+                text = f"{text} {line}" if text else line
+        if BULLET_RE.match(text):
+            text = BULLET_RE.sub("- ", text, count=1)
+        return text
+
+    @staticmethod
+    def _table(rows: List[List[str]]) -> str:
+        def row(cells: List[str]) -> str:
+            return "| " + " | ".join(c.replace("|", "\\|") for c in cells) + " |"
+
+        header, body = rows[0], rows[1:]
+        lines = [row(header), "|" + "---|" * len(header)]
+        lines.extend(row(cells) for cells in body)
+        return "\n".join(lines)
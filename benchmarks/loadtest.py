@@ -0,0 +1,317 @@
+"""
+HTTP load generator for the API.
+
+By default the API runs in this process with local stand-ins: Celery's
+in-memory broker and result backend, in-process worker threads, and the fake
+converter (FAKE_CONVERTER) with configurable latency and output size. Redis
+and the marker models are not needed, so API-side changes can be measured on
+their own. Pass --url to load an already running deployment instead.
+
+--backend local replaces the broker and worker threads with the embedded
+execution backend (EXECUTION_BACKEND=local: a process pool in the API
+process, task state in the database); run the same load with both backends
+to compare them.
+
+Requests are issued open-loop at the target rate (a slow server does not slow
+the generator down) across /convert, /tasks/{id}, /view/{hash} and
+/queue/status, mixed by --mix weights. Throughput and p50/p95/p99 latency are
+reported per endpoint.
+
+Usage:
+    python benchmarks/loadtest.py --rps 50 --duration 30
+    python benchmarks/loadtest.py --rps 20 --latency 2 --workers 4 --hit-ratio 0.5
+    python benchmarks/loadtest.py --url http://localhost:8000 --rps 10
+    python benchmarks/loadtest.py --rps 20 --workers 2 --backend local
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List
+
+from scratch_db import use_scratch_database
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# The local backend's pool processes import this module, not run main()
+use_scratch_database()
+
+ENDPOINTS = ("convert", "tasks", "view", "queue_status")
+
+
+def configure_environment(work_dir: Path, args) -> None:
+    """Select the in-memory broker and fake converter; before importing app"""
+    storage = work_dir / "storage"
+    os.environ.update(
+        {
+            "CELERY_BROKER_URL": "memory://",
+            "CELERY_RESULT_BACKEND": "cache+memory://",
+            "STORAGE_PATH": str(storage),
+            "TEMP_PATH": str(storage / "temp"),
+            "UPLOAD_PATH": str(storage / "uploads"),
+            "FAKE_CONVERTER": "true",
+            "FAKE_CONVERTER_LATENCY": str(args.latency),
+            "FAKE_CONVERTER_OUTPUT_KB": str(args.output_kb),
+            "ADMISSION_ENABLED": "true" if args.admission else "false",
+            "INSPECT_TIMEOUT": "0.2",
+            "EXECUTION_BACKEND": args.backend,
+            "LOCAL_WORKERS": str(args.workers),
+        }
+    )
+    for path in ("temp", "uploads"):
+        (storage / path).mkdir(parents=True, exist_ok=True)
+    use_scratch_database(f"sqlite:///{work_dir / 'loadtest.db'}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_stack(stack: ExitStack, workers: int, backend: str) -> str:
+    """Start uvicorn and Celery worker threads (or the local pool) in this process"""
+    import uvicorn
+    from celery.contrib.testing.worker import start_worker
+    from app.celery_app import celery_app
+    from app.main import app
+
+    # The local backend's pool is started with the API
+    for _ in range(workers if backend == "celery" else 0):
+        stack.enter_context(
+            start_worker(
+                celery_app,
+                pool="solo",
+                perform_ping_check=False,
+                loglevel="WARNING",
+                shutdown_timeout=30,
+            )
+        )
+
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    stack.callback(stop)
+    return f"http://127.0.0.1:{port}"
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, pdfs: List[bytes], hit_ratio: float, seed: int):
+        self.base_url = base_url
+        self.pdfs = pdfs
+        self.hit_ratio = hit_ratio
+        self.rng = random.Random(seed)
+        self.next_pdf = 0
+        self.uploaded: List[int] = []
+        self.task_ids: List[str] = []
+        self.hashes: List[str] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.failures: Counter = Counter()
+
+    def _pick_pdf(self) -> int:
+        if self.uploaded and self.rng.random() < self.hit_ratio:
+            return self.rng.choice(self.uploaded)
+        index = self.next_pdf % len(self.pdfs)
+        self.next_pdf += 1
+        return index
+
+    async def fire(self, client, endpoint: str) -> None:
+        # Endpoints that need an id fall back to /queue/status until one exists
+        if endpoint == "tasks" and not self.task_ids:
+            endpoint = "queue_status"
+        if endpoint == "view" and not self.hashes:
+            endpoint = "queue_status"
+
+        start = time.perf_counter()
+        try:
+            if endpoint == "convert":
+                index = self._pick_pdf()
+                response = await client.post(
+                    "/convert",
+                    files={
+                        "file": (
+                            f"load-{index}.pdf",
+                            self.pdfs[index],
+                            "application/pdf",
+                        )
+                    },
+                )
+                self.uploaded.append(index)
+                body = response.json() if response.content else {}
+                if response.status_code == 202 and body.get("task_id"):
+                    self.task_ids.append(body["task_id"])
+                elif response.status_code == 200 and body.get("file_hash"):
+                    self.hashes.append(body["file_hash"])
+            elif endpoint == "tasks":
+                task_id = self.rng.choice(self.task_ids)
+                response = await client.get(f"/tasks/{task_id}")
+                if response.status_code == 200:
+                    file_hash = response.json().get("file_hash")
+                    if file_hash:
+                        self.hashes.append(file_hash)
+                    if task_id in self.task_ids:
+                        self.task_ids.remove(task_id)
+            elif endpoint == "view":
+                response = await client.get(f"/view/{self.rng.choice(self.hashes)}")
+            else:
+                response = await client.get("/queue/status")
+        except Exception as e:
+            self.failures[f"{endpoint}: {type(e).__name__}"] += 1
+            return
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][response.status_code] += 1
+
+    async def run(self, rps: float, duration: float, mix: Dict[str, float]) -> float:
+        import httpx
+
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        limits = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+        async with httpx.AsyncClient(
+            base_url=self.base_url, timeout=120, limits=limits
+        ) as client:
+            loop = asyncio.get_running_loop()
+            pending = []
+            start = loop.time()
+            sent = 0
+            while loop.time() - start < duration:
+                endpoint = self.rng.choices(names, weights)[0]
+                pending.append(asyncio.create_task(self.fire(client, endpoint)))
+                sent += 1
+                await asyncio.sleep(max(0.0, start + sent / rps - loop.time()))
+            await asyncio.gather(*pending)
+            return loop.time() - start
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        from suite import latency_summary
+
+        endpoints = {}
+        for endpoint, samples in self.latencies.items():
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "status_codes": dict(self.statuses[endpoint]),
+                **latency_summary(samples),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "failures": dict(self.failures),
+            "endpoints": endpoints,
+        }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'")
+        mix[name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="Load an existing deployment instead")
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("convert=2,tasks=4,view=2,queue_status=2"),
+        help="Endpoint weights, e.g. convert=1,tasks=3,view=1,queue_status=1",
+    )
+    parser.add_argument(
+        "--hit-ratio", type=float, default=0.3, help="Share of re-uploaded PDFs"
+    )
+    parser.add_argument("--pages", type=int, default=2, help="Pages per upload")
+    parser.add_argument("--unique-pdfs", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Worker threads or pool processes"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("celery", "local"),
+        default="celery",
+        help="Execution backend of the in-process API",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Fake converter s/doc"
+    )
+    parser.add_argument("--output-kb", type=int, default=20, help="Fake Markdown size")
+    parser.add_argument(
+        "--admission", action="store_true", help="Enable admission control"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", type=Path)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="pdf2md-load-"))
+    if not args.url:
+        configure_environment(work_dir, args)
+
+    from synthetic import build_pdf
+
+    pdfs = [build_pdf("text", args.pages, seed) for seed in range(args.unique_pdfs)]
+
+    with ExitStack() as stack:
+        base_url = args.url or start_local_stack(stack, args.workers, args.backend)
+        print(
+            f"Loading {base_url} at {args.rps} rps for {args.duration}s",
+            file=sys.stderr,
+        )
+        generator = LoadGenerator(base_url, pdfs, args.hit_ratio, args.seed)
+        elapsed = asyncio.run(generator.run(args.rps, args.duration, args.mix))
+
+    report = generator.report(elapsed)
+    report["config"] = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(
+        f"{'endpoint':<14} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for endpoint, stats in sorted(report["endpoints"].items()):
+        print(
+            f"{endpoint:<14} {stats['requests']:>6} {stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+    if report["failures"]:
+        print(f"Failures: {report['failures']}")
+
+    if args.json_path:
+        args.json_path.write_text(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
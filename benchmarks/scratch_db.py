@@ -0,0 +1,37 @@
+"""
+Scratch database for benchmark runs
+
+The app keeps its database at storage/pdf2md.db; benchmarks rebind its
+engine to a database in their work directory, so runs neither read nor
+pollute it.
+"""
+
+import os
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+
+# Inherited by processes a benchmark starts, e.g. the local backend's pool
+SCRATCH_DATABASE_ENV = "PDF2MD_SCRATCH_DATABASE_URL"
+
+
+def use_scratch_database(url: Optional[str] = None) -> None:
+    """
+    Bind the app's database sessions to a scratch SQLite database
+
+    Call before the app opens any session. Without a URL, the one a parent
+    process set is used, if any.
+
+    Args:
+        url: SQLAlchemy URL of the scratch database
+    """
+    url = url or os.environ.get(SCRATCH_DATABASE_ENV)
+    if not url:
+        return
+    os.environ[SCRATCH_DATABASE_ENV] = url
+    from app.db import base
+
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", base.set_sqlite_pragma)
+    base.engine = engine
+    base.SessionLocal.configure(bind=engine)
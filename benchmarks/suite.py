@@ -0,0 +1,326 @@
+"""
+Reproducible benchmark suite.
+
+Generates the synthetic corpus (see synthetic.py) and measures:
+
+    conversion   cold and warm pages/sec through convert_pdf_task, per
+                 document kind and quality profile, with per-stage timings
+    cache_hit    latency of /convert and /view when the result is cached
+    upload       /convert upload + hash throughput (cache-hit path)
+    memory       peak RSS of the benchmark process
+
+Everything runs in-process against a scratch storage directory and SQLite
+database, with Celery's in-memory broker, so no Redis is needed and the real
+database is never touched. Results are written as JSON keyed by git commit;
+pass --compare with an earlier result file to print the deltas.
+
+Usage:
+    python benchmarks/suite.py --pages 1 5 --repeats 2 --output results.json
+    python benchmarks/suite.py --qualities draft standard high --skip-http
+    python benchmarks/suite.py --compare results.json --skip-conversion
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import platform
+import resource
+import argparse
+import datetime
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from scratch_db import use_scratch_database
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def configure_environment(work_dir: Path) -> None:
+    """Point settings at scratch storage; must run before importing app"""
+    storage = work_dir / "storage"
+    os.environ.update(
+        {
+            "CELERY_BROKER_URL": "memory://",
+            "CELERY_RESULT_BACKEND": "cache+memory://",
+            "STORAGE_PATH": str(storage),
+            "TEMP_PATH": str(storage / "temp"),
+            "UPLOAD_PATH": str(storage / "uploads"),
+            "ADMISSION_ENABLED": "false",
+        }
+    )
+    for path in ("temp", "uploads"):
+        (storage / path).mkdir(parents=True, exist_ok=True)
+    use_scratch_database(f"sqlite:///{work_dir / 'bench.db'}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(statistics.mean(ms), 3),
+    }
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def bench_conversion(
+    corpus: List[Path], repeats: int, work_dir: Path, **options
+) -> Dict[str, Any]:
+    """
+    Convert every corpus file through convert_pdf_task (eagerly, in-process)
+
+    The first conversion of the run is reported as cold; each file is then
+    converted `repeats` more times and the best run is reported as warm.
+    """
+    from app.services.converter import convert_pdf_task
+
+    def run_once(pdf: Path, run: int) -> Dict[str, Any]:
+        # The task deletes its input, and each run needs a distinct cache row
+        temp_copy = work_dir / f"{pdf.stem}-{run}.pdf"
+        shutil.copyfile(pdf, temp_copy)
+        run_hash = hashlib.sha256(pdf.read_bytes() + str(run).encode()).hexdigest()
+        start = time.perf_counter()
+        result = convert_pdf_task.apply(
+            args=[str(temp_copy), run_hash, pdf.name], kwargs=options
+        ).get()
+        seconds = time.perf_counter() - start
+        if result["status"] != "SUCCESS":
+            raise RuntimeError(f"{pdf.name}: {result['data'].get('error')}")
+        stats = result["data"].get("stats") or {}
+        pages = stats.get("counters", {}).get("pages") or 1
+        return {
+            "seconds": round(seconds, 4),
+            "pages": pages,
+            "pages_per_second": round(pages / seconds, 4),
+            "engine": stats.get("engine"),
+            "timings": stats.get("timings", {}),
+        }
+
+    cold = run_once(corpus[0], 0)
+    cold["document"] = corpus[0].name
+
+    documents = []
+    for pdf in corpus:
+        runs = [run_once(pdf, run) for run in range(1, repeats + 1)]
+        best = min(runs, key=lambda r: r["seconds"])
+        documents.append({"document": pdf.name, "runs": runs, "best": best})
+        print(
+            f"  {pdf.name:<20} {best['pages_per_second']:>8} pages/s ({best['engine']})",
+            file=sys.stderr,
+        )
+    return {"options": options, "cold": cold, "documents": documents}
+
+
+def bench_http(corpus: List[Path], requests: int, upload_mb: int) -> Dict[str, Any]:
+    """Cache-hit latency of /convert and /view, and upload throughput"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.db.base import SessionLocal, init_db
+    from app.db import crud
+
+    init_db()
+    pdf = corpus[0]
+    content = pdf.read_bytes()
+    upload_content = os.urandom(upload_mb * 1024 * 1024)
+
+    db = SessionLocal()
+    try:
+        for data in (content, upload_content):
+            file_hash = hashlib.sha256(data).hexdigest()
+            if not crud.get_conversion_by_hash_and_params(
+                db, file_hash, False, False, True, False
+            ):
+                crud.create_conversion(
+                    db,
+                    file_hash=file_hash,
+                    original_filename=pdf.name,
+                    markdown_content="# Benchmark\n\n" + "Lorem ipsum. " * 2000,
+                )
+    finally:
+        db.close()
+    file_hash = hashlib.sha256(content).hexdigest()
+
+    convert_samples, view_samples, upload_samples = [], [], []
+    with TestClient(app) as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.post(
+                "/convert", files={"file": (pdf.name, content, "application/pdf")}
+            )
+            convert_samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+            start = time.perf_counter()
+            response = client.get(f"/view/{file_hash}")
+            view_samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+        for _ in range(max(1, requests // 10)):
+            start = time.perf_counter()
+            response = client.post(
+                "/convert",
+                files={"file": ("upload.pdf", upload_content, "application/pdf")},
+            )
+            upload_samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    best_upload = min(upload_samples)
+    return {
+        "convert_cache_hit": latency_summary(convert_samples),
+        "view_cache_hit": latency_summary(view_samples),
+        "upload": {
+            "megabytes": upload_mb,
+            "best_seconds": round(best_upload, 4),
+            "mb_per_second": round(upload_mb / best_upload, 3),
+        },
+    }
+
+
+def summarize(results: Dict[str, Any]) -> Dict[str, float]:
+    """Flat name -> number view used for comparisons between runs"""
+    summary: Dict[str, float] = {
+        "peak_rss_mb": round(results["peak_rss_bytes"] / 2**20, 1)
+    }
+    for quality, conversion in (results.get("conversion") or {}).items():
+        # Standard keeps the unprefixed names, comparable with older results
+        prefix = "" if quality == "standard" else f"{quality}."
+        summary[f"{prefix}cold_seconds"] = conversion["cold"]["seconds"]
+        by_kind: Dict[str, List[float]] = {}
+        for doc in conversion["documents"]:
+            kind = doc["document"].split("-")[0]
+            by_kind.setdefault(kind, []).append(doc["best"]["pages_per_second"])
+        for kind, rates in by_kind.items():
+            summary[f"{prefix}warm_pages_per_second.{kind}"] = round(
+                statistics.mean(rates), 4
+            )
+    http = results.get("http")
+    if http:
+        summary["convert_cache_hit_p50_ms"] = http["convert_cache_hit"]["p50_ms"]
+        summary["view_cache_hit_p50_ms"] = http["view_cache_hit"]["p50_ms"]
+        summary["upload_mb_per_second"] = http["upload"]["mb_per_second"]
+    return summary
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float]) -> None:
+    print(f"{'metric':<36} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, value in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>12} {value:>12}")
+            continue
+        change = f"{(value - base) / base * 100:+.1f}%" if base else "-"
+        print(f"{name:<36} {base:>12} {value:>12} {change:>9}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=ROOT_DIR,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--kinds", nargs="+", default=None)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument(
+        "--qualities", nargs="+", default=["standard"], help="Quality profiles"
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--upload-mb", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-conversion", action="store_true")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--output", type=Path, help="Defaults to benchmarks/results/")
+    parser.add_argument("--compare", type=Path, help="Earlier result file")
+    parser.add_argument("--keep", action="store_true", help="Keep scratch directory")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="pdf2md-bench-"))
+    configure_environment(work_dir)
+
+    from synthetic import KINDS, generate_corpus
+
+    corpus = generate_corpus(
+        work_dir / "corpus", args.pages, args.kinds or KINDS, args.seed
+    )
+
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": {
+            "pages": args.pages,
+            "seed": args.seed,
+            "files": [p.name for p in corpus],
+        },
+    }
+    try:
+        if not args.skip_conversion:
+            results["conversion"] = {}
+            for quality in args.qualities:
+                print(f"Conversion throughput ({quality})...", file=sys.stderr)
+                results["conversion"][quality] = bench_conversion(
+                    corpus, args.repeats, work_dir, quality=quality
+                )
+        if not args.skip_http:
+            print("HTTP cache-hit latency and upload throughput...", file=sys.stderr)
+            results["http"] = bench_http(corpus, args.requests, args.upload_mb)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results["peak_rss_bytes"] = peak_rss_bytes()
+    results["summary"] = summarize(results)
+
+    output = args.output or (
+        ROOT_DIR
+        / "benchmarks"
+        / "results"
+        / f"{results['commit']}-{int(time.time())}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text()).get("summary", {})
+        compare(results["summary"], baseline)
+    else:
+        print(json.dumps(results["summary"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Generate a synthetic PDF corpus for benchmarks.
+
+Documents are written with a small built-in PDF writer (plus Pillow for
+images), so the corpus is reproducible from a seed on any machine without
+extra dependencies. Four kinds are produced, each at several page counts:
+
+    text     born-digital prose with headings
+    table    pages dominated by ruled tables
+    image    text interleaved with embedded photos/figures
+    scanned  page images only, no text layer (needs OCR)
+
+Usage:
+    python benchmarks/synthetic.py ./corpus --pages 1 5 25
+"""
+
+import io
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+PAGE_WIDTH = 612  # US Letter, points
+PAGE_HEIGHT = 792
+MARGIN = 72
+
+KINDS = ("text", "table", "image", "scanned")
+
+WORDS = (
+    "invoice account balance quarterly revenue margin forecast policy "
+    "customer contract delivery schedule analysis report summary section "
+    "figure table result method sample average total performance system "
+    "process service request response storage network memory latency "
+    "throughput document page layout model accuracy review approval"
+).split()
+
+
+class PdfWriter:
+    """Minimal PDF 1.4 writer: Helvetica text, line art and JPEG images."""
+
+    def __init__(self):
+        self._objects: List[bytes] = []
+        self._page_ids: List[int] = []
+        self._font_id = self._add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+        )
+        self._pages_id = self._reserve()
+
+    def _reserve(self) -> int:
+        self._objects.append(b"")
+        return len(self._objects)
+
+    def _add(self, body: bytes) -> int:
+        self._objects.append(body)
+        return len(self._objects)
+
+    def _stream(self, dictionary: bytes, data: bytes) -> int:
+        return self._add(
+            dictionary[:-2]
+            + b" /Length %d >>\nstream\n" % len(data)
+            + data
+            + b"\nendstream"
+        )
+
+    def add_page(
+        self, content: str, images: Optional[Dict[str, Tuple[int, int, bytes]]] = None
+    ) -> None:
+        """
+        Add a page
+
+        Args:
+            content: Page content stream operators
+            images: XObject name -> (width, height, jpeg bytes)
+        """
+        xobjects = b""
+        for name, (width, height, jpeg) in (images or {}).items():
+            image_id = self._stream(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode >>"
+                % (width, height),
+                jpeg,
+            )
+            xobjects += b"/%s %d 0 R " % (name.encode(), image_id)
+        content_id = self._stream(b"<< >>", content.encode("latin-1"))
+        resources = b"<< /Font << /F1 %d 0 R >>" % self._font_id
+        if xobjects:
+            resources += b" /XObject << " + xobjects + b">>"
+        resources += b" >>"
+        page_id = self._add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources %s /Contents %d 0 R >>"
+            % (self._pages_id, PAGE_WIDTH, PAGE_HEIGHT, resources, content_id)
+        )
+        self._page_ids.append(page_id)
+
+    def to_bytes(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._objects[self._pages_id - 1] = (
+            b"<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (
+                kids,
+                len(self._page_ids),
+            )
+        )
+        catalog_id = self._add(b"<< /Type /Catalog /Pages %d 0 R >>" % self._pages_id)
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self._objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref_offset = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        out.write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(self._objects) + 1, catalog_id, xref_offset)
+        )
+        return out.getvalue()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    sentence = " ".join(rng.choice(WORDS) for _ in range(words))
+    return sentence.capitalize() + "."
+
+
+def _paragraph_lines(rng: random.Random, lines: int, width: int = 90) -> List[str]:
+    text = " ".join(_sentence(rng, rng.randint(6, 14)) for _ in range(lines))
+    out, line = [], ""
+    for word in text.split():
+        if len(line) + len(word) + 1 > width:
+            out.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    if line:
+        out.append(line)
+    return out
+
+
+def _text_block(x: float, y: float, lines: List[str], size: int = 10) -> str:
+    ops = [f"BT /F1 {size} Tf {size + 3} TL {x} {y} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops)
+
+
+def _heading(x: float, y: float, text: str) -> str:
+    return f"BT /F1 16 Tf {x} {y} Td ({_escape(text)}) Tj ET"
+
+
+def _jpeg(image: Image.Image, quality: int = 85) -> Tuple[int, int, bytes]:
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return image.width, image.height, buffer.getvalue()
+
+
+def _figure(rng: random.Random, width: int, height: int) -> Image.Image:
+    image = Image.new("RGB", (width, height), (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(20, width // 2), y0 + rng.randrange(20, height // 2)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle([x0, y0, x1, y1], fill=color)
+        else:
+            draw.ellipse([x0, y0, x1, y1], fill=color)
+    return image
+
+
+def text_page(rng: random.Random, number: int) -> Tuple[str, Dict]:
+    y = PAGE_HEIGHT - MARGIN
+    ops = [_heading(MARGIN, y, f"Section {number}: {_sentence(rng, 3)[:-1]}")]
+    y -= 30
+    while y > MARGIN + 120:
+        lines = _paragraph_lines(rng, rng.randint(3, 6))
+        ops.append(_text_block(MARGIN, y, lines))
+        y -= 13 * len(lines) + 14
+    return "\n".join(ops), {}
+
+
+def table_page(rng: random.Random, number: int) -> Tuple[str, Dict]:
+    y = PAGE_HEIGHT - MARGIN
+    ops = [_heading(MARGIN, y, f"Table {number}")]
+    y -= 30
+    columns, rows = rng.randint(3, 6), rng.randint(12, 20)
+    col_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    row_height = 18
+    top = y
+    for r in range(rows + 1):
+        line_y = top - r * row_height
+        ops.append(f"{MARGIN} {line_y} m {PAGE_WIDTH - MARGIN} {line_y} l S")
+    for c in range(columns + 1):
+        line_x = MARGIN + c * col_width
+        ops.append(f"{line_x} {top} m {line_x} {top - rows * row_height} l S")
+    for r in range(rows):
+        for c in range(columns):
+            if r == 0:
+                cell = rng.choice(WORDS).title()
+            elif c == 0:
+                cell = rng.choice(WORDS)
+            else:
+                cell = f"{rng.uniform(0, 10000):,.2f}"
+            ops.append(
+                _text_block(
+                    MARGIN + c * col_width + 4, top - r * row_height - 13, [cell], 9
+                )
+            )
+    return "\n".join(ops), {}
+
+
+def image_page(rng: random.Random, number: int) -> Tuple[str, Dict]:
+    y = PAGE_HEIGHT - MARGIN
+    ops = [_heading(MARGIN, y, f"Figure {number}")]
+    images = {}
+    y -= 20
+    for index in range(2):
+        width, height, jpeg = _jpeg(_figure(rng, 800, 500))
+        name = f"Im{index}"
+        images[name] = (width, height, jpeg)
+        draw_width, draw_height = PAGE_WIDTH - 2 * MARGIN, 230
+        y -= draw_height
+        ops.append(f"q {draw_width} 0 0 {draw_height} {MARGIN} {y} cm /{name} Do Q")
+        y -= 10
+        ops.append(_text_block(MARGIN, y, _paragraph_lines(rng, 1)[:2], 9))
+        y -= 30
+    return "\n".join(ops), images
+
+
+def scanned_page(rng: random.Random, number: int) -> Tuple[str, Dict]:
+    # 150 dpi grayscale "scan" of a text page, with slight blur and noise
+    dpi_scale = 150 / 72
+    width, height = int(PAGE_WIDTH * dpi_scale), int(PAGE_HEIGHT * dpi_scale)
+    image = Image.new("L", (width, height), 245)
+    draw = ImageDraw.Draw(image)
+    y = int(MARGIN * dpi_scale)
+    draw.text((int(MARGIN * dpi_scale), y), f"Scanned page {number}", fill=20)
+    y += 40
+    for line in _paragraph_lines(rng, 30, width=100):
+        if y > height - MARGIN * dpi_scale:
+            break
+        draw.text((int(MARGIN * dpi_scale), y), line, fill=30)
+        y += 22
+    image = image.rotate(rng.uniform(-0.8, 0.8), fillcolor=245)
+    image = image.filter(ImageFilter.GaussianBlur(0.6))
+    noise = Image.effect_noise((width, height), 12)
+    image = Image.blend(image, noise, 0.08)
+    jpeg = _jpeg(image.convert("RGB"), quality=70)
+    ops = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Scan Do Q"
+    return ops, {"Scan": jpeg}
+
+
+PAGE_BUILDERS = {
+    "text": text_page,
+    "table": table_page,
+    "image": image_page,
+    "scanned": scanned_page,
+}
+
+
+def build_pdf(kind: str, pages: int, seed: int = 0) -> bytes:
+    """
+    Build one synthetic PDF
+
+    Args:
+        kind: One of KINDS
+        pages: Number of pages
+        seed: Seed for deterministic content
+
+    Returns:
+        bytes: The PDF file
+    """
+    rng = random.Random(f"{kind}-{pages}-{seed}")
+    writer = PdfWriter()
+    for number in range(1, pages + 1):
+        content, images = PAGE_BUILDERS[kind](rng, number)
+        writer.add_page(content, images)
+    return writer.to_bytes()
+
+
+def generate_corpus(
+    output_dir: Path, page_counts: List[int], kinds=KINDS, seed: int = 0
+) -> List[Path]:
+    """
+    Write every kind at every page count into output_dir
+
+    Returns:
+        List[Path]: The written files, named <kind>-<pages>p.pdf
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for kind in kinds:
+        for pages in page_counts:
+            path = output_dir / f"{kind}-{pages}p.pdf"
+            path.write_bytes(build_pdf(kind, pages, seed))
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 25])
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for path in generate_corpus(args.output_dir, args.pages, args.kinds, args.seed):
+        print(f"{path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
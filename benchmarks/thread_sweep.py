@@ -0,0 +1,130 @@
+"""
+Sweep torch thread counts against conversion throughput.
+
+Each thread count runs in a fresh interpreter, because OpenMP/MKL read their
+thread settings once at import time and torch only accepts one interop
+setting per process. Models are loaded and one warm-up conversion is run
+before timing, so the numbers reflect steady-state worker throughput.
+
+Usage:
+    python benchmarks/thread_sweep.py sample.pdf --threads 1 2 4 8
+    python benchmarks/thread_sweep.py sample.pdf --threads 2 4 --cores 0-3 --json out.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def run_single(pdf_path: str, threads: int, repeats: int) -> Dict[str, Any]:
+    """Time conversions of pdf_path in this process with the given thread count"""
+    from app.core.cpu import apply_thread_env
+
+    apply_thread_env(threads)
+
+    import torch
+    from app.services.converter import get_converter
+
+    torch.set_num_threads(threads)
+
+    load_start = time.perf_counter()
+    converter = get_converter()
+    load_seconds = time.perf_counter() - load_start
+
+    rendered = converter(pdf_path)  # warm-up
+    page_count = len(getattr(rendered, "metadata", {}).get("page_stats", [])) or 1
+
+    durations: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        converter(pdf_path)
+        durations.append(time.perf_counter() - start)
+
+    best = min(durations)
+    return {
+        "threads": threads,
+        "pages": page_count,
+        "model_load_seconds": round(load_seconds, 3),
+        "seconds": [round(d, 3) for d in durations],
+        "pages_per_second": round(page_count / best, 3),
+    }
+
+
+def sweep(
+    pdf_path: str, thread_counts: List[int], repeats: int, cores: str
+) -> List[Dict[str, Any]]:
+    """Run one child interpreter per thread count and collect their results"""
+    results = []
+    for threads in thread_counts:
+        command = [
+            sys.executable,
+            __file__,
+            pdf_path,
+            "--single",
+            str(threads),
+            "--repeats",
+            str(repeats),
+        ]
+        if cores:
+            command = ["taskset", "-c", cores] + command
+        print(f"Running with {threads} thread(s)...", file=sys.stderr)
+        proc = subprocess.run(
+            command, capture_output=True, text=True, env=os.environ.copy()
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            results.append({"threads": threads, "error": proc.returncode})
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("pdf", help="PDF file to convert")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3, help="Timed runs per thread count"
+    )
+    parser.add_argument(
+        "--cores",
+        default="",
+        help="Restrict runs to a core list, e.g. 0-3 (uses taskset)",
+    )
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.pdf, args.single, args.repeats)))
+        return
+
+    results = sweep(args.pdf, sorted(set(args.threads)), args.repeats, args.cores)
+
+    print(f"{'threads':>8} {'pages/sec':>10} {'load (s)':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['threads']:>8} {'failed':>10}")
+        else:
+            print(
+                f"{r['threads']:>8} {r['pages_per_second']:>10} {r['model_load_seconds']:>9}"
+            )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
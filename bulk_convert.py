@@ -0,0 +1,379 @@
+"""
+Offline bulk conversion.
+
+Walks directories for PDFs, hashes them, skips those already in the
+conversion cache with the same options, and converts the rest through the
+worker pipeline (convert_pdf_task, run in-process) on a local process pool.
+Results are saved to the database like any other conversion, so the API
+serves them afterwards; no upload, broker or Redis is involved and files are
+read where they are.
+
+Models are loaded once, in this process, and handed to the pool in shared
+memory. Every outcome is appended to a state file, so an interrupted run can
+simply be started again: files recorded there are not hashed again, and
+failed files are only retried with --retry-failed.
+
+Usage:
+    python bulk_convert.py /data/corpus --workers 4
+    python bulk_convert.py /data/a /data/b --quality draft --state backfill.jsonl
+    python bulk_convert.py /data/corpus --dry-run
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOOKUP_CHUNK = 500  # Hashes per cache query, below SQLite's variable limit
+
+
+def configure_environment() -> None:
+    """In-memory broker and results; must run before importing app"""
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+
+def find_pdfs(roots: List[Path]) -> Iterator[Path]:
+    """PDF files under the given files and directories, in a stable order"""
+    for root in roots:
+        if root.is_file():
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(".pdf"):
+                    yield Path(dirpath) / name
+
+
+class StateFile:
+    """
+    Outcome of every file handled by earlier runs, as JSON lines
+
+    Records are keyed by path and options, and only trusted while the file's
+    size and modification time are unchanged.
+    """
+
+    def __init__(self, path: Path, options: Dict[str, Any]):
+        self.path = path
+        self.options_key = json.dumps(options, sort_keys=True)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted run
+                    if record.get("options") == self.options_key:
+                        self.records[record["path"]] = record
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a")
+        if self._file.tell() and not path.read_bytes().endswith(b"\n"):
+            self._file.write("\n")
+
+    def lookup(self, pdf: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        record = self.records.get(str(pdf))
+        if (
+            record
+            and record["size"] == stat.st_size
+            and record["mtime"] == stat.st_mtime
+        ):
+            return record
+        return None
+
+    def record(self, **record) -> None:
+        record["options"] = self.options_key
+        self.records[record["path"]] = record
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Progress:
+    """Counts, throughput and ETA, reported on stderr"""
+
+    def __init__(self, total: int, interval: float):
+        self.total = total
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_report = 0.0
+        self.done = self.failed = self.pages = 0
+
+    def update(self, outcome: Dict[str, Any]) -> None:
+        if outcome["status"] == "SUCCESS":
+            self.done += 1
+            self.pages += outcome.get("pages") or 0
+        else:
+            self.failed += 1
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval or self.finished:
+            self.last_report = now
+            self.report()
+
+    @property
+    def finished(self) -> bool:
+        return self.done + self.failed >= self.total
+
+    def report(self) -> None:
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        handled = self.done + self.failed
+        rate = handled / elapsed
+        eta = (self.total - handled) / rate if rate else 0
+        print(
+            f"[{handled}/{self.total}] {100 * handled / max(self.total, 1):5.1f}% "
+            f"{rate:.2f} docs/s {self.pages / elapsed:.2f} pages/s "
+            f"failed={self.failed} elapsed={time.strftime('%H:%M:%S', time.gmtime(elapsed))} "
+            f"eta={time.strftime('%H:%M:%S', time.gmtime(eta))}",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def load_shared_models() -> Optional[Dict[str, Any]]:
+    """Load marker's models once, in shared memory for the pool"""
+    from app.core.config import settings
+
+    if settings.FAKE_CONVERTER:
+        return None
+    from marker.models import create_model_dict
+
+    print("Loading models...", file=sys.stderr, flush=True)
+    models = create_model_dict()
+    if settings.TORCH_DEVICE == "cpu":
+        for model in models.values():
+            if hasattr(model, "model"):
+                model.model.share_memory()
+    return models
+
+
+def init_worker(models: Optional[Dict[str, Any]]) -> None:
+    """Pool initializer: pin the process and adopt the shared models"""
+    import multiprocessing
+
+    from app.core.config import settings
+    from app.core.cpu import configure_worker_cpu
+    from app.services.converter import use_preloaded_models
+
+    identity = multiprocessing.current_process()._identity
+    configure_worker_cpu(settings.WORKER_INDEX + (identity[0] - 1 if identity else 0))
+    use_preloaded_models(models)
+
+
+def convert_one(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one file through convert_pdf_task in this process"""
+    from app.services.converter import convert_pdf_task
+
+    start = time.perf_counter()
+    try:
+        result = convert_pdf_task.apply(
+            args=[job["path"], job["file_hash"], Path(job["path"]).name],
+            kwargs=dict(job["options"], remove_input=False),
+        ).get()
+        data = result["data"]
+        status = result["status"]
+        pages = (data.get("stats") or {}).get("counters", {}).get("pages")
+        error = data.get("error")
+    except Exception as e:
+        status, pages, error = "FAILURE", None, str(e)
+    return {
+        "path": job["path"],
+        "size": job["size"],
+        "mtime": job["mtime"],
+        "file_hash": job["file_hash"],
+        "status": status,
+        "pages": pages,
+        "seconds": round(time.perf_counter() - start, 3),
+        "error": error,
+    }
+
+
+def plan(
+    roots: List[Path],
+    options: Dict[str, Any],
+    state: StateFile,
+    retry_failed: bool,
+    hash_workers: int,
+) -> Dict[str, Any]:
+    """
+    Hash the files found and sort out what needs converting
+
+    Returns:
+        Dict[str, Any]: jobs (files to convert, one per distinct hash) and
+            counts of files found, cached, duplicate and skipped as failed
+    """
+    from app.db import crud
+    from app.db.base import SessionLocal
+    from app.services.file_service import calculate_file_hash
+
+    files = []
+    counts = {"found": 0, "cached": 0, "duplicate": 0, "failed_before": 0}
+    for pdf in find_pdfs(roots):
+        counts["found"] += 1
+        try:
+            stat = pdf.stat()
+        except OSError as e:
+            print(f"Skipping {pdf}: {e}", file=sys.stderr)
+            continue
+        record = state.lookup(pdf, stat)
+        if record and record["status"] != "SUCCESS" and not retry_failed:
+            counts["failed_before"] += 1
+            continue
+        files.append(
+            {
+                "path": str(pdf),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "file_hash": record["file_hash"] if record else None,
+            }
+        )
+
+    def ensure_hash(entry: Dict[str, Any]) -> Dict[str, Any]:
+        if entry["file_hash"] is None:
+            entry["file_hash"] = calculate_file_hash(Path(entry["path"]))
+        return entry
+
+    print(f"Hashing {len(files)} files...", file=sys.stderr, flush=True)
+    with ThreadPoolExecutor(max_workers=hash_workers) as executor:
+        files = list(executor.map(ensure_hash, files))
+
+    db = SessionLocal()
+    cached = set()
+    try:
+        for i in range(0, len(files), LOOKUP_CHUNK):
+            hashes = [entry["file_hash"] for entry in files[i : i + LOOKUP_CHUNK]]
+            cached.update(
+                crud.get_conversions_by_hashes_and_params(db, hashes, **options)
+            )
+    finally:
+        db.close()
+
+    jobs = []
+    seen = set()
+    for entry in files:
+        if entry["file_hash"] in cached:
+            counts["cached"] += 1
+        elif entry["file_hash"] in seen:
+            counts["duplicate"] += 1
+        else:
+            seen.add(entry["file_hash"])
+            jobs.append(dict(entry, options=options))
+    return {"jobs": jobs, "counts": counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("paths", type=Path, nargs="+", help="PDF files or directories")
+    parser.add_argument("--workers", type=int, default=2, help="Conversion processes")
+    parser.add_argument("--hash-workers", type=int, default=8)
+    parser.add_argument("--use-llm", action="store_true")
+    parser.add_argument("--paginate-output", action="store_true")
+    parser.add_argument("--no-images", action="store_true", help="Skip extraction")
+    parser.add_argument("--force-ocr", action="store_true")
+    parser.add_argument("--quality", default=None, help="Defaults to DEFAULT_QUALITY")
+    parser.add_argument(
+        "--state", type=Path, help="Defaults to STORAGE_PATH/bulk_convert_state.jsonl"
+    )
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--limit", type=int, help="Convert at most this many files")
+    parser.add_argument("--dry-run", action="store_true", help="Only report counts")
+    parser.add_argument(
+        "--progress-interval", type=float, default=5.0, help="Seconds between reports"
+    )
+    args = parser.parse_args()
+
+    configure_environment()
+    from app.core.config import settings
+    from app.db.base import init_db
+    from app.services.quality import get_quality_profile
+
+    quality = args.quality or settings.DEFAULT_QUALITY
+    get_quality_profile(quality)
+    if args.use_llm and not settings.llm_available:
+        print("No LLM API keys configured - proceeding without LLM", file=sys.stderr)
+        args.use_llm = False
+    options = {
+        "use_llm": args.use_llm,
+        "paginate_output": args.paginate_output,
+        "extract_images": not args.no_images,
+        "force_ocr": args.force_ocr,
+        "quality": quality,
+    }
+
+    init_db()
+    state = StateFile(
+        args.state or Path(settings.STORAGE_PATH) / "bulk_convert_state.jsonl",
+        options,
+    )
+    planned = plan(
+        [path.resolve() for path in args.paths],
+        options,
+        state,
+        args.retry_failed,
+        args.hash_workers,
+    )
+    jobs = planned["jobs"][: args.limit] if args.limit else planned["jobs"]
+    counts = planned["counts"]
+    print(
+        f"Found {counts['found']} PDFs: {counts['cached']} cached, "
+        f"{counts['duplicate']} duplicates, {counts['failed_before']} failed "
+        f"before, {len(jobs)} to convert",
+        file=sys.stderr,
+    )
+    if args.dry_run or not jobs:
+        state.close()
+        return
+
+    progress = Progress(len(jobs), args.progress_interval)
+    models = load_shared_models()
+    pool = None
+    try:
+        if args.workers <= 1:
+            init_worker(models)
+            outcomes = map(convert_one, jobs)
+        else:
+            if models is not None:
+                import torch.multiprocessing as mp
+            else:
+                import multiprocessing as mp
+            # Models cannot be shared with forked children safely
+            pool = mp.get_context("spawn").Pool(
+                processes=args.workers, initializer=init_worker, initargs=(models,)
+            )
+            outcomes = pool.imap_unordered(convert_one, jobs)
+        for outcome in outcomes:
+            state.record(**outcome)
+            if outcome["status"] != "SUCCESS":
+                print(
+                    f"Failed: {outcome['path']}: {outcome['error']}",
+                    file=sys.stderr,
+                )
+            progress.update(outcome)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run again to resume.", file=sys.stderr)
+        if pool is not None:
+            pool.terminate()
+        sys.exit(130)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        state.close()
+    progress.report()
+    sys.exit(1 if progress.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,9 @@ RELOAD = os.getenv("RELOAD", "False").lower() in ("true", "1", "t")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
 APP_MODULE = "app.main:app"
 CELERY_APP_MODULE = "app.celery_app"
+INGEST_DIR = os.getenv("INGEST_DIR", "")
+# "local" runs conversions inside the API process, without Redis or Celery
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "celery")
 
 # --- Process Functions ---
 
@@ -60,6 +63,14 @@ def run_celery_worker():
         )
 
 
+def run_ingest_watcher():
+    """Starts watched-folder ingestion (see app.services.ingest)."""
+    print(f"Starting folder ingestion for {INGEST_DIR}...")
+    from app.services.ingest import main as ingest_main
+
+    ingest_main()
+
+
 # --- Signal Handling ---
 def signal_handler(sig, frame):
     print("\nStopping processes...")
@@ -68,6 +79,8 @@ def signal_handler(sig, frame):
         uvicorn_process.terminate()
     if celery_process and celery_process.is_alive():
         celery_process.terminate()
+    if ingest_process and ingest_process.is_alive():
+        ingest_process.terminate()
     sys.exit(0)
 
 
@@ -81,17 +94,29 @@ if __name__ == "__main__":
 
     # Create processes
     uvicorn_process = multiprocessing.Process(target=run_uvicorn, name="Uvicorn")
-    celery_process = multiprocessing.Process(
-        target=run_celery_worker, name="CeleryWorker"
-    )
+    celery_process = None
+    if EXECUTION_BACKEND != "local":
+        celery_process = multiprocessing.Process(
+            target=run_celery_worker, name="CeleryWorker"
+        )
+    ingest_process = None
+    # The local backend watches INGEST_DIR inside the API process
+    if INGEST_DIR and EXECUTION_BACKEND != "local":
+        ingest_process = multiprocessing.Process(
+            target=run_ingest_watcher, name="IngestWatcher"
+        )
 
     # Start processes
     uvicorn_process.start()
-    celery_process.start()
+    if celery_process:
+        celery_process.start()
+    if ingest_process:
+        ingest_process.start()
 
     # Wait for processes to complete (they won't unless interrupted)
     # We rely on the signal handler to terminate them
     uvicorn_process.join()
-    celery_process.join()
+    if celery_process:
+        celery_process.join()
 
     print("Application stopped.")
@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when app modules are imported, so point storage at a
+# scratch directory before that happens
+_storage = tempfile.mkdtemp(prefix="pdf2md-tests-")
+os.environ["STORAGE_PATH"] = _storage
+os.environ["TEMP_PATH"] = os.path.join(_storage, "temp")
+os.environ["UPLOAD_PATH"] = os.path.join(_storage, "uploads")
+os.environ["MOCK_LLM_LATENCY"] = "0"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Bind the app's sessions to a scratch database instead of storage/pdf2md.db"""
+    from sqlalchemy import create_engine, event
+
+    from app.db import base
+
+    base.engine = create_engine(
+        f"sqlite:///{_storage}/pdf2md.db", connect_args={"check_same_thread": False}
+    )
+    event.listen(base.engine, "connect", base.set_sqlite_pragma)
+    base.SessionLocal.configure(bind=base.engine)
+    base.init_db()
+
+
+@pytest.fixture
+def make_pdf():
+    """Build a blank one-page PDF; pages of different widths hash differently"""
+    import pypdfium2 as pdfium
+
+    def build(width: float = 612) -> bytes:
+        pdf = pdfium.PdfDocument.new()
+        pdf.new_page(width, 792)
+        buffer = io.BytesIO()
+        pdf.save(buffer)
+        return buffer.getvalue()
+
+    return build
+
+
+@pytest.fixture
+def write_pdf():
+    """
+    Write a PDF of Letter-size pages, each given as (text, image size in
+    points or None)
+    """
+    import ctypes
+
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+    from PIL import Image
+
+    def write(path, pages) -> str:
+        pdf = pdfium.PdfDocument.new()
+        for text, image_size in pages:
+            page = pdf.new_page(612, 792)
+            if text:
+                obj = pdfium_c.FPDFPageObj_NewTextObj(pdf, b"Helvetica", 12)
+                buffer = ctypes.create_string_buffer((text + "\0").encode("utf-16-le"))
+                pdfium_c.FPDFText_SetText(
+                    obj, ctypes.cast(buffer, ctypes.POINTER(ctypes.c_ushort))
+                )
+                pdfium_c.FPDFPageObj_Transform(obj, 1, 0, 0, 1, 72, 700)
+                pdfium_c.FPDFPage_InsertObject(page, obj)
+            if image_size:
+                image = pdfium.PdfImage.new(pdf)
+                image.set_bitmap(pdfium.PdfBitmap.from_pil(Image.new("RGB", (8, 8))))
+                image.set_matrix(pdfium.PdfMatrix().scale(*image_size))
+                page.insert_obj(image)
+            page.gen_content()
+        pdf.save(str(path))
+        return str(path)
+
+    return write
@@ -0,0 +1,139 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.api.v1 import endpoints
+from app.core.config import settings
+from app.main import app
+from app.services import admission
+from app.services.admission import AdmissionController
+
+
+class FakeResult:
+    """AsyncResult of a task that is finished when its ID says so"""
+
+    def __init__(self, task_id, app=None):
+        self.task_id = task_id
+
+    def ready(self):
+        return self.task_id.startswith("done")
+
+
+@pytest.fixture(autouse=True)
+def quotas(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_JOBS_PER_MINUTE", 5)
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_MAX_IN_FLIGHT", 0)
+    monkeypatch.setattr(admission, "AsyncResult", FakeResult)
+
+
+def submit(controller, client, count, prefix="task"):
+    for index in range(count):
+        controller.check_client(client)
+        controller.record(client, f"{prefix}-{client}-{index}")
+
+
+def rejection(controller, client, jobs=1):
+    with pytest.raises(HTTPException) as exc_info:
+        controller.check_client(client, jobs)
+    return exc_info.value
+
+
+def test_jobs_per_minute():
+    controller = AdmissionController()
+    submit(controller, "a", 5)
+
+    error = rejection(controller, "a")
+    assert error.status_code == 429
+    assert 1 <= int(error.headers["Retry-After"]) <= 60
+    # Other clients have their own quota
+    controller.check_client("b")
+
+
+def test_batch_is_checked_against_its_job_count():
+    controller = AdmissionController()
+    submit(controller, "a", 3)
+
+    controller.check_client("a", jobs=2)
+    assert rejection(controller, "a", jobs=3).status_code == 429
+    # Larger than the quota itself
+    assert rejection(AdmissionController(), "b", jobs=6).status_code == 429
+
+
+def test_in_flight_limit_counts_unfinished_tasks(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_JOBS_PER_MINUTE", 0)
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_MAX_IN_FLIGHT", 3)
+    controller = AdmissionController()
+    submit(controller, "a", 2)
+    submit(controller, "a", 5, prefix="done")
+
+    controller.check_client("a")
+    error = rejection(controller, "a", jobs=2)
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == str(settings.ADMISSION_IN_FLIGHT_RETRY_AFTER)
+
+
+def request_from(address, client_header=None):
+    headers = []
+    if client_header:
+        headers.append((b"x-client-id", client_header.encode()))
+    return Request({"type": "http", "headers": headers, "client": (address, 5000)})
+
+
+def test_client_is_keyed_on_address():
+    controller = AdmissionController()
+    assert controller.client_id(request_from("203.0.113.7")) == "203.0.113.7"
+    # A client can not pick a fresh identity per request
+    assert controller.client_id(request_from("203.0.113.7", "me")) == "203.0.113.7"
+
+
+def test_client_header_is_trusted_from_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_TRUSTED_PROXIES", ["10.0.0.2"])
+    controller = AdmissionController()
+    assert controller.client_id(request_from("10.0.0.2", "tenant-a")) == "tenant-a"
+    assert controller.client_id(request_from("10.0.0.2")) == "10.0.0.2"
+    assert controller.client_id(request_from("10.0.0.3", "tenant-a")) == "10.0.0.3"
+
+
+def test_idle_clients_are_forgotten(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_MAX_IN_FLIGHT", 10)
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: clock[0])
+    controller = AdmissionController()
+    submit(controller, "finished", 2, prefix="done")
+    submit(controller, "running", 1)
+    submit(controller, "active", 1, prefix="done")
+
+    clock[0] += 120
+    controller.record("active", "done-again")
+    controller.check_client("other")
+
+    assert set(controller._submissions) == {"active", "other"}
+    assert set(controller._in_flight) == {"active", "running"}
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", False)
+    controller = AdmissionController()
+    submit(controller, "a", 10)
+    controller.check_client("a", jobs=10)
+
+
+def test_batch_over_quota_enqueues_nothing(monkeypatch, make_pdf):
+    monkeypatch.setattr(endpoints, "admission_controller", AdmissionController())
+    sent = []
+    monkeypatch.setattr(
+        endpoints, "enqueue_misses", lambda jobs: sent.append(jobs) or (None, [])
+    )
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_JOBS_PER_MINUTE", 2)
+    files = [
+        ("files", (f"doc{width}.pdf", make_pdf(width), "application/pdf"))
+        for width in (600, 601, 602)
+    ]
+
+    response = TestClient(app).post("/v1/batch/convert", files=files)
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert sent == []
@@ -0,0 +1,69 @@
+import os
+
+from PIL import Image
+
+from app.services import artifacts
+from app.services.artifacts import ArtifactCache, cached_per_page, enforce_lru_limit
+
+
+def test_round_trip(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=10**6)
+    cache.put("abc", 0, "layout", "v1", {"blocks": [1, 2]})
+    cache.put_image("abc", 0, "96", Image.new("RGB", (4, 4), "red"))
+
+    assert cache.get("abc", 0, "layout", "v1") == {"blocks": [1, 2]}
+    assert cache.get("abc", 0, "layout", "v2") is None
+    assert cache.get_image("abc", 0, "96").getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_unreadable_artifact_is_a_miss(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=10**6)
+    cache.put("abc", 0, "layout", "v1", "ok")
+    (path,) = (tmp_path / "abc").iterdir()
+    path.write_bytes(b"not a pickle")
+
+    assert cache.get("abc", 0, "layout", "v1") is None
+
+
+def test_least_recently_used_files_go_first(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=250)
+    for page in range(3):
+        cache.put("abc", page, "ocr", "v1", b"x" * 80)
+        path = cache._path("abc", page, "ocr", "v1", "pkl")
+        os.utime(path, (1000 + page, 1000 + page))
+    cache.put("def", 0, "ocr", "v1", b"x" * 80)
+    os.utime(cache._path("def", 0, "ocr", "v1", "pkl"), (1003, 1003))
+    # Reading page 0 makes it the most recently used
+    cache.get("abc", 0, "ocr", "v1")
+    size = cache._path("abc", 0, "ocr", "v1", "pkl").stat().st_size
+
+    assert cache.enforce_limit() == (2, 2 * size)
+    assert cache.get("abc", 0, "ocr", "v1") is not None
+    assert cache.get("abc", 1, "ocr", "v1") is None
+    assert cache.get("abc", 2, "ocr", "v1") is None
+    assert cache.get("def", 0, "ocr", "v1") is not None
+
+
+def test_empty_directories_are_removed(tmp_path):
+    (tmp_path / "abc").mkdir()
+    (tmp_path / "abc" / "page").write_bytes(b"x" * 100)
+
+    assert enforce_lru_limit(tmp_path, 0) == (1, 100)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cached_per_page_computes_only_missing_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        artifacts, "artifact_cache", ArtifactCache(tmp_path, max_bytes=10**6)
+    )
+    computed = []
+
+    def compute(positions):
+        computed.append(positions)
+        return [f"result {position}" for position in positions]
+
+    cached_per_page("abc", [0, 1], "layout", ["v1", "v1"], compute)
+    results = cached_per_page("abc", [0, 1, 2], "layout", ["v1", "v2", "v1"], compute)
+
+    assert results == ["result 0", "result 1", "result 2"]
+    assert computed == [[0, 1], [1, 2]]
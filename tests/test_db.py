@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import base
+
+# conversion_cache as the first release created it
+ORIGINAL_CONVERSION_CACHE = """
+CREATE TABLE conversion_cache (
+    id INTEGER NOT NULL PRIMARY KEY,
+    file_hash VARCHAR(64) NOT NULL,
+    original_filename VARCHAR(255),
+    status VARCHAR(50) NOT NULL,
+    markdown_content TEXT,
+    error_message TEXT,
+    image_paths TEXT,
+    created_at DATETIME,
+    last_accessed DATETIME,
+    access_count INTEGER,
+    use_llm BOOLEAN NOT NULL,
+    paginate_output BOOLEAN NOT NULL,
+    extract_images BOOLEAN NOT NULL,
+    force_ocr BOOLEAN NOT NULL,
+    CONSTRAINT uix_conversion_params UNIQUE (
+        file_hash, use_llm, paginate_output, extract_images, force_ocr
+    )
+)
+"""
+
+CONVERSION_PARAMS = tuple(
+    sorted(
+        [
+            "file_hash",
+            "use_llm",
+            "paginate_output",
+            "extract_images",
+            "force_ocr",
+            "quality",
+        ]
+    )
+)
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    """Point the migration helpers at a database holding the original table"""
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text(ORIGINAL_CONVERSION_CACHE))
+        conn.execute(
+            text(
+                "INSERT INTO conversion_cache (id, file_hash, status, "
+                "markdown_content, use_llm, paginate_output, extract_images, "
+                "force_ocr) VALUES (1, 'abc', 'COMPLETED', '# Old', 0, 0, 1, 0)"
+            )
+        )
+    monkeypatch.setattr(base, "engine", engine)
+    return engine
+
+
+def columns(engine, table="conversion_cache"):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+
+def test_add_missing_columns_adds_nullable_columns(engine):
+    base.add_missing_columns()
+
+    assert {"page_count", "processing_seconds", "page_offsets", "stats"} <= columns(
+        engine
+    )
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT markdown_content, page_count FROM conversion_cache")
+        ).one()
+    assert tuple(row) == ("# Old", None)
+
+    # Running again changes nothing
+    base.add_missing_columns()
+
+
+def unique_constraints(engine, table="conversion_cache"):
+    return {
+        tuple(sorted(constraint["column_names"]))
+        for constraint in inspect(engine).get_unique_constraints(table)
+    }
+
+
+def test_column_with_server_default_is_filled_in(engine):
+    base.add_missing_columns()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT quality FROM conversion_cache")).scalar() == (
+            "standard"
+        )
+
+
+def test_rebuild_changed_unique_constraints(engine):
+    base.add_missing_columns()
+    base.rebuild_changed_unique_constraints()
+
+    assert unique_constraints(engine) == {CONVERSION_PARAMS}
+    assert "conversion_cache_old" not in inspect(engine).get_table_names()
+    assert {
+        index["name"] for index in inspect(engine).get_indexes("conversion_cache")
+    } >= {"ix_conversion_cache_file_hash", "ix_conversion_cache_status"}
+    with engine.begin() as conn:
+        assert conn.execute(
+            text("SELECT file_hash, quality, markdown_content FROM conversion_cache")
+        ).all() == [("abc", "standard", "# Old")]
+        # The same file and options in another quality is now a separate row
+        conn.execute(
+            text(
+                "INSERT INTO conversion_cache (file_hash, status, use_llm, "
+                "paginate_output, extract_images, force_ocr, quality) "
+                "VALUES ('abc', 'COMPLETED', 0, 0, 1, 0, 'draft')"
+            )
+        )
+
+    # An up-to-date table is left alone
+    base.rebuild_changed_unique_constraints()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM conversion_cache")).scalar() == 2
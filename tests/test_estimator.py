@@ -0,0 +1,62 @@
+import pytest
+
+from app.core.config import settings
+from app.services.estimator import PdfEstimate, _sample_indices, estimate_pdf
+from app.services.routing import (
+    PROFILE_FAST,
+    PROFILE_LARGE,
+    PROFILE_LLM,
+    PROFILE_OCR,
+    PROFILE_SMALL,
+    select_profile,
+)
+
+PROSE = "The quarterly report covers revenue, margin and forecast. " * 3
+SCAN = ("", (612, 792))
+
+
+def test_sample_indices():
+    assert _sample_indices(3, 5) == [0, 1, 2]
+    assert _sample_indices(101, 5) == [0, 25, 50, 75, 100]
+
+
+def test_estimate_text_pdf(tmp_path, write_pdf):
+    path = write_pdf(tmp_path / "text.pdf", [(PROSE, None)] * 3)
+    estimate = estimate_pdf(path)
+    assert estimate.page_count == 3
+    assert estimate.has_text_layer
+    assert estimate.file_size == (tmp_path / "text.pdf").stat().st_size
+
+
+def test_estimate_votes_over_sampled_pages(tmp_path, write_pdf):
+    mostly_scanned = write_pdf(tmp_path / "scan.pdf", [(PROSE, None)] + [SCAN] * 2)
+    assert not estimate_pdf(mostly_scanned).has_text_layer
+    mostly_text = write_pdf(tmp_path / "text.pdf", [(PROSE, None)] * 2 + [SCAN])
+    assert estimate_pdf(mostly_text).has_text_layer
+
+
+def test_unreadable_pdf_has_no_estimate(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"%PDF-1.4 not really")
+    assert estimate_pdf(str(path)) is None
+
+
+def estimate(pages, has_text_layer=True):
+    return PdfEstimate(page_count=pages, file_size=1024, has_text_layer=has_text_layer)
+
+
+@pytest.mark.parametrize(
+    "use_llm, estimated, profile",
+    [
+        (False, estimate(1), PROFILE_SMALL),
+        (False, estimate(settings.SMALL_JOB_MAX_PAGES), PROFILE_SMALL),
+        (False, estimate(settings.SMALL_JOB_MAX_PAGES + 1), PROFILE_FAST),
+        (False, estimate(1, has_text_layer=False), PROFILE_OCR),
+        (True, estimate(1), PROFILE_LLM),
+        (True, estimate(settings.LARGE_DOCUMENT_PAGES + 1), PROFILE_LARGE),
+        # Unreadable PDFs are not guessed small
+        (False, None, PROFILE_FAST),
+    ],
+)
+def test_size_classes(use_llm, estimated, profile):
+    assert select_profile(use_llm, False, 1024, estimated) == profile
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.db import models
+from app.db.base import SessionLocal
+from app.services.eviction import evict
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_PATH", str(tmp_path / "uploads"))
+    session = SessionLocal()
+    session.query(models.ConversionCache).delete()
+    session.commit()
+    yield session
+    session.query(models.ConversionCache).delete()
+    session.commit()
+    session.close()
+
+
+def add(db, file_hash, markdown, status="COMPLETED", hours_ago=0, access_count=0):
+    accessed = datetime.datetime.utcnow() - datetime.timedelta(hours=hours_ago)
+    db.add(
+        models.ConversionCache(
+            file_hash=file_hash,
+            status=status,
+            markdown_content=markdown,
+            processing_seconds=10.0,
+            created_at=accessed,
+            last_accessed=accessed,
+            access_count=access_count,
+        )
+    )
+    db.commit()
+
+
+def remaining(db):
+    return sorted(row.file_hash for row in db.query(models.ConversionCache.file_hash))
+
+
+def test_markdown_is_measured_in_bytes(db):
+    add(db, "a" * 64, "é" * 100)
+    add(db, "b" * 64, None, status="FAILED")
+
+    report = evict(db, max_bytes=0, max_rows=0)
+
+    assert report["rows_before"] == 2
+    assert report["bytes_before"] == 200
+    assert report["rows_evicted"] == 0
+
+
+def test_least_valuable_rows_go_first(db):
+    add(db, "failed".ljust(64, "0"), "x", status="FAILED")
+    add(db, "old".ljust(64, "0"), "x" * 100, hours_ago=24 * 30)
+    add(db, "popular".ljust(64, "0"), "x" * 100, access_count=50)
+    add(db, "recent".ljust(64, "0"), "x" * 100)
+
+    report = evict(db, max_rows=2, max_bytes=0)
+
+    assert report["rows_evicted"] == 2
+    assert report["bytes_reclaimed"]["markdown"] == 101
+    assert remaining(db) == ["popular".ljust(64, "0"), "recent".ljust(64, "0")]
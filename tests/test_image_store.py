@@ -0,0 +1,65 @@
+import os
+
+from PIL import Image
+
+from app.services.image_store import ImageStore
+
+
+def images(*colors):
+    return {
+        f"_page_0_Picture_{index}.png": Image.new("RGB", (32, 24), color)
+        for index, color in enumerate(colors)
+    }
+
+
+def test_identical_images_are_stored_once(tmp_path):
+    store = ImageStore(tmp_path)
+    first = store.save_document("a" * 64, images("red", "blue")).result()
+    second = store.save_document("b" * 64, images("red")).result()
+
+    assert (first["written"], first["reused"]) == (2, 0)
+    assert (second["written"], second["reused"]) == (0, 1)
+    blobs = list((tmp_path / "_blobs").rglob("*.png"))
+    assert len(blobs) == 2
+    assert store.referenced_blobs() == {blob.name for blob in blobs}
+
+
+def test_document_paths_link_to_blobs(tmp_path):
+    store = ImageStore(tmp_path)
+    result = store.save_document("a" * 64, images("red")).result()
+
+    (path,) = result["paths"]
+    assert path == f"{'a' * 64}/images/_page_0_Picture_0.png"
+    key = store.load_manifest("a" * 64)["_page_0_Picture_0.png"]
+    assert os.path.samefile(tmp_path / path, store.blob_path(key))
+
+
+def test_without_hardlinks_names_resolve_through_manifest(tmp_path):
+    store = ImageStore(tmp_path, hardlinks=False)
+    result = store.save_document("a" * 64, images("red")).result()
+
+    key = store.load_manifest("a" * 64)["_page_0_Picture_0.png"]
+    assert result["paths"] == [store.blob_relative_path(key)]
+    assert store.resolve("a" * 64, "/_page_0_Picture_0.png") == (
+        store.blob_relative_path(key)
+    )
+    # Documents converted before the store existed keep their paths
+    assert store.resolve("c" * 64, "old.png") == f"{'c' * 64}/images/old.png"
+
+
+def test_output_format_renames_images(tmp_path):
+    store = ImageStore(tmp_path, output_format="webp")
+    pending = store.save_document("a" * 64, images("red"))
+    pending.result()
+
+    assert pending.renames == {"_page_0_Picture_0.png": "_page_0_Picture_0.webp"}
+    (blob,) = list((tmp_path / "_blobs").rglob("*.webp"))
+    with Image.open(blob) as image:
+        assert image.format == "WEBP"
+
+
+def test_encoding_settings_are_part_of_the_key(tmp_path):
+    image = Image.new("RGB", (32, 24), "red")
+    assert ImageStore(tmp_path, quality=85).blob_key(image, "a.jpeg") != (
+        ImageStore(tmp_path, quality=60).blob_key(image, "a.jpeg")
+    )
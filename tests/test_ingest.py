@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.ingest import SettleTracker, ingest_profiles, is_candidate
+
+
+def write(path, data, mtime):
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+
+def test_is_candidate(tmp_path):
+    assert is_candidate(tmp_path / "report.PDF")
+    assert not is_candidate(tmp_path / ".report.pdf.part")
+    assert not is_candidate(tmp_path / ".report.pdf")
+    assert not is_candidate(tmp_path / "report.txt")
+
+
+def test_file_is_released_once_settled(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write(path, b"%PDF-1.4\n", 1000)
+    tracker = SettleTracker(settle_seconds=5)
+    tracker.touch(path, now=0)
+
+    # Still being written: its size changes and the clock restarts
+    write(path, b"%PDF-1.4\n...\n%%EOF\n", 1003)
+    assert tracker.ready(now=4) == []
+    assert tracker.ready(now=8) == []
+    assert tracker.ready(now=9) == [path]
+    assert len(tracker) == 0
+
+
+def test_incomplete_pdf_is_held_back(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write(path, b"%PDF-1.4\n truncated", 1000)
+    tracker = SettleTracker(settle_seconds=5)
+    tracker.touch(path, now=0)
+
+    assert tracker.ready(now=10) == []
+    # Released after ten settle periods, to fail conversion
+    assert tracker.ready(now=50) == [path]
+
+
+def test_deleted_file_is_dropped(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write(path, b"%PDF-1.4\n%%EOF\n", 1000)
+    tracker = SettleTracker(settle_seconds=5)
+    tracker.touch(path, now=0)
+    path.unlink()
+
+    assert tracker.ready(now=10) == []
+    assert len(tracker) == 0
+
+
+def test_ingest_profiles(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "INGEST_PROFILES",
+        [{}, {"quality": settings.DEFAULT_QUALITY}, {"paginate_output": True}],
+    )
+    profiles = ingest_profiles()
+    # The first two are the same conversion
+    assert len(profiles) == 2
+    assert profiles[1]["paginate_output"]
+
+    monkeypatch.setattr(settings, "INGEST_PROFILES", [{"colour": True}])
+    with pytest.raises(ValueError):
+        ingest_profiles()
@@ -0,0 +1,113 @@
+import pytest
+from PIL import Image
+from pydantic import BaseModel
+
+from app.db import models
+from app.db.base import SessionLocal
+from app.services.llm_cache import with_llm_cache
+from app.services.mock_llm import NO_CHANGES, MockLLMService
+
+TABLE_PROMPT = "Correct this table:\n| a | b |\n|---|---|\n| 1 | 2 |"
+
+
+class Correction(BaseModel):
+    corrected_markdown: str
+
+
+class CountingMockLLMService(MockLLMService):
+    """MockLLMService that counts the requests reaching it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return super().__call__(*args, **kwargs)
+
+
+class OtherMockLLMService(CountingMockLLMService):
+    """Same answers under another provider name"""
+
+
+class FailingMockLLMService(CountingMockLLMService):
+    """Answers like a marker service whose request failed"""
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return {}
+
+
+def ask(service, prompt=TABLE_PROMPT, color="white"):
+    image = Image.new("RGB", (32, 16), color)
+    return service(prompt, image, None, Correction)
+
+
+def cached_rows():
+    db = SessionLocal()
+    try:
+        return db.query(models.LLMResponseCache).count()
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    db = SessionLocal()
+    try:
+        db.query(models.LLMResponseCache).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_repeated_block_is_answered_from_cache():
+    service = with_llm_cache(CountingMockLLMService)()
+    first = ask(service)
+    second = ask(service)
+
+    assert first == second == {"corrected_markdown": NO_CHANGES}
+    assert service.calls == 1
+
+    # The cache is persistent: another task's service hits it too
+    other = with_llm_cache(CountingMockLLMService)()
+    assert ask(other) == first
+    assert other.calls == 0
+
+
+def test_different_block_is_a_miss():
+    service = with_llm_cache(CountingMockLLMService)()
+    ask(service)
+    ask(service, prompt=TABLE_PROMPT + "\n| 3 | 4 |")
+    ask(service, color="black")
+
+    assert service.calls == 3
+    assert cached_rows() == 3
+
+
+def test_empty_response_is_not_cached():
+    service = with_llm_cache(FailingMockLLMService)()
+    assert ask(service) == {}
+    assert ask(service) == {}
+
+    assert service.calls == 2
+    assert cached_rows() == 0
+
+
+def test_model_is_part_of_cache_key():
+    ask(with_llm_cache(CountingMockLLMService)())
+    service = with_llm_cache(CountingMockLLMService)()
+    service.mock_model_name = "mock-large"
+    ask(service)
+
+    assert service.calls == 1
+    assert cached_rows() == 2
+
+
+def test_provider_is_part_of_cache_key():
+    ask(with_llm_cache(CountingMockLLMService)())
+    service = with_llm_cache(OtherMockLLMService)()
+    ask(service)
+
+    assert service.calls == 1
+    assert cached_rows() == 2
@@ -0,0 +1,57 @@
+import pytest
+from celery import states
+
+from app.core.config import settings
+from app.db import crud, models
+from app.db.base import SessionLocal
+from app.services import local_backend
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(models.LocalTask).delete()
+    session.commit()
+    yield session
+    session.query(models.LocalTask).delete()
+    session.commit()
+    session.close()
+
+
+def add_task(db, task_id, queue, status=states.PENDING, estimated_pages=None):
+    crud.create_local_task(db, task_id, "convert", queue, estimated_pages, 1)
+    if status != states.PENDING:
+        crud.store_local_task_result(db, task_id, status, {})
+
+
+def test_queue_lengths_count_pending_tasks(db):
+    fast = settings.CONVERSION_QUEUES["fast"]
+    ocr = settings.CONVERSION_QUEUES["ocr"]
+    add_task(db, "t1", fast)
+    add_task(db, "t2", fast)
+    add_task(db, "t3", fast, status=states.STARTED)
+    add_task(db, "t4", ocr, status=states.SUCCESS)
+
+    lengths = local_backend.queue_lengths()
+
+    assert lengths[fast] == 2
+    assert lengths[ocr] == 0
+    assert set(lengths) == set(settings.CONVERSION_QUEUES.values())
+
+
+def test_find_queued_task_reports_position_across_queues(db):
+    fast = settings.CONVERSION_QUEUES["fast"]
+    ocr = settings.CONVERSION_QUEUES["ocr"]
+    add_task(db, "running", fast, status=states.STARTED)
+    add_task(db, "first", ocr)
+    add_task(db, "second", fast, estimated_pages=12)
+
+    # The pool runs tasks in submission order, whatever their queue
+    assert local_backend.find_queued_task("second") == {
+        "queue": fast,
+        "position": 1,
+        "estimated_pages": 12,
+    }
+    assert local_backend.find_queued_task("first")["position"] == 0
+    assert local_backend.find_queued_task("running") is None
+    assert local_backend.find_queued_task("unknown") is None
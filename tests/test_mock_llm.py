@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import dispatch
+
+
+class Sent:
+    """Stands in for the AsyncResult of a dispatched task"""
+
+    def __init__(self, kwargs, queue):
+        self.id = f"task-{id(self)}"
+        self.kwargs = kwargs
+        self.queue = queue
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    monkeypatch.setattr(settings, "MOCK_LLM", True)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", None)
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", False)
+    tasks = []
+
+    def send(task, args, kwargs, queue):
+        tasks.append(Sent(kwargs, queue))
+        return tasks[-1]
+
+    def send_group(jobs):
+        return "group", [send(*job).id for job in jobs]
+
+    monkeypatch.setattr(dispatch, "send", send)
+    monkeypatch.setattr(dispatch, "send_group", send_group)
+    return tasks
+
+
+def test_mock_llm_counts_as_available(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", None)
+    monkeypatch.setattr(settings, "MOCK_LLM", False)
+    assert not settings.llm_available
+    monkeypatch.setattr(settings, "MOCK_LLM", True)
+    assert settings.llm_available
+
+
+def test_convert_keeps_use_llm_with_mock_llm(sent, make_pdf):
+    response = TestClient(app).post(
+        "/v1/convert",
+        files={"file": ("doc.pdf", make_pdf(700), "application/pdf")},
+        data={"use_llm": "true"},
+    )
+
+    assert response.status_code == 202
+    assert [task.kwargs["use_llm"] for task in sent] == [True]
+    assert sent[0].queue == settings.CONVERSION_QUEUES["llm"]
+
+
+def test_batch_keeps_use_llm_with_mock_llm(sent, make_pdf):
+    files = [
+        ("files", (f"doc{width}.pdf", make_pdf(width), "application/pdf"))
+        for width in (701, 702)
+    ]
+    response = TestClient(app).post(
+        "/v1/batch/convert", files=files, data={"use_llm": "true"}
+    )
+
+    assert response.status_code == 202
+    assert [task.kwargs["use_llm"] for task in sent] == [True, True]
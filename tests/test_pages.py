@@ -0,0 +1,84 @@
+import pytest
+
+from app.services.pages import (
+    find_page_spans,
+    locate_pages,
+    page_spans,
+    parse_page_range,
+    split_pages,
+)
+from app.services.text_layer import PAGE_SEPARATOR
+
+
+def paginated(*pages):
+    return "".join(
+        f"\n\n{{{index}}}{PAGE_SEPARATOR}\n\n{page}" for index, page in enumerate(pages)
+    ).strip()
+
+
+# As marker renders a paragraph continuing on the next page: joined with a
+# space, and a hyphenated word without its hyphen
+PAGES = (
+    "# Title\n\nA paragraph that goes on ",
+    "to the next page and an exam",
+    "ple split over the break.\n\nLast paragraph.",
+)
+UNPAGINATED = (
+    "# Title\n\nA paragraph that goes on to the next page and an example split "
+    "over the break.\n\nLast paragraph."
+)
+
+
+def test_split_pages():
+    assert split_pages(paginated("one", "two")) == [(0, "one"), (1, "two")]
+    assert split_pages("no breaks") == [(0, "no breaks")]
+
+
+def test_find_page_spans():
+    text = paginated("one", "two")
+    spans = find_page_spans(text)
+    assert [text[start:end] for start, end in spans] == ["one", "two"]
+    assert find_page_spans("no breaks") is None
+
+
+def test_paragraph_continuing_on_next_page_stays_one_paragraph():
+    spans = page_spans(UNPAGINATED, paginated(*PAGES))
+
+    assert [UNPAGINATED[start:end] for start, end in spans] == [
+        "# Title\n\nA paragraph that goes on",
+        "to the next page and an exam",
+        "ple split over the break.\n\nLast paragraph.",
+    ]
+    # Pages are contiguous up to the joining space
+    assert spans[1][1] == spans[2][0]
+
+
+def test_paginated_text_is_indexed_by_its_breaks():
+    text = paginated(*PAGES)
+    spans = page_spans(text, None)
+    assert [text[start:end].strip() for start, end in spans] == [
+        page.strip() for page in PAGES
+    ]
+
+
+def test_empty_page_gets_an_empty_span():
+    pages = split_pages(paginated("one", "", "three"))
+    assert locate_pages("one\n\nthree", pages) == [[0, 3], [3, 3], [5, 10]]
+
+
+def test_page_missing_from_text_gives_no_index():
+    assert locate_pages("something else", split_pages(paginated("one"))) is None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("2-3", (2, 3)), ("2", (2, 2)), ("2-", (2, 5)), (" 1 - 9 ", (1, 5))],
+)
+def test_parse_page_range(value, expected):
+    assert parse_page_range(value, 5) == expected
+
+
+@pytest.mark.parametrize("value", ["", "a", "0", "3-2", "6", "1-2-3"])
+def test_parse_page_range_rejects(value):
+    with pytest.raises(ValueError):
+        parse_page_range(value, 5)
@@ -0,0 +1,50 @@
+import pytest
+
+from app.core.config import settings
+from app.services.routing import (
+    PROFILE_FAST,
+    PROFILE_LARGE,
+    PROFILE_LLM,
+    PROFILE_OCR,
+    all_queues,
+    default_queue,
+    queue_for_profile,
+    select_profile,
+)
+
+MB = 1024 * 1024
+
+
+@pytest.mark.parametrize(
+    "use_llm, force_ocr, file_size, profile",
+    [
+        (False, False, MB, PROFILE_FAST),
+        (True, False, MB, PROFILE_LLM),
+        (False, True, MB, PROFILE_OCR),
+        # LLM takes precedence over OCR, size over both
+        (True, True, MB, PROFILE_LLM),
+        (True, True, (settings.LARGE_DOCUMENT_MB + 1) * MB, PROFILE_LARGE),
+    ],
+)
+def test_select_profile(use_llm, force_ocr, file_size, profile):
+    assert select_profile(use_llm, force_ocr, file_size) == profile
+
+
+def test_queue_for_profile():
+    for profile, queue in settings.CONVERSION_QUEUES.items():
+        assert queue_for_profile(profile) == queue
+    assert queue_for_profile("unknown") == default_queue()
+
+
+def test_routing_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_ROUTING_ENABLED", False)
+    assert queue_for_profile(PROFILE_LLM) == default_queue()
+
+
+def test_all_queues(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "CONVERSION_QUEUES",
+        {"llm": "convert.slow", "ocr": "convert.slow", "fast": "convert.fast"},
+    )
+    assert all_queues() == ["convert.fast", "convert.slow"]
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.text_layer import (
+    PAGE_BLANK,
+    PAGE_GARBLED,
+    PAGE_IMAGE,
+    PAGE_TEXT,
+    classify_pages,
+    fast_path_decision,
+    pages_needing_ocr,
+)
+
+PROSE = "The quarterly report covers revenue, margin and forecast. " * 3
+
+
+def page(kind, index=0, image_coverage=0.0, images=0):
+    return {
+        "page": index,
+        "kind": kind,
+        "chars": 0,
+        "garbled_ratio": 0.0,
+        "image_coverage": image_coverage,
+        "images": images,
+    }
+
+
+def test_classify_pages(tmp_path, write_pdf):
+    path = write_pdf(
+        tmp_path / "mixed.pdf",
+        [
+            (PROSE, None),
+            ("", (612, 792)),  # Scan without a text layer
+            ("", None),  # Blank
+            ("- 2 -", None),  # Near-empty: only a page number
+            ("Figure 1", (200, 150)),  # Figure with a short caption
+        ],
+    )
+
+    assert [page["kind"] for page in classify_pages(path)] == [
+        PAGE_TEXT,
+        PAGE_IMAGE,
+        PAGE_BLANK,
+        PAGE_BLANK,
+        PAGE_TEXT,
+    ]
+
+
+def test_blank_pages_do_not_need_ocr():
+    pages = [
+        page(PAGE_TEXT, 0),
+        page(PAGE_BLANK, 1),
+        page(PAGE_IMAGE, 2, image_coverage=1.0, images=1),
+        page(PAGE_GARBLED, 3),
+    ]
+    assert pages_needing_ocr(pages) == [2, 3]
+
+
+def test_fast_path_takes_documents_with_blank_pages():
+    assert fast_path_decision([page(PAGE_TEXT, 0), page(PAGE_BLANK, 1)]) == (
+        True,
+        "clean text layer",
+    )
+
+
+@pytest.mark.parametrize(
+    "pages, extract_images, reason",
+    [
+        ([], False, "document has no pages"),
+        ([page(PAGE_BLANK, 0), page(PAGE_BLANK, 1)], False, "no page has text"),
+        ([page(PAGE_TEXT, 0), page(PAGE_IMAGE, 1)], False, "page 2 is image"),
+        ([page(PAGE_GARBLED, 0)], False, "page 1 is garbled"),
+        ([page(PAGE_TEXT, 0, image_coverage=0.5)], False, "page 1 is image-heavy"),
+        ([page(PAGE_TEXT, 0, images=1)], True, "page 1 has images to extract"),
+    ],
+)
+def test_fast_path_rejects(pages, extract_images, reason):
+    assert fast_path_decision(pages, extract_images) == (False, reason)